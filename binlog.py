@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import io
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Self
+
+from game import Game
+from player import Player
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import TracebackType
+
+"""
+    Binary game archive. All integers are little-endian.
+
+    file header   b"PCBL", u16 version, u16 reserved
+    game record   u32 move count, u16 FEN length, starting FEN (ascii), u16 move per ply
+    offset table  u64 file offset of every game record
+    trailer       u64 offset table offset, u32 game count, b"PCBI"
+
+    Moves use the 16-bit encoding of `bitboard.encode_move`. The offset table is written
+    when the writer is closed, and reopening a file to add games writes it again at the end.
+"""
+MAGIC = b"PCBL"
+TRAILER_MAGIC = b"PCBI"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<4sHH")
+_GAME_HEADER = struct.Struct("<IH")
+_TRAILER = struct.Struct("<QI4s")
+
+
+def _moves_to_bytes(moves: list[int]) -> bytes:
+    moves = array("H", moves)
+    if sys.byteorder == "big":
+        moves.byteswap()
+    return moves.tobytes()
+
+
+def _moves_from_bytes(data: bytes) -> array:
+    moves = array("H", data)
+    if sys.byteorder == "big":
+        moves.byteswap()
+    return moves
+
+
+class BinaryLogWriter:
+    file_name: str
+    offsets: list[int]
+    _file: BinaryIO
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.offsets = []
+        path = Path(file_name)
+        if path.exists() and path.stat().st_size:
+            self._file = path.open("r+b")
+            self._reopen()
+        else:
+            self._file = path.open("wb")
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, 0))
+
+    def _reopen(self):
+        """Load the offset table of an existing archive and drop it so games can follow"""
+        reader = BinaryLogReader(self.file_name)
+        self.offsets = list(reader.offsets)
+        table_offset = reader.table_offset
+        reader.close()
+        self._file.truncate(table_offset)
+        self._file.seek(table_offset)
+
+    def write_game(self, starting_fen: str, moves: list[int]) -> int:
+        """Append a game given its starting position and encoded moves, returning its index"""
+        fen = starting_fen.encode("ascii")
+        self.offsets.append(self._file.tell())
+        self._file.write(_GAME_HEADER.pack(len(moves), len(fen)))
+        self._file.write(fen)
+        self._file.write(_moves_to_bytes(moves))
+        return len(self.offsets) - 1
+
+    def add_game(self, game: Game) -> int:
+        return self.write_game(game.starting_fen(), [r.encode() for r in game.move_stack])
+
+    def close(self):
+        if self._file.closed:
+            return
+        table_offset = self._file.tell()
+        self._file.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+        self._file.write(_TRAILER.pack(table_offset, len(self.offsets), TRAILER_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+class BinaryLogReader:
+    """
+    Memory-mapped reader of a binary game archive. Games are located through the offset
+    table, so reading any game costs the same however large the archive is, and nothing
+    is parsed beyond the records actually read.
+    """
+
+    file_name: str
+    offsets: tuple[int, ...]
+    table_offset: int
+    _file: BinaryIO
+    _map: mmap.mmap
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._file = Path(file_name).open("rb")  # noqa: SIM115
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _ = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_name} is not a version {VERSION} binary game log")
+        self.table_offset, count, trailer_magic = _TRAILER.unpack_from(
+            self._map, len(self._map) - _TRAILER.size
+        )
+        if trailer_magic != TRAILER_MAGIC:
+            raise ValueError(f"{file_name} has no offset table, it was not closed")
+        self.offsets = struct.unpack_from(f"<{count}Q", self._map, self.table_offset)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read_game(self, index: int) -> tuple[str, array]:
+        """Starting FEN and encoded moves of a game"""
+        offset = self.offsets[index]
+        move_count, fen_length = _GAME_HEADER.unpack_from(self._map, offset)
+        offset += _GAME_HEADER.size
+        fen = self._map[offset : offset + fen_length].decode("ascii")
+        offset += fen_length
+        return fen, _moves_from_bytes(self._map[offset : offset + move_count * 2])
+
+    def __iter__(self) -> Iterator[tuple[str, array]]:
+        for index in range(len(self)):
+            yield self.read_game(index)
+
+    def replay(
+        self,
+        index: int,
+        ply: int | None = None,
+        player_types: tuple[type[Player], type[Player]] = (Player, Player),
+    ) -> Game:
+        """Game `index` after `ply` moves, or after all of them, with its move stack"""
+        fen, moves = self.read_game(index)
+        game = Game.from_fen(fen, player_types)
+        for code in moves[:ply]:
+            move = game.decode_move(code)
+            game.make_move(move.from_tile, move.to_tile, move.promotion)
+        return game
+
+    def game_log(self, index: int) -> BinaryGameLog:
+        return BinaryGameLog(self, index)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+class BinaryGameLog:
+    """
+    Read-only view of one archived game with the interface of `GameLog`, so that
+    `Game.from_log` can resume it from its last position or from any ply.
+    """
+
+    reader: BinaryLogReader
+    index: int
+
+    writable = False
+
+    def __init__(self, reader: BinaryLogReader, index: int):
+        self.reader = reader
+        self.index = index
+
+    def __len__(self):
+        _, moves = self.reader.read_game(self.index)
+        return len(moves) + 1
+
+    def get_fen(self, ply: int) -> str:
+        return self.replay(ply).to_fen()
+
+    def replay(
+        self,
+        ply: int | None = None,
+        player_types: tuple[type[Player], type[Player]] = (Player, Player),
+    ) -> Game:
+        """The game after `ply` moves, or after all of them, not logged anywhere"""
+        if ply is not None and not 0 <= ply < len(self):
+            raise IndexError(f"Ply {ply} is not in the log")
+        return self.reader.replay(self.index, ply, player_types)
+
+    def get_latest_fen(self) -> str:
+        return self.reader.replay(self.index).to_fen()
+
+    def append(self, _: Game):
+        raise io.UnsupportedOperation("Archived games are read-only")
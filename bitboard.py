@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from enums import PieceDirection, TeamColour
+from zobrist import (
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    PIECE_KEYS,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+"""
+    Squares are numbered 0-63 from A1 to H8, rank by rank, so that A1 = 0, H1 = 7 and
+    A8 = 56. A bitboard is a python int with bit n set when square n is in the set.
+"""
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLOURS = {TeamColour.WHITE: WHITE, TeamColour.BLACK: BLACK}
+
+ALL_SQUARES = (1 << 64) - 1
+RANK_3 = 0xFF << 16
+RANK_6 = 0xFF << 40
+BACK_RANKS = 0xFF | 0xFF << 56
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+
+ROOK_DIRECTIONS = (
+    PieceDirection.UP,
+    PieceDirection.RIGHT,
+    PieceDirection.DOWN,
+    PieceDirection.LEFT,
+)
+BISHOP_DIRECTIONS = (
+    PieceDirection.UPRIGHT,
+    PieceDirection.DOWNRIGHT,
+    PieceDirection.DOWNLEFT,
+    PieceDirection.UPLEFT,
+)
+
+
+"""
+    Castling rights that survive a move from or to each square. Moving the king or a rook,
+    or capturing a rook on its starting square, gives up the rights that depend on it.
+"""
+ALL_CASTLING_RIGHTS = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+CASTLING_MASKS = [ALL_CASTLING_RIGHTS] * 64
+CASTLING_MASKS[0] ^= WHITE_QUEENSIDE
+CASTLING_MASKS[4] ^= WHITE_KINGSIDE | WHITE_QUEENSIDE
+CASTLING_MASKS[7] ^= WHITE_KINGSIDE
+CASTLING_MASKS[56] ^= BLACK_QUEENSIDE
+CASTLING_MASKS[60] ^= BLACK_KINGSIDE | BLACK_QUEENSIDE
+CASTLING_MASKS[63] ^= BLACK_KINGSIDE
+
+"""
+    Castling moves per colour: the right needed, the king's start and end squares, the
+    squares that must be empty and the squares the king must not be attacked on.
+"""
+CASTLING_MOVES = (
+    (
+        (WHITE_KINGSIDE, 4, 6, 0x60, 0x70),
+        (WHITE_QUEENSIDE, 4, 2, 0x0E, 0x1C),
+    ),
+    (
+        (BLACK_KINGSIDE, 60, 62, 0x60 << 56, 0x70 << 56),
+        (BLACK_QUEENSIDE, 60, 58, 0x0E << 56, 0x1C << 56),
+    ),
+)
+CASTLING_ROOK_SQUARES = {6: (7, 5), 2: (0, 3), 62: (63, 61), 58: (56, 59)}
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+
+def square_index(file: int, rank: int) -> int:
+    return rank * 8 + file
+
+
+def encode_move(from_square: int, to_square: int, promotion: int = 0) -> int:
+    """Pack a move into 16 bits: 6 for each square and 4 for the kind promoted to, if any"""
+    return promotion << 12 | to_square << 6 | from_square
+
+
+def decode_move(code: int) -> tuple[int, int, int]:
+    return (code & 0x3F, (code >> 6) & 0x3F, code >> 12)
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+
+def _step_targets(square: int, steps: list[tuple[int, int]]) -> int:
+    file, rank = square % 8, square // 8
+    targets = 0
+    for file_step, rank_step in steps:
+        to_file, to_rank = file + file_step, rank + rank_step
+        if 0 <= to_file < 8 and 0 <= to_rank < 8:
+            targets |= 1 << square_index(to_file, to_rank)
+    return targets
+
+
+def _ray(square: int, direction: PieceDirection) -> int:
+    file_step, rank_step = direction.value
+    file, rank = square % 8 + file_step, square // 8 + rank_step
+    ray = 0
+    while 0 <= file < 8 and 0 <= rank < 8:
+        ray |= 1 << square_index(file, rank)
+        file, rank = file + file_step, rank + rank_step
+    return ray
+
+
+KNIGHT_ATTACKS = [
+    _step_targets(sq, [(1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2), (1, -2), (2, -1), (2, 1)])
+    for sq in range(64)
+]
+KING_ATTACKS = [
+    _step_targets(sq, [direction.value for direction in PieceDirection]) for sq in range(64)
+]
+PAWN_ATTACKS = [
+    [_step_targets(sq, [(1, 1), (-1, 1)]) for sq in range(64)],
+    [_step_targets(sq, [(1, -1), (-1, -1)]) for sq in range(64)],
+]
+RAYS = {direction: [_ray(sq, direction) for sq in range(64)] for direction in PieceDirection}
+
+
+def _lines() -> tuple[list[list[int]], list[list[int]]]:
+    between = [[0] * 64 for _ in range(64)]
+    lines = [[0] * 64 for _ in range(64)]
+    for direction in PieceDirection:
+        opposite = PieceDirection((-direction.value[0], -direction.value[1]))
+        for start in range(64):
+            full_line = RAYS[direction][start] | RAYS[opposite][start] | (1 << start)
+            for end in iter_squares(RAYS[direction][start]):
+                between[start][end] = RAYS[direction][start] & ~RAYS[direction][end] & ~(1 << end)
+                lines[start][end] = full_line
+    return between, lines
+
+
+"""
+    BETWEEN[a][b] holds the squares strictly between two squares on a shared rank, file or
+    diagonal, LINE[a][b] the whole line through both of them. Both are empty otherwise.
+"""
+BETWEEN, LINE = _lines()
+
+"""
+    A ray runs towards higher square numbers when it goes up the board, or right along a
+    rank. The nearest blocker on such a ray is its lowest set bit, otherwise its highest.
+"""
+_INCREASING_DIRECTIONS = {
+    PieceDirection.UP,
+    PieceDirection.UPRIGHT,
+    PieceDirection.RIGHT,
+    PieceDirection.UPLEFT,
+}
+
+
+def _ray_attacks(square: int, occupied: int, directions: tuple[PieceDirection, ...]) -> int:
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][square]
+        if blockers := ray & occupied:
+            if direction in _INCREASING_DIRECTIONS:
+                nearest = (blockers & -blockers).bit_length() - 1
+            else:
+                nearest = blockers.bit_length() - 1
+            ray ^= RAYS[direction][nearest]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    return _ray_attacks(square, occupied, ROOK_DIRECTIONS)
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    return _ray_attacks(square, occupied, BISHOP_DIRECTIONS)
+
+
+def queen_attacks(square: int, occupied: int) -> int:
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+class BitBoard:
+    """
+    Compact mirror of a `Board`: one integer per colour and piece kind. `Tile.enter` and
+    `Tile.vacate` keep it in sync, so attack and move queries never walk the tile graph.
+    `key` is the Zobrist hash of the pieces, updated as they are put and removed.
+
+    The squares each colour attacks are kept per colour with the key they were worked out
+    for. Until the pieces change they answer attack queries in O(1), and taking a move
+    back restores the key, so the map of the earlier position is used again.
+    """
+
+    pieces: list[list[int]]
+    occupancy: list[int]
+    key: int
+    attack_maps: list[tuple[int | None, int]]
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+        self.key = 0
+        self.attack_maps = [(None, 0), (None, 0)]
+
+    def put(self, square: int, colour: int, kind: int):
+        bit = 1 << square
+        self.pieces[colour][kind] |= bit
+        self.occupancy[colour] |= bit
+        self.key ^= PIECE_KEYS[colour][kind][square]
+
+    def remove(self, square: int, colour: int, kind: int):
+        mask = ~(1 << square)
+        self.pieces[colour][kind] &= mask
+        self.occupancy[colour] &= mask
+        self.key ^= PIECE_KEYS[colour][kind][square]
+
+    def king_square(self, colour: int) -> int | None:
+        kings = self.pieces[colour][KING]
+        return kings.bit_length() - 1 if kings else None
+
+    def attacks(self, square: int, colour: int, kind: int, occupied: int | None = None) -> int:
+        """Squares attacked by a piece of the given colour and kind standing on `square`"""
+        if kind == PAWN:
+            return PAWN_ATTACKS[colour][square]
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        if kind == KING:
+            return KING_ATTACKS[square]
+
+        occupied = self.occupied if occupied is None else occupied
+        if kind == BISHOP:
+            return bishop_attacks(square, occupied)
+        if kind == ROOK:
+            return rook_attacks(square, occupied)
+        return queen_attacks(square, occupied)
+
+    def pawn_pushes(self, square: int, colour: int) -> int:
+        """
+        A pawn can advance two squares only from its starting rank, which is the same as
+        never having moved since pawns cannot go backwards.
+        """
+        empty = ALL_SQUARES & ~self.occupied
+        if colour == WHITE:
+            single = (1 << square << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+        else:
+            single = (1 << square >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+        return single | double
+
+    def attackers_to(self, square: int, colour: int, occupied: int | None = None) -> int:
+        """Pieces of `colour` that attack `square`"""
+        occupied = self.occupied if occupied is None else occupied
+        pieces = self.pieces[colour]
+        queens = pieces[QUEEN]
+        return (
+            (PAWN_ATTACKS[1 - colour][square] & pieces[PAWN])
+            | (KNIGHT_ATTACKS[square] & pieces[KNIGHT])
+            | (KING_ATTACKS[square] & pieces[KING])
+            | (bishop_attacks(square, occupied) & (pieces[BISHOP] | queens))
+            | (rook_attacks(square, occupied) & (pieces[ROOK] | queens))
+        )
+
+    def attack_map(self, colour: int) -> int:
+        """
+        Every square attacked by `colour`. Sliders see through the enemy king, so a king
+        cannot step back along the line of a check.
+        """
+        key, attacks = self.attack_maps[colour]
+        if key == self.key:
+            return attacks
+
+        pieces = self.pieces[colour]
+        occupied = self.occupied & ~self.pieces[1 - colour][KING]
+        pawns = pieces[PAWN]
+        if colour == WHITE:
+            attacks = (pawns & ~FILE_A) << 7 | (pawns & ~FILE_H) << 9
+        else:
+            attacks = (pawns & ~FILE_A) >> 9 | (pawns & ~FILE_H) >> 7
+        attacks &= ALL_SQUARES
+        for square in iter_squares(pieces[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[square]
+        for square in iter_squares(pieces[BISHOP] | pieces[QUEEN]):
+            attacks |= bishop_attacks(square, occupied)
+        for square in iter_squares(pieces[ROOK] | pieces[QUEEN]):
+            attacks |= rook_attacks(square, occupied)
+        for square in iter_squares(pieces[KING]):
+            attacks |= KING_ATTACKS[square]
+
+        self.attack_maps[colour] = (self.key, attacks)
+        return attacks
+
+    def is_attacked(self, square: int, by_colour: int) -> bool:
+        return bool(self.attack_map(by_colour) >> square & 1)
+
+    def pinned(self, colour: int) -> int:
+        """Pieces of `colour` that cannot leave the line between their king and an attacker"""
+        king = self.king_square(colour)
+        enemy = self.pieces[1 - colour]
+        occupied = self.occupied
+        snipers = (rook_attacks(king, 0) & (enemy[ROOK] | enemy[QUEEN])) | (
+            bishop_attacks(king, 0) & (enemy[BISHOP] | enemy[QUEEN])
+        )
+        pinned = 0
+        for sniper in iter_squares(snipers):
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers & self.occupancy[colour]
+        return pinned
+
+    def legal_moves(
+        self, colour: int, castling_rights: int = 0, en_passant_square: int | None = None
+    ) -> list[tuple[int, int, int]]:
+        """
+        (from, to, promotion) of every legal move for `colour`, where promotion is the kind
+        a pawn becomes or 0. Checks and pins are worked out once for the position, so no
+        move has to be played to see if it is legal.
+        """
+        enemy = 1 - colour
+        own = self.occupancy[colour]
+        occupied = self.occupied
+        king = self.king_square(colour)
+
+        moves, checkers = self._king_moves(colour, king)
+        if checkers & (checkers - 1):
+            return moves
+
+        allowed = ALL_SQUARES & ~own
+        if checkers:
+            allowed &= checkers | BETWEEN[king][checkers.bit_length() - 1]
+        elif castling_rights:
+            moves.extend(self._castling_moves(colour, castling_rights))
+        pinned = self.pinned(colour)
+        pieces = self.pieces[colour]
+
+        for kind in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN):
+            for square in iter_squares(pieces[kind]):
+                if kind == PAWN:
+                    targets = self.pawn_pushes(square, colour) | (
+                        PAWN_ATTACKS[colour][square] & self.occupancy[enemy]
+                    )
+                else:
+                    targets = self.attacks(square, colour, kind, occupied)
+                targets &= allowed
+                if pinned >> square & 1:
+                    targets &= LINE[king][square]
+                if kind == PAWN and targets & BACK_RANKS:
+                    moves.extend(
+                        (square, to, promotion)
+                        for to in iter_squares(targets)
+                        for promotion in PROMOTION_KINDS
+                    )
+                else:
+                    moves.extend((square, to, 0) for to in iter_squares(targets))
+
+        if en_passant_square is not None:
+            moves.extend(self._en_passant_moves(colour, en_passant_square))
+        return moves
+
+    def _king_moves(self, colour: int, king: int) -> tuple[list[tuple[int, int, int]], int]:
+        """Moves of the king other than castling, and the pieces giving check"""
+        enemy = 1 - colour
+        # A boxed in king needs no attack map, only a check for checkers
+        if not (targets := KING_ATTACKS[king] & ~self.occupancy[colour]):
+            return [], self.attackers_to(king, enemy)
+
+        enemy_attacks = self.attack_map(enemy)
+        moves = [(king, to, 0) for to in iter_squares(targets & ~enemy_attacks)]
+        checkers = self.attackers_to(king, enemy) if enemy_attacks >> king & 1 else 0
+        return moves, checkers
+
+    def standing_castling_rights(self) -> int:
+        """Castling rights of the kings and rooks that stand on their starting squares"""
+        rights = 0
+        for colour in (WHITE, BLACK):
+            for right, king, to, _, _ in CASTLING_MOVES[colour]:
+                if (
+                    self.pieces[colour][KING] >> king & 1
+                    and self.pieces[colour][ROOK] >> CASTLING_ROOK_SQUARES[to][0] & 1
+                ):
+                    rights |= right
+        return rights
+
+    def _castling_moves(self, colour: int, castling_rights: int) -> list[tuple[int, int, int]]:
+        """Castling moves for a king that is not in check"""
+        moves = []
+        for right, king, to, empty, safe in CASTLING_MOVES[colour]:
+            if (
+                castling_rights & right
+                and self.pieces[colour][KING] >> king & 1
+                and not self.occupied & empty
+                and not self.attack_map(1 - colour) & safe
+                and self.pieces[colour][ROOK] >> CASTLING_ROOK_SQUARES[to][0] & 1
+            ):
+                moves.append((king, to, 0))
+        return moves
+
+    def _en_passant_moves(self, colour: int, square: int) -> list[tuple[int, int, int]]:
+        """
+        En passant captures onto `square`. Two pawns leave the same rank at once, which can
+        expose the king in ways the pin test misses, so each capture is checked by
+        looking for attackers of the king with both pawns gone.
+        """
+        enemy = 1 - colour
+        captured = 1 << (square ^ 8)
+        king = self.king_square(colour)
+        moves = []
+        for pawn in iter_squares(PAWN_ATTACKS[enemy][square] & self.pieces[colour][PAWN]):
+            occupied = (self.occupied ^ (1 << pawn) ^ captured) | 1 << square
+            if not self.attackers_to(king, enemy, occupied) & ~captured:
+                moves.append((pawn, square, 0))
+        return moves
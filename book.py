@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import random
+import struct
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Self
+
+from binlog import BinaryLogReader
+from bitboard import COLOURS
+from game import Game
+from pgn import read_games
+from player import Player
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+    from game import Move
+
+"""
+    Opening book file, laid out like a Polyglot book: big-endian entries of 16 bytes,
+    sorted by key and then by weight, highest first.
+
+    entry   u64 position key, u16 move, u16 weight, u32 games the move was played in
+
+    Keys are `Game.key` and moves use the 16-bit encoding of `bitboard.encode_move`, so
+    the files are not interchangeable with Polyglot books built with its own keys.
+"""
+ENTRY = struct.Struct(">QHHI")
+MAX_WEIGHT = 0xFFFF
+
+"""
+    Only the first moves of each game go into the book, where games share positions.
+"""
+DEFAULT_BOOK_PLIES = 20
+
+"""
+    Points a move earns for the side that played it in a game with each result, as in
+    Polyglot: two for a win and one for a draw. Unfinished games count as draws.
+"""
+RESULT_POINTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1), "*": (1, 1)}
+
+
+class BookEntry:
+    move: int
+    weight: int
+    games: int
+
+    def __init__(self, move: int, weight: int, games: int):
+        self.move = move
+        self.weight = weight
+        self.games = games
+
+
+class BookBuilder:
+    """
+    Collects the opening moves of many games, from PGN files, tournament results or
+    binary logs, and writes them as a sorted book.
+    """
+
+    max_plies: int
+    points: Counter[tuple[int, int]]
+    games: Counter[tuple[int, int]]
+
+    def __init__(self, max_plies: int = DEFAULT_BOOK_PLIES):
+        self.max_plies = max_plies
+        self.points = Counter()
+        self.games = Counter()
+
+    def add_game(self, game: Game, result: str = "*"):
+        """Add the first moves of a game that has been played, read back from its move stack"""
+        points = RESULT_POINTS.get(result, RESULT_POINTS["*"])
+        for record in islice(game.move_stack, self.max_plies):
+            entry = (record.key, record.encode())
+            self.points[entry] += points[COLOURS[record.piece.team_colour]]
+            self.games[entry] += 1
+
+    def add_pgn(self, lines: Iterable[str]):
+        """Add the games of a PGN file, leaving out any whose movetext could not be read"""
+        for pgn_game in read_games(lines):
+            if pgn_game.error is None:
+                self.add_game(pgn_game.game, pgn_game.result)
+
+    def add_tournament_records(self, lines: Iterable[str]):
+        """Add the games of a tournament results file, replaying the moves of each"""
+        for line in lines:
+            record = json.loads(line)
+            game = Game(player_types=(Player, Player))
+            for move_name in record["moves"][: self.max_plies]:
+                from_tile_name, to_tile_name, *promotion_name = move_name.split(" ")
+                move = game.validate_move(
+                    game.board.get_tile_by_name(from_tile_name),
+                    game.board.get_tile_by_name(to_tile_name),
+                    game.players[game.current_turn],
+                    *promotion_name,
+                )
+                game.make_move(move.from_tile, move.to_tile, move.promotion)
+            self.add_game(game, record["result"])
+
+    def add_binary_log(self, reader: BinaryLogReader):
+        for index in range(len(reader)):
+            self.add_game(reader.replay(index, self.max_plies))
+
+    def write(self, file_name: str) -> int:
+        """
+        Write the book and return its number of entries. Moves that never earned a point
+        are left out, and weights are scaled down together if any is over MAX_WEIGHT.
+        """
+        scale = max(1, -(-max(self.points.values(), default=0) // MAX_WEIGHT))
+        entries = sorted(
+            (key, -max(points // scale, 1), move)
+            for (key, move), points in self.points.items()
+            if points
+        )
+        with Path(file_name).open("wb") as file:
+            file.writelines(
+                ENTRY.pack(key, move, -weight, self.games[key, move])
+                for key, weight, move in entries
+            )
+        return len(entries)
+
+
+class OpeningBook:
+    """
+    Memory-mapped opening book. A lookup binary searches the sorted entries in place, so
+    it costs a few microseconds whatever the size of the book and reads nothing else.
+    """
+
+    file_name: str
+    _file: BinaryIO
+    _map: mmap.mmap | None
+    _count: int
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._file = Path(file_name).open("rb")  # noqa: SIM115
+        size = Path(file_name).stat().st_size
+        if size % ENTRY.size:
+            raise ValueError(f"{file_name} is not an opening book")
+        self._count = size // ENTRY.size
+        # An empty file cannot be mapped, and has nothing to look up anyway
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self):
+        return self._count
+
+    def __reduce__(self) -> tuple[type[OpeningBook], tuple[str]]:
+        """Books are reopened from their file when sent to another process"""
+        return OpeningBook, (self.file_name,)
+
+    def _key_at(self, index: int) -> int:
+        return ENTRY.unpack_from(self._map, index * ENTRY.size)[0]
+
+    def entries(self, key: int) -> list[BookEntry]:
+        """The moves stored for a position key, highest weight first"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        for index in range(low, self._count):
+            entry_key, move, weight, games = ENTRY.unpack_from(self._map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append(BookEntry(move, weight, games))
+        return entries
+
+    def moves(self, game: Game) -> list[tuple[Move, int]]:
+        """Book moves of the game's position with their weights"""
+        moves = []
+        player = game.players[game.current_turn]
+        for entry in self.entries(game.key):
+            move = game.decode_move(entry.move)
+            # Guards against a key collision without generating every legal move
+            if move.from_tile.piece and move.from_tile.piece.team_colour == player.team_colour:
+                moves.append((move, entry.weight))
+        return moves
+
+    def choose(self, game: Game, rng: random.Random | None = None) -> Move | None:
+        """A book move picked at random in proportion to its weight, or None out of book"""
+        if not (moves := self.moves(game)):
+            return None
+        [move] = (rng or random).choices(
+            [move for move, _ in moves], weights=[weight for _, weight in moves]
+        )
+        return move
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from played games")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("--pgn", nargs="*", default=[], help="PGN files")
+    parser.add_argument("--tournament", nargs="*", default=[], help="tournament results files")
+    parser.add_argument("--binlog", nargs="*", default=[], help="binary game logs")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_BOOK_PLIES)
+    args = parser.parse_args()
+
+    builder = BookBuilder(args.max_plies)
+    for file_name in args.pgn:
+        with Path(file_name).open() as lines:
+            builder.add_pgn(lines)
+    for file_name in args.tournament:
+        with Path(file_name).open() as lines:
+            builder.add_tournament_records(lines)
+    for file_name in args.binlog:
+        with BinaryLogReader(file_name) as reader:
+            builder.add_binary_log(reader)
+    print(f"Wrote {builder.write(args.output)} entries to {args.output}")
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Self, TextIO
+
+import httpx
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+DEFAULT_URL = "https://chess-api.com/v1"
+
+"""
+    Requests that fail with a connection error, a timeout or a server error are retried
+    this many times, waiting RETRY_BACKOFF seconds and then twice as long each time.
+"""
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.25
+
+
+def _cache_key(fen: str) -> str:
+    """The best move does not depend on the move counters, so they are left out"""
+    return " ".join(fen.split()[:4])
+
+
+class MoveCache:
+    """
+    FEN to best move cache kept in memory and appended to a text file, one tab separated
+    entry per line, so answers survive restarts and repeated positions skip the network.
+    """
+
+    file_name: str
+    moves: dict[str, tuple[str, ...]]
+    _file: TextIO
+    _lock: threading.Lock
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.moves = {}
+        path = Path(file_name)
+        if path.exists():
+            with path.open() as file:
+                for line in file:
+                    fen, _, move = line.rstrip("\n").partition("\t")
+                    if move:
+                        self.moves[fen] = tuple(move.split(" "))
+        self._file = path.open("a")
+        self._lock = threading.Lock()
+
+    def get(self, fen: str) -> tuple[str, ...] | None:
+        return self.moves.get(_cache_key(fen))
+
+    def put(self, fen: str, move: tuple[str, ...]):
+        key = _cache_key(fen)
+        with self._lock:
+            if key not in self.moves:
+                self.moves[key] = move
+                self._file.write(f"{key}\t{' '.join(move)}\n")
+                self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ChessApiClient:
+    """
+    Client for the chess-api.com best move endpoint. Connections are pooled and kept
+    alive across moves and games, so a player only pays for the TLS handshake once.
+
+    The async methods let many games wait on the API at once. An async pool belongs to the
+    event loop it was opened on, so requests made within `async with client` share one
+    that is closed as the block ends, and a request made outside one opens and closes its
+    own.
+    """
+
+    url: str
+    timeout: float
+    retries: int
+    max_connections: int
+    cache: MoveCache | None
+    _client: httpx.Client | None
+    _async_client: httpx.AsyncClient | None
+    _async_loop: asyncio.AbstractEventLoop | None
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        *,
+        timeout: float = 10.0,
+        retries: int = DEFAULT_RETRIES,
+        max_connections: int = 20,
+        cache_file: str | None = None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.max_connections = max_connections
+        self.cache = MoveCache(cache_file) if cache_file else None
+        self._client = None
+        self._async_client = None
+        self._async_loop = None
+
+    def _client_options(self) -> dict[str, any]:
+        return {
+            "timeout": httpx.Timeout(self.timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    @staticmethod
+    def _is_retryable(error: httpx.HTTPError) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+
+    @staticmethod
+    def _to_move(response: httpx.Response) -> tuple[str, ...]:
+        """Tile names as a player returns them, with the promotion letter if any"""
+        response.raise_for_status()
+        response_json = response.json()
+        promotion = response_json.get("promotion")
+        return (
+            response_json["from"].upper(),
+            response_json["to"].upper(),
+            *([promotion.upper()] if promotion else []),
+        )
+
+    def best_move(self, fen: str) -> tuple[str, ...]:
+        if self.cache and (move := self.cache.get(fen)):
+            return move
+
+        for attempt in range(self.retries + 1):
+            try:
+                move = self._to_move(self.client.post(self.url, data={"fen": fen}))
+                break
+            except httpx.HTTPError as e:
+                if attempt == self.retries or not self._is_retryable(e):
+                    raise
+                time.sleep(RETRY_BACKOFF * 2**attempt)
+
+        if self.cache:
+            self.cache.put(fen, move)
+        return move
+
+    async def best_move_async(self, fen: str) -> tuple[str, ...]:
+        if self.cache and (move := self.cache.get(fen)):
+            return move
+
+        if self._async_loop is asyncio.get_running_loop():
+            move = await self._post_async(self._async_client, fen)
+        else:
+            async with httpx.AsyncClient(**self._client_options()) as client:
+                move = await self._post_async(client, fen)
+
+        if self.cache:
+            self.cache.put(fen, move)
+        return move
+
+    async def _post_async(self, client: httpx.AsyncClient, fen: str) -> tuple[str, ...]:
+        for attempt in range(self.retries + 1):
+            try:
+                move = self._to_move(await client.post(self.url, data={"fen": fen}))
+                break
+            except httpx.HTTPError as e:
+                if attempt == self.retries or not self._is_retryable(e):
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+        return move
+
+    def best_moves(self, fens: Iterable[str]) -> list[tuple[str, ...]]:
+        """Best moves of many positions, requested concurrently over the async pool"""
+
+        async def request_all() -> list[tuple[str, ...]]:
+            async with self:
+                return await asyncio.gather(*(self.best_move_async(fen) for fen in fens))
+
+        return asyncio.run(request_all())
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self.cache:
+            self.cache.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    async def __aenter__(self) -> Self:
+        """Open an async pool for the requests made on the running event loop"""
+        self._async_client = httpx.AsyncClient(**self._client_options())
+        self._async_loop = asyncio.get_running_loop()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        await self.aclose()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+@cache
+def default_client() -> ChessApiClient:
+    """
+    Client shared by every player in the process that is not given one. It is closed when
+    the process exits.
+    """
+    client = ChessApiClient()
+    atexit.register(client.close)
+    return client
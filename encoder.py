@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from bitboard import BLACK, COLOURS
+from fen import CASTLING_RIGHTS, PIECE_SYMBOLS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from game import Game
+
+"""
+    Positions are encoded as two arrays with one row per position.
+
+    planes     bool (N, 12, 8, 8), a plane per colour and kind in the order of `bitboard`,
+               white pawn to black king, indexed by rank and then file so that A1 is
+               [0, 0] and H8 is [7, 7]
+    features   bool (N, 13), black to move, the castling rights K, Q, k and q, then the
+               file of the en passant square, if any, as one flag per file
+"""
+PLANE_COUNT = 12
+FEATURE_COUNT = 13
+BLACK_TO_MOVE_FEATURE = 0
+CASTLING_FEATURES = slice(1, 5)
+EN_PASSANT_FEATURES = slice(5, 13)
+
+"""
+    Positions encoded per chunk when streaming, about 10 MB of planes per chunk.
+"""
+CHUNK_SIZE = 1 << 14
+
+"""
+    Plane of each byte of the placement field of a FEN, with PLANE_COUNT for empty squares,
+    and the number of squares it stands for: one per piece, n for digit n and none for
+    the rank separator. Repeating each byte's plane that many times gives the 64 squares
+    from A8 to H8 and down to A1 to H1.
+"""
+_SYMBOL_PLANES = np.full(256, -1, dtype=np.int8)
+_SYMBOL_WIDTHS = np.ones(256, dtype=np.intp)
+for _plane, _symbol in enumerate("".join(PIECE_SYMBOLS)):
+    _SYMBOL_PLANES[ord(_symbol)] = _plane
+for _width in range(1, 9):
+    _SYMBOL_PLANES[ord(str(_width))] = PLANE_COUNT
+    _SYMBOL_WIDTHS[ord(str(_width))] = _width
+_SYMBOL_PLANES[ord("/")] = PLANE_COUNT
+_SYMBOL_WIDTHS[ord("/")] = 0
+_PLANES = np.arange(PLANE_COUNT, dtype=np.int8)
+
+
+@cache
+def _castling_rights(field: str) -> int:
+    if field == "-":
+        return 0
+    if any(symbol not in CASTLING_RIGHTS for symbol in field):
+        raise ValueError(f"Invalid castling field in FEN: {field}")
+    return sum(CASTLING_RIGHTS[symbol] for symbol in set(field))
+
+
+def _features(
+    black_to_move: np.ndarray, castling_rights: np.ndarray, en_passant_files: np.ndarray
+) -> np.ndarray:
+    """Feature rows from the side to move, castling masks and en passant files, -1 for none"""
+    features = np.zeros((len(black_to_move), FEATURE_COUNT), dtype=bool)
+    features[:, BLACK_TO_MOVE_FEATURE] = black_to_move
+    features[:, CASTLING_FEATURES] = (castling_rights[:, None] >> np.arange(4)) & 1
+    rows = np.flatnonzero(en_passant_files >= 0)
+    features[rows, EN_PASSANT_FEATURES.start + en_passant_files[rows]] = True
+    return features
+
+
+def encode_fens(fens: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Planes and features of many FENs. Each FEN is only split in Python, the squares of
+    all of them are decoded in a handful of array operations.
+    """
+    fields = [fen.split() for fen in fens]
+    if any(len(position) < 4 for position in fields):
+        raise ValueError("FEN must have at least four fields")
+
+    placements = [position[0] for position in fields]
+    symbols = np.frombuffer("".join(placements).encode(), dtype=np.uint8)
+    widths = _SYMBOL_WIDTHS[symbols]
+    lengths = list(map(len, placements))
+    starts = np.cumsum([0, *lengths[:-1]])
+    slashes = symbols == ord("/")
+    if fields and (
+        (np.add.reduceat(widths, starts) != 64).any()
+        or (np.add.reduceat(slashes, starts, dtype=np.intp) != 7).any()
+    ):
+        raise ValueError("FEN placement must describe 64 squares in 8 ranks")
+    # Counted from the start of all placements, a slash ending a rank 8 squares wide has 8
+    # squares before it per slash so far, and 8 more for each placement before its own
+    rank_ends = (np.cumsum(widths) - 8 * np.cumsum(slashes))[slashes]
+    if (rank_ends != 8 * np.repeat(np.arange(len(fields)), lengths)[slashes]).any():
+        raise ValueError("FEN placement ranks must be 8 squares wide")
+    squares = np.repeat(_SYMBOL_PLANES[symbols], widths)
+    if (squares < 0).any():
+        raise ValueError("FEN placement has an unknown piece symbol")
+
+    # FEN lists rank 8 first, so the ranks are flipped to put A1 at [0, 0]
+    squares = squares.reshape(len(fields), 1, 8, 8)[:, :, ::-1]
+    planes = squares == _PLANES[None, :, None, None]
+
+    sides = "".join(position[1] for position in fields)
+    if len(sides) != len(fields) or sides.strip("wb"):
+        raise ValueError("FEN side to move must be w or b")
+    castling_rights = np.array(
+        [_castling_rights(position[2]) for position in fields], dtype=np.intp
+    )
+    en_passant_files = np.array(
+        [ord(position[3][0]) - ord("a") if position[3] != "-" else -1 for position in fields],
+        dtype=np.intp,
+    )
+    if ((en_passant_files < -1) | (en_passant_files > 7)).any():
+        raise ValueError("FEN en passant square must be on files a to h")
+    black_to_move = np.frombuffer(sides.encode(), dtype=np.uint8) == ord("b")
+    return planes, _features(black_to_move, castling_rights, en_passant_files)
+
+
+def encode_games(games: Sequence[Game]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Planes and features of games in play, read from their bitboards without writing a
+    FEN, for encoding the positions a search or a self-play run goes through.
+    """
+    pieces = np.array([game.board.bitboard.pieces for game in games], dtype=np.uint64)
+    square_bits = np.unpackbits(
+        pieces.reshape(len(games), PLANE_COUNT).astype("<u8").view(np.uint8), bitorder="little"
+    )
+    planes = square_bits.reshape(len(games), PLANE_COUNT, 8, 8).view(bool)
+
+    black_to_move = np.array(
+        [COLOURS[game.players[game.current_turn].team_colour] == BLACK for game in games],
+        dtype=bool,
+    )
+    castling_rights = np.array([game.castling_rights for game in games], dtype=np.intp)
+    en_passant_files = np.array(
+        [-1 if game.en_passant_square is None else game.en_passant_square % 8 for game in games],
+        dtype=np.intp,
+    )
+    return planes, _features(black_to_move, castling_rights, en_passant_files)
+
+
+def iter_chunks(
+    fens: Iterable[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Encode a stream of FENs `chunk_size` at a time, so memory use does not grow with it"""
+    fens = iter(fens)
+    while chunk := list(itertools.islice(fens, chunk_size)):
+        yield encode_fens(chunk)
+
+
+def iter_log_fens(file_names: Iterable[str]) -> Iterator[str]:
+    """Every position of `GameLog` files, in order, without building games"""
+    for file_name in file_names:
+        with Path(file_name).open() as file:
+            for line in file:
+                if fen := line.strip():
+                    yield fen
+
+
+def count_log_positions(file_names: Iterable[str]) -> int:
+    count = 0
+    for file_name in file_names:
+        with Path(file_name).open("rb") as file:
+            count += sum(1 for line in file if line.strip())
+    return count
+
+
+def write_dataset(
+    fens: Iterable[str], count: int, file_name_prefix: str, chunk_size: int = CHUNK_SIZE
+) -> tuple[np.memmap, np.memmap]:
+    """
+    Encode `count` FENs into `<prefix>.planes.npy` and `<prefix>.features.npy`. The
+    files are memory-mapped and filled chunk by chunk, so a dataset can be far larger
+    than memory, and `np.load(..., mmap_mode="r")` reads it back the same way.
+    """
+    planes = np.lib.format.open_memmap(
+        f"{file_name_prefix}.planes.npy", "w+", bool, (count, PLANE_COUNT, 8, 8)
+    )
+    features = np.lib.format.open_memmap(
+        f"{file_name_prefix}.features.npy", "w+", bool, (count, FEATURE_COUNT)
+    )
+    start = 0
+    for chunk_planes, chunk_features in iter_chunks(fens, chunk_size):
+        end = start + len(chunk_planes)
+        if end > count:
+            raise ValueError(f"More than {count} positions to write")
+        planes[start:end] = chunk_planes
+        features[start:end] = chunk_features
+        start = end
+    if start != count:
+        raise ValueError(f"Only {start} of {count} positions to write")
+    planes.flush()
+    features.flush()
+    return planes, features
+
+
+def build_log_dataset(
+    file_names: Sequence[str], file_name_prefix: str, chunk_size: int = CHUNK_SIZE
+) -> tuple[np.memmap, np.memmap]:
+    """Encode every position of `GameLog` files into a memory-mapped dataset"""
+    count = count_log_positions(file_names)
+    return write_dataset(iter_log_fens(file_names), count, file_name_prefix, chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode the positions of game logs")
+    parser.add_argument("output", help="prefix of the .planes.npy and .features.npy files")
+    parser.add_argument("logs", nargs="+", help="GameLog files, one FEN per line")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    planes, _ = build_log_dataset(args.logs, args.output, args.chunk_size)
+    print(f"Encoded {len(planes)} positions into {args.output}.planes.npy")
@@ -26,6 +26,12 @@ class TeamColour(Enum):
     BLACK = "Black"
 
 
+class FlushPolicy(Enum):
+    NONE = "none"
+    PLY = "ply"
+    FSYNC = "fsync"
+
+
 class ConsoleColors:
     OKGREEN = "\033[92m"
     FAIL = "\033[91m"
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from bitboard import BLACK, WHITE
+from zobrist import BLACK_KINGSIDE, BLACK_QUEENSIDE, WHITE_KINGSIDE, WHITE_QUEENSIDE
+
+if TYPE_CHECKING:
+    from game import Tile
+
+INITIAL_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+"""
+    Piece letters indexed by colour and then by kind, in the order of the kinds in
+    `bitboard`, and the reverse lookup from a letter to its colour and kind.
+"""
+PIECE_SYMBOLS = ("PNBRQK", "pnbrqk")
+SYMBOL_PIECES = {
+    symbol: (colour, kind)
+    for colour, symbols in enumerate(PIECE_SYMBOLS)
+    for kind, symbol in enumerate(symbols)
+}
+
+CASTLING_SYMBOLS = (
+    (WHITE_KINGSIDE, "K"),
+    (WHITE_QUEENSIDE, "Q"),
+    (BLACK_KINGSIDE, "k"),
+    (BLACK_QUEENSIDE, "q"),
+)
+CASTLING_RIGHTS = {symbol: right for right, symbol in CASTLING_SYMBOLS}
+CASTLING_ORDER = "".join(symbol for _, symbol in CASTLING_SYMBOLS)
+
+SQUARE_NAMES = [f"{'abcdefgh'[square % 8]}{square // 8 + 1}" for square in range(64)]
+SQUARE_INDICES = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+"""
+    Number of distinct FENs whose parsed positions are kept by `parse_fen`. Loading the
+    same few positions over and over, such as the start position, openings or test
+    suites, then costs a dictionary lookup.
+"""
+FEN_CACHE_SIZE = 1024
+
+
+class Position:
+    """
+    A parsed FEN: the pieces as (square, colour, kind) triples and the other five fields.
+    Positions may be shared through the cache, so they must not be changed.
+    """
+
+    placement: tuple[tuple[int, int, int], ...]
+    colour: int
+    castling_rights: int
+    en_passant_square: int | None
+    halfmove_clock: int
+    full_turn_count: int
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        placement: tuple[tuple[int, int, int], ...],
+        colour: int,
+        castling_rights: int,
+        en_passant_square: int | None,
+        halfmove_clock: int,
+        full_turn_count: int,
+    ):
+        self.placement = placement
+        self.colour = colour
+        self.castling_rights = castling_rights
+        self.en_passant_square = en_passant_square
+        self.halfmove_clock = halfmove_clock
+        self.full_turn_count = full_turn_count
+
+
+def _parse_placement(field: str) -> tuple[tuple[int, int, int], ...]:
+    """Pieces of a placement field of eight ranks of eight squares, as (square, colour, kind)"""
+    placement = []
+    square, file, ranks = 56, 0, 1
+    for char in field:
+        if char == "/":
+            if file != 8:
+                raise ValueError(f"FEN piece placement {field!r} has a rank not 8 squares wide")
+            square, file, ranks = square - 16, 0, ranks + 1
+        elif char in "12345678":
+            square += ord(char) - 48
+            file += ord(char) - 48
+        elif piece := SYMBOL_PIECES.get(char):
+            placement.append((square, *piece))
+            square += 1
+            file += 1
+        else:
+            raise ValueError(f"Invalid piece placement character {char!r} in FEN")
+        if file > 8:
+            raise ValueError(f"FEN piece placement {field!r} has a rank not 8 squares wide")
+    if file != 8 or ranks != 8:
+        raise ValueError(f"FEN piece placement {field!r} does not cover the board")
+    return tuple(placement)
+
+
+def _parse_castling(field: str) -> int:
+    """Castling rights mask of a field of distinct letters in KQkq order"""
+    if field == "-":
+        return 0
+    rights, position = 0, -1
+    for char in field:
+        # Unknown letters are not found, and repeated or misplaced ones are out of order
+        if (index := CASTLING_ORDER.find(char)) <= position:
+            raise ValueError(f"Invalid castling rights {field!r} in FEN")
+        rights |= CASTLING_RIGHTS[char]
+        position = index
+    return rights
+
+
+def parse_fen(fen: str, *, cache: bool = True) -> Position:
+    """
+    Parse all six FEN fields. The half-move clock and move number may be left out, as in
+    EPD. Parsed positions are cached unless `cache` is false.
+    """
+    if cache:
+        return _parse_fen_cached(fen)
+
+    fields = fen.split()
+    if len(fields) == 4:
+        fields += ("0", "1")
+    if len(fields) != 6:
+        raise ValueError(f"FEN must have 4 or 6 fields, not {len(fields)}: {fen!r}")
+    placement, turn, castling, en_passant, halfmove_clock, full_turn_count = fields
+
+    if turn not in {"w", "b"}:
+        raise ValueError(f"Invalid side to move {turn!r} in FEN")
+    if en_passant != "-" and en_passant not in SQUARE_INDICES:
+        raise ValueError(f"Invalid en passant square {en_passant!r} in FEN")
+    return Position(
+        _parse_placement(placement),
+        WHITE if turn == "w" else BLACK,
+        _parse_castling(castling),
+        SQUARE_INDICES.get(en_passant),
+        int(halfmove_clock),
+        int(full_turn_count),
+    )
+
+
+@lru_cache(maxsize=FEN_CACHE_SIZE)
+def _parse_fen_cached(fen: str) -> Position:
+    return parse_fen(fen, cache=False)
+
+
+def clear_cache():
+    _parse_fen_cached.cache_clear()
+
+
+def placement_to_fen(squares: list[Tile]) -> str:
+    """Piece placement field of a board in one pass over its squares, eighth rank first"""
+    fen = ""
+    for rank_start in range(56, -1, -8):
+        empty = 0
+        for tile in squares[rank_start : rank_start + 8]:
+            if piece := tile.piece:
+                if empty:
+                    fen += str(empty)
+                    empty = 0
+                fen += PIECE_SYMBOLS[piece.colour_index][piece.kind]
+            else:
+                empty += 1
+        if empty:
+            fen += str(empty)
+        if rank_start:
+            fen += "/"
+    return fen
+
+
+def castling_to_fen(castling_rights: int) -> str:
+    return "".join(symbol for right, symbol in CASTLING_SYMBOLS if castling_rights & right) or "-"
+
+
+def to_fen(  # noqa: PLR0913, PLR0917
+    placement: str,
+    colour: int,
+    castling_rights: int,
+    en_passant_square: int | None,
+    halfmove_clock: int,
+    full_turn_count: int,
+) -> str:
+    en_passant = "-" if en_passant_square is None else SQUARE_NAMES[en_passant_square]
+    return (
+        f"{placement} {'w' if colour == WHITE else 'b'} {castling_to_fen(castling_rights)} "
+        f"{en_passant} {halfmove_clock} {full_turn_count}"
+    )
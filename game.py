@@ -1,15 +1,39 @@
 from __future__ import annotations
 
-import copy
 import os
-import re
+from contextlib import suppress
 from pathlib import Path
-
-from enums import ConsoleColors, TeamColour
+from typing import TYPE_CHECKING, BinaryIO, Self
+
+from bitboard import (
+    BACK_RANKS,
+    BISHOP,
+    CASTLING_MASKS,
+    CASTLING_ROOK_SQUARES,
+    COLOURS,
+    KING,
+    KNIGHT,
+    PAWN,
+    PAWN_ATTACKS,
+    QUEEN,
+    ROOK,
+    BitBoard,
+    decode_move,
+    encode_move,
+)
+from enums import ConsoleColors, FlushPolicy, TeamColour
 from exceptions import InvalidMoveError
+from fen import PIECE_SYMBOLS, SYMBOL_PIECES, parse_fen, placement_to_fen, to_fen
 from pieces import Bishop, King, Knight, Pawn, Piece, Queen, Rook
 from player import Player
-from utility import throws_exception
+from renderer import NullRenderer, Renderer
+from transposition import EXACT, MATE_SCORE, TERMINAL_DEPTH, TranspositionTable
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from tablebase import Tablebase
 
 row_names = {0: "A", 1: "B", 2: "C", 3: "D", 4: "E", 5: "F", 6: "G", 7: "H"}
 row_indices = {v: k for k, v in row_names.items()}
@@ -17,32 +41,63 @@ row_indices = {v: k for k, v in row_names.items()}
 col_names = {0: "1", 1: "2", 2: "3", 3: "4", 4: "5", 5: "6", 6: "7", 7: "8"}
 col_indices = {v: k for k, v in col_names.items()}
 
+"""
+    Tile names by square index, A1 = 0 to H8 = 63, and the reverse lookup, so that no
+    name is formatted or compared while moves are played.
+"""
+tile_names = [f"{row_names[index % 8]}{col_names[index // 8]}" for index in range(64)]
+tile_indices = {name: index for index, name in enumerate(tile_names)}
+
+
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)
+TEAM_COLOURS = (TeamColour.WHITE, TeamColour.BLACK)
+
+"""
+    Plies without a capture or pawn move after which the game is drawn by the fifty-move
+    rule, and how many earlier occurrences of the same position make a threefold repetition.
+"""
+FIFTY_MOVE_PLIES = 100
+REPETITION_DRAW_COUNT = 2
+
 
 class Tile:
+    __slots__ = ("board", "index", "piece")
+
     board: Board
     piece: Piece | None
-    row: int
-    col: int
+    index: int
 
     @property
-    def name(self):
-        return f"{row_names[self.row]}{col_names[self.col]}"
+    def row(self) -> int:
+        return self.index % 8
+
+    @property
+    def col(self) -> int:
+        return self.index // 8
+
+    @property
+    def name(self) -> str:
+        return tile_names[self.index]
 
     def vacate(self):
+        if piece := self.piece:
+            self.board.bitboard.remove(self.index, piece.colour_index, piece.kind)
         self.piece = None
 
     def enter(self, piece: Piece) -> Piece | None:
         if taken_piece := self.piece:
             taken_piece.tile = None
+            self.board.bitboard.remove(self.index, taken_piece.colour_index, taken_piece.kind)
 
         self.piece = piece
+        self.board.bitboard.put(self.index, piece.colour_index, piece.kind)
+        return taken_piece
 
-    def is_threatened(self, pieces: list[Piece]) -> bool:
-        return any(piece.is_alive and self in piece.get_view() for piece in pieces)
+    def is_threatened(self, by_colour: TeamColour) -> bool:
+        return self.board.bitboard.is_attacked(self.index, COLOURS[by_colour])
 
     def __init__(self, row: int, col: int, board: Board):
-        self.row = row
-        self.col = col
+        self.index = col * 8 + row
         self.board = board
         self.piece = None
 
@@ -56,30 +111,166 @@ class Tile:
         )
         return f"{color}{str(self.piece).upper()}{ConsoleColors.ENDC}"
 
-    def to_fen(self):
-        return str(self.piece) if self.piece else "-"
+
+class MoveRecord:
+    """
+    Everything needed to take a move back: the piece that moved, where it came from,
+    what it captured and the game state that the move overwrote. `key` is the hash of
+    the position before the move, so the move stack doubles as the position history.
+    """
+
+    __slots__ = (
+        "captured",
+        "captured_tile",
+        "castling_rights",
+        "current_turn",
+        "en_passant_square",
+        "from_tile",
+        "full_turn_count",
+        "halfmove_clock",
+        "key",
+        "piece",
+        "promoted",
+        "promotion",
+        "rook_from_tile",
+        "rook_to_tile",
+        "to_tile",
+    )
+
+    piece: Piece
+    from_tile: Tile
+    to_tile: Tile
+    captured: Piece | None
+    captured_tile: Tile
+    promotion: int
+    promoted: Piece | None
+    rook_from_tile: Tile | None
+    rook_to_tile: Tile | None
+    current_turn: int
+    full_turn_count: int
+    castling_rights: int
+    en_passant_square: int | None
+    halfmove_clock: int
+    key: int
+
+    def __init__(self, piece: Piece, from_tile: Tile, to_tile: Tile):
+        self.piece = piece
+        self.from_tile = from_tile
+        self.to_tile = to_tile
+        self.captured = to_tile.piece
+        self.captured_tile = to_tile
+        self.promotion = 0
+        self.promoted = None
+        self.rook_from_tile = None
+        self.rook_to_tile = None
+        self.current_turn = 0
+        self.full_turn_count = 1
+        self.castling_rights = 0
+        self.en_passant_square = None
+        self.halfmove_clock = 0
+        self.key = 0
+
+    def encode(self) -> int:
+        return encode_move(self.from_tile.index, self.to_tile.index, self.promotion)
+
+
+class Move:
+    __slots__ = ("from_tile", "promotion", "to_tile")
+
+    from_tile: Tile
+    to_tile: Tile
+    promotion: int
+
+    @property
+    def tile_names(self) -> tuple[str, ...]:
+        """The move as a player enters it: both tiles, then the piece promoted to if any"""
+        names = (self.from_tile.name, self.to_tile.name)
+        return (*names, PIECE_SYMBOLS[0][self.promotion]) if self.promotion else names
+
+    @property
+    def name(self):
+        return " ".join(self.tile_names)
+
+    def __init__(self, from_tile: Tile, to_tile: Tile, promotion: int = 0):
+        self.from_tile = from_tile
+        self.to_tile = to_tile
+        self.promotion = promotion
+
+    def __repr__(self):
+        return f"Move({self.name})"
+
+    def encode(self) -> int:
+        return encode_move(self.from_tile.index, self.to_tile.index, self.promotion)
 
 
 class Board:
     tiles: list[list[Tile]]
+    squares: list[Tile]
+    bitboard: BitBoard
 
     @property
     def pieces(self):
-        return [tile.piece for tile in self.tiles.flat if tile.piece]
+        return [tile.piece for tile in self.squares if tile.piece]
 
     def __init__(self):
+        self.bitboard = BitBoard()
         self.tiles = [[Tile(i, j, self) for i in range(8)] for j in range(8)]
+        self.squares = [tile for row in self.tiles for tile in row]
 
     def move_piece(self, piece: Piece, tile_name: str):
         tile = self.get_tile_by_name(tile_name)
         piece.move(tile)
 
+    def make_move(
+        self, from_tile: Tile, to_tile: Tile, promotion: int = 0, *, en_passant: bool = False
+    ) -> MoveRecord:
+        """
+        Move a piece, along with the rook when a king moves two squares. A pawn reaching
+        the last rank becomes a queen unless `promotion` names another kind.
+        """
+        record = MoveRecord(from_tile.piece, from_tile, to_tile)
+        piece = record.piece
+        if en_passant:
+            record.captured_tile = self.squares[to_tile.index ^ 8]
+            record.captured = record.captured_tile.piece
+            record.captured_tile.vacate()
+            record.captured.tile = None
+        piece.move(to_tile)
+
+        if piece.kind == KING and abs(to_tile.index - from_tile.index) == 2:
+            rook_from, rook_to = CASTLING_ROOK_SQUARES[to_tile.index]
+            record.rook_from_tile, record.rook_to_tile = (
+                self.squares[rook_from],
+                self.squares[rook_to],
+            )
+            record.rook_from_tile.piece.move(record.rook_to_tile)
+        elif piece.kind == PAWN and BACK_RANKS >> to_tile.index & 1:
+            record.promotion = promotion or QUEEN
+            to_tile.vacate()
+            piece.tile = None
+            record.promoted = PIECE_TYPES[record.promotion](to_tile, piece.team_colour)
+        return record
+
+    def unmake_move(self, record: MoveRecord):
+        piece = record.piece
+        record.to_tile.vacate()
+        record.from_tile.enter(piece)
+        piece.tile = record.from_tile
+
+        if promoted := record.promoted:
+            promoted.tile = None
+        if rook_to_tile := record.rook_to_tile:
+            rook = rook_to_tile.piece
+            rook_to_tile.vacate()
+            rook.tile = record.rook_from_tile
+            record.rook_from_tile.enter(rook)
+        if captured := record.captured:
+            record.captured_tile.enter(captured)
+            captured.tile = record.captured_tile
+
     def get_tile_by_name(self, tile_name: str):
-        for row in self.tiles:
-            for tile in row:
-                if tile.name == tile_name:
-                    return tile
-        return None
+        index = tile_indices.get(tile_name)
+        return None if index is None else self.squares[index]
 
     def get_tile(self, row: int, col: int):
         if 0 <= row < 8 and 0 <= col < 8:
@@ -91,14 +282,8 @@ class Board:
             [" ".join([str(tile) for tile in tile_row]) for tile_row in self.tiles[::-1]]
         )
 
-    def to_fen_row(self, row: list[Tile]) -> str:
-        def replace_dashes(s: str):
-            return re.sub(r"-+", lambda m: str(len(m.group())), s)
-
-        return replace_dashes("".join([tile.to_fen() for tile in row]))
-
     def to_fen(self) -> str:
-        return "/".join([self.to_fen_row(row) for row in reversed(self.tiles)])
+        return placement_to_fen(self.squares)
 
 
 class Game:
@@ -107,10 +292,39 @@ class Game:
     board: Board
     full_turn_count: int
     game_log: GameLog | None
+    move_stack: list[MoveRecord]
+    prior_keys: list[int]
+    castling_rights: int
+    en_passant_square: int | None
+    halfmove_clock: int
+    transposition_table: TranspositionTable | None
+    tablebase: Tablebase | None
+    _starting_fen: str
+
+    @property
+    def key(self) -> int:
+        """
+        64-bit Zobrist hash of the position. The piece part is kept up to date by the board
+        as pieces enter and leave tiles, so this is O(1). The en passant file only counts
+        when a pawn could capture there, as otherwise the positions are the same.
+        """
+        bitboard = self.board.bitboard
+        key = bitboard.key ^ CASTLING_KEYS[self.castling_rights]
+        colour = COLOURS[self.players[self.current_turn].team_colour]
+        if colour:
+            key ^= BLACK_TO_MOVE_KEY
+        if (square := self.en_passant_square) is not None and (
+            PAWN_ATTACKS[1 - colour][square] & bitboard.pieces[colour][PAWN]
+        ):
+            key ^= EN_PASSANT_KEYS[square % 8]
+        return key
 
     def get_opponent(self, player: Player) -> Player:
         return self.players[0] if player == self.players[1] else self.players[1]
 
+    def get_player(self, team_colour: TeamColour) -> Player:
+        return self.players[0] if self.players[0].team_colour == team_colour else self.players[1]
+
     def __init__(
         self,
         board: Board = None,
@@ -169,52 +383,126 @@ class Game:
         self.current_turn = current_turn or 0
         self.full_turn_count = full_turn_count or 1
         self.game_log = game_log
-
-    def play(self):
-        checkmate = False
+        self.move_stack = []
+        self.prior_keys = []
+        self.castling_rights = self.board.bitboard.standing_castling_rights()
+        self.en_passant_square = None
+        self.halfmove_clock = 0
+        self.transposition_table = None
+        self.tablebase = None
+        self._starting_fen = self.to_fen()
+
+    def play(self, renderer: Renderer | None = None):
+        """
+        Generator playing one turn per step. All output goes through `renderer`, and
+        without one the game runs headless with no terminal side effects.
+        """
+        renderer = renderer or NullRenderer()
+        game_over = False
         previous_move = ""
         while True:
-            checkmate, move = self.start_turn(self.players[self.current_turn], previous_move)
+            game_over, move = self.start_turn(
+                self.players[self.current_turn], previous_move, renderer
+            )
             previous_move = move
 
-            if checkmate:
+            if game_over:
                 break
-            self.current_turn = (self.current_turn + 1) % 2
 
             if self.game_log:
                 self.game_log.append(self)
             yield
-        print("Game Over")
+        renderer.game_over(self)
+
+    async def play_async(self, renderer: Renderer | None = None):
+        """
+        Async generator version of `play`, for hosting many games in one event loop.
+        Players are asked for their moves through `take_turn_async`.
+        """
+        renderer = renderer or NullRenderer()
+        previous_move = ""
+        while True:
+            game_over, previous_move = await self.start_turn_async(
+                self.players[self.current_turn], previous_move, renderer
+            )
+            if game_over:
+                break
 
-    def start_turn(self, player: Player, previous_move: str) -> bool:
-        os.system("cls" if os.name == "nt" else "clear")  # noqa: S605
-        if self.is_checkmate(player):
-            print("Checkmate")
-            return (True, "")
+            if self.game_log:
+                self.game_log.append(self)
+            yield
+        renderer.game_over(self)
 
-        from_tile_name, to_tile_name = None, None
+    def start_turn(
+        self, player: Player, previous_move: str, renderer: Renderer | None = None
+    ) -> tuple[bool, str]:
+        renderer = renderer or NullRenderer()
+        if self._is_game_over(player, renderer):
+            return (True, "")
 
-        previous_move_message = "" if not previous_move else f" ({previous_move})"
-        message = f"{player.team_colour.value} turn{previous_move_message}"
+        message = self._turn_message(player, previous_move)
         while True:
-            from_tile_name, to_tile_name = player.take_turn(self, message)
-
-            from_tile = self.board.get_tile_by_name(from_tile_name)
-            to_tile = self.board.get_tile_by_name(to_tile_name)
-
             try:
-                self.validate_move(from_tile, to_tile, player)
+                move = self._to_legal_move(player, *player.take_turn(self, message))
                 break
             except InvalidMoveError as e:
                 message = e
+        return self._play_turn(player, move, renderer)
 
-        self.board.move_piece(from_tile.piece, to_tile_name)
+    async def start_turn_async(
+        self, player: Player, previous_move: str, renderer: Renderer | None = None
+    ) -> tuple[bool, str]:
+        renderer = renderer or NullRenderer()
+        if self._is_game_over(player, renderer):
+            return (True, "")
 
-        if player.team_colour == TeamColour.BLACK:
-            self.full_turn_count += 1
-        return (False, f"{from_tile_name} {to_tile_name}")
+        message = self._turn_message(player, previous_move)
+        while True:
+            try:
+                tile_names = await player.take_turn_async(self, message)
+                move = self._to_legal_move(player, *tile_names)
+                break
+            except InvalidMoveError as e:
+                message = e
+        return self._play_turn(player, move, renderer)
+
+    def _is_game_over(self, player: Player, renderer: Renderer) -> bool:
+        renderer.start_turn(self, player)
+        if not self.has_valid_move(player):
+            if self.is_check(player):
+                renderer.checkmate(self, player)
+            else:
+                renderer.stalemate(self, player)
+            return True
+        if reason := self.draw_reason():
+            renderer.draw(self, reason)
+            return True
+        return False
 
-    def validate_move(self, from_tile: Tile, to_tile: Tile, player: Player) -> bool:
+    @staticmethod
+    def _turn_message(player: Player, previous_move: str) -> str:
+        previous_move_message = "" if not previous_move else f" ({previous_move})"
+        return f"{player.team_colour.value} turn{previous_move_message}"
+
+    def _to_legal_move(
+        self, player: Player, from_tile_name: str, to_tile_name: str, *promotion_name: str
+    ) -> Move:
+        from_tile = self.board.get_tile_by_name(from_tile_name)
+        to_tile = self.board.get_tile_by_name(to_tile_name)
+        return self.validate_move(from_tile, to_tile, player, *promotion_name)
+
+    def _play_turn(self, player: Player, move: Move, renderer: Renderer) -> tuple[bool, str]:
+        self.make_move(move.from_tile, move.to_tile, move.promotion)
+        renderer.move_played(self, player, move.name)
+        return (False, move.name)
+
+    def validate_move(
+        self, from_tile: Tile, to_tile: Tile, player: Player, promotion_name: str = ""
+    ) -> Move:
+        """
+        The legal move from `from_tile` to `to_tile`, promoting to the piece named by its
+        letter or to a queen. Raises `InvalidMoveError` explaining why there is none.
+        """
         if not from_tile:
             raise InvalidMoveError("You must provide a tile to move from")
 
@@ -224,38 +512,141 @@ class Game:
         if not from_tile.piece:
             raise InvalidMoveError(f"There is no piece on {from_tile.name}")
 
-        is_valid_piece_move, error = from_tile.piece.validate_move(player, to_tile)
+        promotion = QUEEN
+        if promotion_name:
+            _, promotion = SYMBOL_PIECES.get(promotion_name.upper(), (None, None))
+            if promotion not in {QUEEN, ROOK, BISHOP, KNIGHT}:
+                raise InvalidMoveError(f"A pawn cannot promote to {promotion_name}")
+
+        for move in self.generate_legal_moves(player):
+            if (
+                move.from_tile is from_tile
+                and move.to_tile is to_tile
+                and move.promotion in {0, promotion}
+            ):
+                return move
+
+        _, error = from_tile.piece.validate_move(player, to_tile)
         if error:
             raise InvalidMoveError(error)
-
-        if is_valid_piece_move and self.is_moving_into_check(from_tile, to_tile):
+        if self.is_moving_into_check(from_tile, to_tile):
             raise InvalidMoveError("You must not move into check")
+        raise InvalidMoveError(f"{from_tile.piece.type} cannot move to {to_tile.name}")
+
+    def make_move(self, from_tile: Tile, to_tile: Tile, promotion: int = 0) -> MoveRecord:
+        """
+        Play a move in place and hand back the record needed to undo it with `unmake_move`.
+        The move is not validated.
+        """
+        piece = from_tile.piece
+        team_colour = piece.team_colour
+        key = self.key
+        record = self.board.make_move(
+            from_tile,
+            to_tile,
+            promotion,
+            en_passant=piece.kind == PAWN and to_tile.index == self.en_passant_square,
+        )
+        record.key = key
+        if record.promoted:
+            self.get_player(team_colour).pieces.append(record.promoted)
+        record.current_turn = self.current_turn
+        record.full_turn_count = self.full_turn_count
+        record.castling_rights = self.castling_rights
+        record.en_passant_square = self.en_passant_square
+        record.halfmove_clock = self.halfmove_clock
+
+        from_square, to_square = from_tile.index, to_tile.index
+        self.castling_rights &= CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+        self.en_passant_square = None
+        if record.piece.kind == PAWN:
+            self.halfmove_clock = 0
+            if abs(to_square - from_square) == 16:
+                self.en_passant_square = (from_square + to_square) // 2
+        elif record.captured:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if team_colour == TeamColour.BLACK:
+            self.full_turn_count += 1
+        self.current_turn = 1 if self.get_player(team_colour) == self.players[0] else 0
+        self.move_stack.append(record)
+        return record
+
+    def unmake_move(self, record: MoveRecord | None = None):
+        record = record or self.move_stack[-1]
+        if self.move_stack.pop() is not record:
+            raise ValueError("Moves must be unmade in the reverse order they were made")
+
+        self.board.unmake_move(record)
+        if record.promoted:
+            self.get_player(record.piece.team_colour).pieces.remove(record.promoted)
+        self.current_turn = record.current_turn
+        self.full_turn_count = record.full_turn_count
+        self.castling_rights = record.castling_rights
+        self.en_passant_square = record.en_passant_square
+        self.halfmove_clock = record.halfmove_clock
 
     def is_moving_into_check(self, from_tile: Tile, to_tile: Tile) -> bool:
-        game_copy = copy.deepcopy(self)
-        board_copy = game_copy.board
-        player_copy = game_copy.players[game_copy.current_turn]
+        player = self.get_player(from_tile.piece.team_colour)
+        record = self.make_move(from_tile, to_tile)
+        try:
+            return self.is_check(player)
+        finally:
+            self.unmake_move(record)
+
+    def generate_legal_moves(self, player: Player) -> list[Move]:
+        """
+        Castling and en passant are only available to the side to move, so the moves of the
+        other player leave them out.
+        """
+        squares = self.board.squares
+        castling_rights, en_passant_square = 0, None
+        if player is self.players[self.current_turn]:
+            castling_rights, en_passant_square = self.castling_rights, self.en_passant_square
+        return [
+            Move(squares[from_square], squares[to_square], promotion)
+            for from_square, to_square, promotion in self.board.bitboard.legal_moves(
+                COLOURS[player.team_colour], castling_rights, en_passant_square
+            )
+        ]
 
-        next_board_from_tile = board_copy.get_tile_by_name(from_tile.name)
-        board_copy.move_piece(next_board_from_tile.piece, to_tile.name)
-        return game_copy.is_check(player_copy)
+    def decode_move(self, code: int) -> Move:
+        from_square, to_square, promotion = decode_move(code)
+        squares = self.board.squares
+        return Move(squares[from_square], squares[to_square], promotion)
 
     def has_valid_move(self, player: Player) -> bool:
-        for piece in player.pieces:
-            piece_valid_moves = [
-                tile
-                for tile in piece.get_view()
-                if not throws_exception(self.validate_move, InvalidMoveError)(
-                    piece.tile, tile, player
-                )
-            ]
-            if len(piece_valid_moves) > 0:
+        """
+        With a transposition table attached, a stored best move or a stored terminal result
+        for the position answers this without generating moves, and so does a tablebase for
+        an ending it covers, unless the position is drawn.
+        """
+        to_move = player == self.players[self.current_turn]
+        tablebase = self.tablebase
+        if to_move and tablebase and (result := tablebase.probe(self)) and result != (0, 0):
+            # Only a position mated on the spot is lost in no plies
+            return result != (-1, 0)
+
+        table = self.transposition_table
+        use_table = table is not None and to_move
+        if use_table and (entry := table.probe(self.key)):
+            if entry.move:
                 return True
-        return False
+            if entry.depth == TERMINAL_DEPTH:
+                return False
+
+        has_valid_move = len(self.generate_legal_moves(player)) > 0
+        if use_table and not has_valid_move:
+            score = -MATE_SCORE if self.is_check(player) else 0
+            table.store(self.key, TERMINAL_DEPTH, score, EXACT)
+        return has_valid_move
 
     def is_check(self, player: Player) -> bool:
-        enemy_pieces = list(self.get_opponent(player).pieces)
-        return player.king.tile.is_threatened(enemy_pieces)
+        return self.board.bitboard.is_attacked(
+            player.king.tile.index, 1 - COLOURS[player.team_colour]
+        )
 
     def is_checkmate(self, player: Player) -> bool:
         return self.is_check(player) and not self.has_valid_move(player)
@@ -263,92 +654,255 @@ class Game:
     def is_stalemate(self, player: Player) -> bool:
         return not self.has_valid_move(player)
 
+    def repetitions(self) -> int:
+        """
+        How many times the current position occurred before. Only positions since the last
+        capture or pawn move can repeat, and only every other ply has the same side to move.
+        """
+        key = self.key
+        history = self.move_stack
+        limit = min(self.halfmove_clock, len(history))
+        count = sum(history[-ply].key == key for ply in range(2, limit + 1, 2))
+        if (prior_plies := min(self.halfmove_clock - limit, len(self.prior_keys))) > 0:
+            count += self.prior_keys[-prior_plies:].count(key)
+        return count
+
+    def history_keys(self) -> list[int]:
+        """
+        Keys of the positions since the last capture or pawn move, oldest first, which are
+        the ones the current position can repeat. `prior_keys` holds those from before the
+        game was set up, such as the history of a position sent to another process.
+        """
+        keys = [*self.prior_keys, *(record.key for record in self.move_stack)]
+        return keys[len(keys) - min(self.halfmove_clock, len(keys)) :]
+
+    def is_insufficient_material(self) -> bool:
+        """Only kings are left, or kings and a single knight or bishop"""
+        pieces = self.board.bitboard.pieces
+        if any(colour[kind] for colour in pieces for kind in (PAWN, ROOK, QUEEN)):
+            return False
+        minor_pieces = sum((colour[KNIGHT] | colour[BISHOP]).bit_count() for colour in pieces)
+        return minor_pieces <= 1
+
+    def is_draw(self, repetitions: int = REPETITION_DRAW_COUNT) -> bool:
+        """Drawn by the fifty-move rule or by `repetitions` earlier occurrences"""
+        return self.halfmove_clock >= FIFTY_MOVE_PLIES or self.repetitions() >= repetitions
+
+    def draw_reason(self) -> str | None:
+        """Why the game is drawn in the current position, ignoring stalemate"""
+        if self.halfmove_clock >= FIFTY_MOVE_PLIES:
+            return "fifty-move rule"
+        if self.repetitions() >= REPETITION_DRAW_COUNT:
+            return "threefold repetition"
+        if self.is_insufficient_material():
+            return "insufficient material"
+        return None
+
+    def starting_fen(self) -> str:
+        """FEN of the position before the first move on the move stack, kept from set up"""
+        return self._starting_fen
+
     def to_fen(self) -> str:
-        fen_board = self.board.to_fen()
-        fen_turn = self.players[self.current_turn].team_colour.value[0].lower()
-        fen_castle = "-"  # TODO
-        fen_en_passant = "-"  # TODO
-        fen_half_move_clock = "0"  # TODO
-        fen_full_turn_count = self.full_turn_count
-        return (
-            f"{fen_board} {fen_turn} {fen_castle} "
-            f"{fen_en_passant} {fen_half_move_clock} {fen_full_turn_count}"
+        return to_fen(
+            self.board.to_fen(),
+            COLOURS[self.players[self.current_turn].team_colour],
+            self.castling_rights,
+            self.en_passant_square,
+            self.halfmove_clock,
+            self.full_turn_count,
         )
 
     @classmethod
-    def to_pieces(cls, row: str, row_index: int, board: Board) -> list[Piece]:
-        def replace_numbers(string: str):
-            return re.sub(r"\d", lambda m: "-" * int(m.group()), string)
-
-        row_with_dashes = replace_numbers(row)
-
-        piece_types: dict[str, Piece] = {
-            "p": Pawn,
-            "n": Knight,
-            "b": Bishop,
-            "r": Rook,
-            "q": Queen,
-            "k": King,
-        }
-        return [
-            piece_types[char.lower()](
-                board.get_tile(row_index, col_index),
-                TeamColour.BLACK if char.islower() else TeamColour.WHITE,
-            )
-            for col_index, char in enumerate(row_with_dashes)
-            if char != "-"
-        ]
-
-    @classmethod
-    def from_log(cls, game_log: GameLog, player_types: tuple[type[Player], type[Player]]) -> Game:
-        fen = game_log.get_latest_fen()
-        fen_item_count = 6
-        if not fen or len(fen.split(" ")) != fen_item_count:
-            game = Game(game_log=game_log, player_types=player_types)
-            game_log.append(game)
-            return game
-        [
-            fen_board,
-            fen_turn,
-            fen_castle,
-            fen_en_passant,
-            fen_half_move_clock,
-            fen_full_turn_count,
-        ] = fen.split(" ")
-        fen_rows = reversed(fen_board.split("/"))
+    def from_fen(
+        cls,
+        fen: str,
+        player_types: tuple[type[Player], type[Player]],
+        game_log: GameLog | None = None,
+    ) -> Game:
+        position = parse_fen(fen)
         board = Board()
-        pieces = [
-            piece
-            for row_index, row in enumerate(fen_rows)
-            for piece in cls.to_pieces(row, row_index, board)
-        ]
+        squares = board.squares
+        pieces = ([], [])
+        for square, colour, kind in position.placement:
+            pieces[colour].append(PIECE_TYPES[kind](squares[square], TEAM_COLOURS[colour]))
         players = [
-            player_types[0](
-                team_colour=TeamColour.WHITE,
-                pieces=[p for p in pieces if p.team_colour == TeamColour.WHITE],
-            ),
-            player_types[1](
-                team_colour=TeamColour.BLACK,
-                pieces=[p for p in pieces if p.team_colour == TeamColour.BLACK],
-            ),
+            player_types[0](team_colour=TeamColour.WHITE, pieces=pieces[0]),
+            player_types[1](team_colour=TeamColour.BLACK, pieces=pieces[1]),
         ]
-        current_turn = 0 if fen_turn == "w" else 1
-        return Game(board, players, int(current_turn), int(fen_full_turn_count), game_log)
+        game = Game(board, players, position.colour, position.full_turn_count, game_log)
+        game.castling_rights = position.castling_rights
+        game.en_passant_square = position.en_passant_square
+        game.halfmove_clock = position.halfmove_clock
+        game._starting_fen = game.to_fen()
+        return game
+
+    @classmethod
+    def from_log(
+        cls,
+        game_log: GameLog,
+        player_types: tuple[type[Player], type[Player]],
+        ply: int | None = None,
+    ) -> Game:
+        """
+        Resume from the latest position in the log, or from `ply` if the log can seek. A
+        read-only log, such as an archived game, is replayed move by move so the move stack
+        keeps the history, and play goes on without logging.
+        """
+        if not game_log.writable:
+            return game_log.replay(ply, player_types)
+        if ply is not None:
+            return cls.from_fen(game_log.get_fen(ply), player_types, game_log)
+
+        if fen := game_log.get_latest_fen():
+            with suppress(ValueError):
+                return cls.from_fen(fen, player_types, game_log)
+
+        # An empty log, or one whose last line is not a FEN, starts a new game
+        game = Game(game_log=game_log, player_types=player_types)
+        game_log.append(game)
+        return game
 
 
 class GameLog:
+    """
+    Log of the game as one FEN line per ply. The file stays open with a buffered handle,
+    flushed after every ply, synced to disk after every ply or left to the buffer depending
+    on `flush_policy`. The latest position is read by seeking backwards from the end of the
+    file, so resuming does not depend on the length of the log.
+
+    With `index` set, the offset of every line is also kept in a sidecar file of 8-byte
+    integers, so any ply can be read directly with `get_fen`.
+    """
+
     file_name: str
+    flush_policy: FlushPolicy
+    index_file_name: str | None
+    _file: BinaryIO | None
+    _index_file: BinaryIO | None
+
+    read_block_size = 4096
+    writable = True
 
-    def __init__(self, file_name: str):
+    def __init__(
+        self,
+        file_name: str,
+        flush_policy: FlushPolicy = FlushPolicy.PLY,
+        *,
+        index: bool = False,
+    ):
         self.file_name = file_name
+        self.flush_policy = flush_policy
+        self.index_file_name = f"{file_name}.idx" if index else None
+        self._file = None
+        self._index_file = None
+
+    @property
+    def file(self) -> BinaryIO:
+        if not self._file:
+            self._file = Path(self.file_name).open("a+b")  # noqa: SIM115
+        return self._file
+
+    @property
+    def index_file(self) -> BinaryIO:
+        if not self._index_file:
+            self._index_file = Path(self.index_file_name).open("a+b")  # noqa: SIM115
+            self._rebuild_index_if_stale()
+        return self._index_file
 
     def append(self, game: Game):
-        fen = game.to_fen()
-        with Path.open(self.file_name, "a+") as f:
-            f.write(f"{fen}\n")
-
-    def get_latest_fen(self):
-        with Path.open(self.file_name, "a+") as f:
-            f.seek(0)
-            lines = f.readlines()
-            return None if len(lines) == 0 else lines[-1]
+        line = f"{game.to_fen()}\n".encode()
+        index_file = self.index_file if self.index_file_name else None
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(line)
+        if index_file:
+            index_file.write(offset.to_bytes(8, "little"))
+        self._flush()
+
+    def _flush(self):
+        if self.flush_policy == FlushPolicy.NONE:
+            return
+        for f in (self._file, self._index_file):
+            if f:
+                f.flush()
+                if self.flush_policy == FlushPolicy.FSYNC:
+                    os.fsync(f.fileno())
+
+    def get_latest_fen(self) -> str | None:
+        f = self.file
+        f.flush()
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0:
+            size = min(self.read_block_size, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + data
+            line_start = data.rfind(b"\n", 0, len(data.rstrip(b"\n")))
+            if line_start != -1:
+                return data[line_start + 1 :].decode().strip() or None
+        return data.decode().strip() or None
+
+    def __len__(self):
+        if self.index_file_name:
+            self.index_file.flush()
+            return self.index_file.seek(0, os.SEEK_END) // 8
+        self.file.flush()
+        self.file.seek(0)
+        return sum(1 for _ in self.file)
+
+    def get_fen(self, ply: int) -> str:
+        """FEN of the position after `ply` logged plies, read through the offset index"""
+        if not self.index_file_name:
+            raise ValueError("Reading a ply directly needs a log created with index=True")
+        self.index_file.flush()
+        self.index_file.seek(max(ply, 0) * 8)
+        offset = self.index_file.read(8)
+        if len(offset) != 8 or ply < 0:
+            raise IndexError(f"Ply {ply} is not in the log")
+        self.file.flush()
+        self.file.seek(int.from_bytes(offset, "little"))
+        return self.file.readline().decode().strip()
+
+    def _rebuild_index_if_stale(self):
+        """
+        The index is only trusted if it covers every line of the log, otherwise it is
+        written again from a single scan of the log.
+        """
+        index_file = self._index_file
+        entries = index_file.seek(0, os.SEEK_END) // 8
+        if entries:
+            index_file.seek((entries - 1) * 8)
+            last_offset = int.from_bytes(index_file.read(8), "little")
+            self.file.flush()
+            self.file.seek(last_offset)
+            self.file.readline()
+            if self.file.tell() == self.file.seek(0, os.SEEK_END):
+                return
+
+        offsets = []
+        self.file.seek(0)
+        offset = 0
+        for line in self.file:
+            offsets.append(offset.to_bytes(8, "little"))
+            offset += len(line)
+        index_file.truncate(0)
+        index_file.write(b"".join(offsets))
+        index_file.flush()
+
+    def close(self):
+        for f in (self._file, self._index_file):
+            if f:
+                f.close()
+        self._file = None
+        self._index_file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
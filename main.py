@@ -4,6 +4,7 @@ import sys
 
 from game import Game, GameLog
 from player import ChessApiPlayer, CommandLinePlayer
+from renderer import TerminalRenderer
 
 white_player_type = CommandLinePlayer
 black_player_type = ChessApiPlayer
@@ -17,5 +18,8 @@ if __name__ == "__main__":
         game_log = GameLog(file_name)
         game = Game.from_log(game_log, player_types=(white_player_type, black_player_type))
 
-    for _ in game.play():
+    for _ in game.play(renderer=TerminalRenderer()):
         pass
+
+    if game.game_log:
+        game.game_log.close()
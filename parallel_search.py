@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Self
+
+from game import Game
+from player import Player
+from search import MATE_BOUND, Searcher, SearchResult
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+_worker_searchers: dict[tuple[int, int | None, float], Searcher] = {}
+
+
+def _search_root_move(  # noqa: PLR0913, PLR0917
+    fen: str,
+    history_keys: list[int],
+    move_code: int,
+    depth: int,
+    node_limit: int | None,
+    table_size_mb: float,
+) -> tuple[int, int]:
+    """
+    Search the position after one root move and return its score for the side that played
+    it, with the number of nodes searched. `history_keys` are the keys of the positions
+    that led to the FEN, so repetitions are seen as they are by the caller. Runs in a
+    worker process, which keeps one searcher per configuration so the transposition table
+    is only allocated once.
+    """
+    searcher_key = (depth - 1, node_limit, table_size_mb)
+    if not (searcher := _worker_searchers.get(searcher_key)):
+        searcher = Searcher(depth - 1, node_limit=node_limit, table_size_mb=table_size_mb)
+        _worker_searchers[searcher_key] = searcher
+
+    game = Game.from_fen(fen, player_types=(Player, Player))
+    game.prior_keys = history_keys
+    move = game.decode_move(move_code)
+    game.make_move(move.from_tile, move.to_tile, move.promotion)
+    # The serial search scores a repetition below the root as a draw without searching it
+    if game.is_draw(repetitions=1):
+        return 0, 1
+    # Which root moves share a worker depends on the pool, so each starts from an empty
+    # table to keep the result the same for any number of workers
+    searcher.transposition_table.clear()
+    result = searcher.search(game)
+
+    score = -result.score
+    if score > MATE_BOUND:
+        score -= 1
+    elif score < -MATE_BOUND:
+        score += 1
+    return score, result.nodes
+
+
+class ParallelSearcher:
+    """
+    Root splitting search: every legal move at the root is searched on its own to a fixed
+    depth with a full window, spread over a pool of worker processes. Positions are sent to
+    the workers as FEN strings, with the keys of the positions since the last capture or
+    pawn move so repetitions are scored as draws, and moves as 16-bit codes rather than
+    pickled games.
+
+    Each root move is scored independently of the others and ties go to the first move in
+    generation order, so the chosen move is the same for any number of workers. With a
+    single worker the moves are searched in this process and no pool is started.
+    """
+
+    workers: int
+    depth: int
+    node_limit: int | None
+    table_size_mb: float
+    executor: ProcessPoolExecutor | None
+
+    def __init__(
+        self,
+        workers: int = 2,
+        depth: int = 3,
+        node_limit: int | None = None,
+        table_size_mb: float = 4,
+    ):
+        if depth < 2:
+            raise ValueError("Root splitting needs a search depth of at least 2")
+        self.workers = workers
+        self.depth = depth
+        self.node_limit = node_limit
+        self.table_size_mb = table_size_mb
+        self.executor = None
+
+    def search(self, game: Game) -> SearchResult:
+        fen = game.to_fen()
+        history_keys = game.history_keys()
+        moves = game.generate_legal_moves(game.players[game.current_turn])
+        if not moves:
+            return SearchResult(None, 0, self.depth, 0)
+
+        tasks = [
+            (fen, history_keys, move.encode(), self.depth, self.node_limit, self.table_size_mb)
+            for move in moves
+        ]
+        if self.workers > 1:
+            self.executor = self.executor or ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self.executor.map(_search_root_move, *zip(*tasks, strict=True)))
+        else:
+            results = [_search_root_move(*task) for task in tasks]
+
+        best_index = 0
+        for index, (score, _) in enumerate(results):
+            if score > results[best_index][0]:
+                best_index = index
+        nodes = sum(nodes for _, nodes in results)
+        return SearchResult(moves[best_index], results[best_index][0], self.depth, nodes)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from game import Game
+from player import Player
+
+"""
+    Reference positions with their known node counts per depth, see
+    https://www.chessprogramming.org/Perft_Results. Between them they cover castling,
+    en passant, promotion and discovered checks.
+"""
+PERFT_POSITIONS: list[tuple[str, str, dict[int, int]]] = [
+    (
+        "initial",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        {1: 20, 2: 400, 3: 8902, 4: 197281},
+    ),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        {1: 48, 2: 2039, 3: 97862},
+    ),
+    (
+        "position 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        {1: 14, 2: 191, 3: 2812, 4: 43238},
+    ),
+    (
+        "position 4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        {1: 6, 2: 264, 3: 9467},
+    ),
+    (
+        "position 5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        {1: 44, 2: 1486, 3: 62379},
+    ),
+]
+
+
+def perft(game: Game, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree `depth` plies deep"""
+    if depth == 0:
+        return 1
+
+    moves = game.generate_legal_moves(game.players[game.current_turn])
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+        nodes += perft(game, depth - 1)
+        game.unmake_move(record)
+    return nodes
+
+
+def divide(game: Game, depth: int) -> dict[str, int]:
+    """Perft split by root move, for finding which move a node count mismatch comes from"""
+    results = {}
+    for move in game.generate_legal_moves(game.players[game.current_turn]):
+        record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+        results[move.name] = perft(game, depth - 1)
+        game.unmake_move(record)
+    return results
+
+
+def run_benchmark(max_depth: int) -> bool:
+    all_passed = True
+    for name, fen, expected_nodes in PERFT_POSITIONS:
+        for depth, expected in expected_nodes.items():
+            if depth > max_depth:
+                continue
+            game = Game.from_fen(fen, player_types=(Player, Player))
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            elapsed = time.perf_counter() - start
+
+            passed = nodes == expected
+            all_passed &= passed
+            nodes_per_second = nodes / elapsed if elapsed else 0.0
+            print(
+                f"{name:<12} depth {depth}: {nodes:>10} nodes {elapsed:8.3f}s "
+                f"{nodes_per_second:>10.0f} nodes/s {'ok' if passed else f'FAIL ({expected})'}"
+            )
+    return all_passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move generator correctness and speed check")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--divide", metavar="FEN", help="print per move node counts for FEN")
+    args = parser.parse_args()
+
+    if args.divide:
+        game = Game.from_fen(args.divide, player_types=(Player, Player))
+        results = divide(game, args.depth)
+        for move, nodes in results.items():
+            print(f"{move}: {nodes}")
+        print(f"Total: {sum(results.values())}")
+    elif not run_benchmark(args.depth):
+        sys.exit(1)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TextIO
+
+from bitboard import KING, PAWN
+from exceptions import InvalidMoveError
+from fen import INITIAL_FEN, PIECE_SYMBOLS, SYMBOL_PIECES
+from game import Game
+from player import Player
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from game import Move
+
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+SEVEN_TAG_ROSTER = {
+    "Event": "?",
+    "Site": "?",
+    "Date": "????.??.??",
+    "Round": "?",
+    "White": "?",
+    "Black": "?",
+    "Result": "*",
+}
+LINE_LENGTH = 80
+
+
+class PgnGame:
+    """
+    A game read from PGN. When its movetext could not be read, `error` says why and `game`
+    holds the moves before the one that failed.
+    """
+
+    tags: dict[str, str]
+    game: Game
+    result: str
+    error: str | None
+
+    def __init__(self, tags: dict[str, str], game: Game, result: str, error: str | None = None):
+        self.tags = tags
+        self.game = game
+        self.result = result
+        self.error = error
+
+
+def move_to_san(game: Game, move: Move) -> str:
+    """Standard algebraic notation of a legal move for the side to move"""
+    piece = move.from_tile.piece
+    to_name = move.to_tile.name.lower()
+    capture = move.to_tile.piece is not None
+
+    if piece.kind == KING and abs(move.to_tile.index - move.from_tile.index) == 2:
+        san = "O-O" if move.to_tile.row == 6 else "O-O-O"
+    elif piece.kind == PAWN:
+        # A pawn changing file always captures, en passant onto an empty tile included
+        if move.from_tile.row != move.to_tile.row:
+            san = f"{move.from_tile.name[0].lower()}x{to_name}"
+        else:
+            san = to_name
+        if move.promotion:
+            san += f"={PIECE_SYMBOLS[0][move.promotion]}"
+    else:
+        rivals = [
+            other.from_tile
+            for other in game.generate_legal_moves(game.players[game.current_turn])
+            if other.to_tile is move.to_tile
+            and other.from_tile is not move.from_tile
+            and other.from_tile.piece.kind == piece.kind
+        ]
+        disambiguation = ""
+        if rivals:
+            from_name = move.from_tile.name.lower()
+            if all(tile.row != move.from_tile.row for tile in rivals):
+                disambiguation = from_name[0]
+            elif all(tile.col != move.from_tile.col for tile in rivals):
+                disambiguation = from_name[1]
+            else:
+                disambiguation = from_name
+        san = f"{piece.symbol}{disambiguation}{'x' if capture else ''}{to_name}"
+
+    record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+    opponent = game.players[game.current_turn]
+    if game.is_check(opponent):
+        san += "+" if game.has_valid_move(opponent) else "#"
+    game.unmake_move(record)
+    return san
+
+
+def parse_san(game: Game, san: str) -> Move:
+    """Find the legal move of the side to move that a SAN string describes"""
+    text = san.rstrip("+#!?").replace("0", "O")
+    moves = game.generate_legal_moves(game.players[game.current_turn])
+    if text in {"O-O", "O-O-O"}:
+        king_file = 6 if text == "O-O" else 2
+        candidates = [
+            move
+            for move in moves
+            if move.from_tile.piece.kind == KING
+            and abs(move.to_tile.index - move.from_tile.index) == 2
+            and move.to_tile.row == king_file
+        ]
+    else:
+        promotion = 0
+        if text[-1] in "NBRQ" and text[0].islower():
+            promotion = SYMBOL_PIECES[text[-1]][1]
+            text = text[:-1].rstrip("=")
+        piece_symbol = text[0] if text[0] in "NBRQK" else "P"
+        destination = game.board.get_tile_by_name(text[-2:].upper())
+        disambiguation = text[1 if piece_symbol != "P" else 0 : -2].replace("x", "").upper()
+        candidates = [
+            move
+            for move in moves
+            if move.to_tile is destination
+            and move.promotion == promotion
+            and move.from_tile.piece.symbol == piece_symbol
+            and all(char in move.from_tile.name for char in disambiguation)
+        ]
+    if len(candidates) != 1:
+        raise InvalidMoveError(f"{san} does not match exactly one legal move")
+    return candidates[0]
+
+
+def _is_annotation(char: str, state: dict[str, int]) -> bool:
+    """Track comments and variations, which are skipped along with their delimiters"""
+    if state["comment"]:
+        state["comment"] = char != "}"
+    elif char == "{":
+        state["comment"] = True
+    elif char == "(":
+        state["variation"] += 1
+    elif char == ")":
+        state["variation"] -= 1
+    else:
+        return state["variation"] > 0
+    return True
+
+
+def _movetext_tokens(line: str, state: dict[str, int]) -> Iterator[str]:
+    """
+    Split one line of movetext into tokens, dropping comments, variations and move
+    numbers. `state` carries open comments and variations over to the next line.
+    """
+    token = ""
+    for char in line:
+        if _is_annotation(char, state):
+            continue
+        if char == ";":
+            break
+        if char.isspace() or char == ".":
+            if token and not token.isdigit():
+                yield token
+            token = ""
+        else:
+            token += char
+    if token and not token.isdigit():
+        yield token
+
+
+def _read_tag(line: str, tags: dict[str, str]):
+    """Add a tag pair line such as [Event "Casual"] to `tags`, ignoring escape lines"""
+    if line.startswith("["):
+        name, _, value = line.strip()[1:-1].partition(" ")
+        tags[name] = value.strip('"')
+
+
+def _play_san(game: Game, san: str) -> str | None:
+    """Play a move given in SAN, or return why it could not be played"""
+    try:
+        move = parse_san(game, san)
+    except InvalidMoveError as error:
+        return str(error)
+    game.make_move(move.from_tile, move.to_tile, move.promotion)
+    return None
+
+
+def read_games(
+    lines: Iterable[str],
+    player_types: tuple[type[Player], type[Player]] = (Player, Player),
+) -> Iterator[PgnGame]:
+    """
+    Yield the games of a PGN file one at a time, reading it line by line, so memory use
+    does not grow with the size of the file. Every move is resolved against the legal
+    move generator and played on the game that is yielded.
+
+    A move that cannot be resolved does not end the stream. Its game is yielded with the
+    error and the rest of its movetext is skipped up to the tags of the next game.
+    """
+    tags: dict[str, str] = {}
+    game = None
+    state = {"comment": False, "variation": 0}
+    skipping = False
+    for line in lines:
+        if line.startswith("%") or (not state["comment"] and line.startswith("[")):
+            if game is not None:
+                yield PgnGame(tags, game, tags.get("Result", "*"))
+                tags, game = {}, None
+            skipping = False
+            _read_tag(line, tags)
+            continue
+        if skipping:
+            continue
+
+        for token in _movetext_tokens(line, state):
+            if game is None:
+                game = Game.from_fen(tags.get("FEN", INITIAL_FEN), player_types)
+            if token in RESULTS:
+                tags["Result"] = token
+                yield PgnGame(tags, game, token)
+                tags, game = {}, None
+            elif not token.startswith("$") and (error := _play_san(game, token)):
+                yield PgnGame(tags, game, "*", error)
+                tags, game, skipping = {}, None, True
+                state = {"comment": False, "variation": 0}
+                break
+
+    if game is not None:
+        yield PgnGame(tags, game, tags.get("Result", "*"))
+
+
+def game_to_pgn(game: Game, tags: dict[str, str] | None = None, result: str = "*") -> str:
+    """
+    PGN text of a game's moves so far, from the position its move stack started at. The
+    moves are replayed on a copy set up from the starting FEN, so the game is left as it is.
+    """
+    tags = {**SEVEN_TAG_ROSTER, **(tags or {}), "Result": result}
+    if (starting_fen := game.starting_fen()) != INITIAL_FEN:
+        tags.update({"SetUp": "1", "FEN": starting_fen})
+
+    replay = Game.from_fen(starting_fen, player_types=(Player, Player))
+    tokens = []
+    for record in game.move_stack:
+        if record.piece.team_colour == replay.players[0].team_colour:
+            tokens.append(f"{replay.full_turn_count}.")
+        elif not tokens:
+            tokens.append(f"{replay.full_turn_count}...")
+        move = replay.decode_move(record.encode())
+        tokens.append(move_to_san(replay, move))
+        replay.make_move(move.from_tile, move.to_tile, move.promotion)
+    tokens.append(result)
+
+    lines, line = [], ""
+    for token in tokens:
+        if line and len(line) + len(token) + 1 > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+
+    tag_lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+    return "\n".join([*tag_lines, "", *lines]) + "\n"
+
+
+def write_games(out: TextIO, games: Iterable[tuple[Game, dict[str, str], str]]):
+    """Write (game, tags, result) triples one after another as they are produced"""
+    for game, tags, result in games:
+        out.write(game_to_pgn(game, tags, result))
+        out.write("\n")
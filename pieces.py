@@ -3,19 +3,24 @@ from __future__ import annotations
 import abc
 from typing import TYPE_CHECKING
 
-from enums import PieceDirection, PieceType, TeamColour
+from bitboard import BISHOP, COLOURS, KING, KNIGHT, PAWN, QUEEN, ROOK, iter_squares
+from enums import PieceType, TeamColour
 
 if TYPE_CHECKING:
     from game import Player, Tile
 
 
 class Piece:
+    __slots__ = ("colour_index", "team_colour", "tile")
+
     @property
     @abc.abstractmethod
     def type(self) -> PieceType:
         return
 
     team_colour: TeamColour  # TODO: Readonly property
+    colour_index: int
+    kind: int
     tile: Tile | None
     symbol: str
 
@@ -24,50 +29,24 @@ class Piece:
         return self.tile is not None
 
     def __init__(self, tile: Tile, team_colour: TeamColour):
-        self.tile = tile
-        self.tile.piece = self
         self.team_colour = team_colour
-        self.symbol = ""
+        self.colour_index = COLOURS[team_colour]
+        self.tile = tile
+        self.tile.enter(self)
 
-    @abc.abstractmethod
     def get_view(self) -> list[Tile]:
-        return []
-
-    """
-        Return a list of tiles in the line of sight of a piece in the given direction. 
-        The view ends at edge of board or the first tile where there is a piece.
-    """
-
-    def get_line_of_sight(
-        self,
-        directions: list[PieceDirection],
-        distance: int | None = None,
-        *,
-        include_opponent_occupied: bool = True,
-    ) -> list[Tile]:
-        tiles = []
-        for direction in directions:
-            direction_tiles = []
-            current_tile = self.tile
-            while not distance or (len(direction_tiles) < distance):
-                next_tile = current_tile.board.get_tile(
-                    current_tile.col + direction.value[1], current_tile.row + direction.value[0]
-                )
-
-                if not next_tile:
-                    break
-                if not next_tile.piece:
-                    direction_tiles += [next_tile]
-                elif next_tile.piece.team_colour != self.team_colour and include_opponent_occupied:
-                    direction_tiles += [next_tile]
-                    break
-                else:
-                    break
-                current_tile = next_tile
-
-            tiles += direction_tiles
-
-        return tiles
+        """Tiles the piece could move to, ignoring whether the move leaves its king in check"""
+        return self.to_tiles(self.view_mask())
+
+    def view_mask(self) -> int:
+        """Bitboard of the squares in `get_view`"""
+        bitboard = self.tile.board.bitboard
+        targets = bitboard.attacks(self.tile.index, self.colour_index, self.kind)
+        return targets & ~bitboard.occupancy[self.colour_index]
+
+    def to_tiles(self, targets: int) -> list[Tile]:
+        squares = self.tile.board.squares
+        return [squares[square] for square in iter_squares(targets)]
 
     def move(self, new_tile: Tile) -> Piece | None:
         self.tile.vacate()
@@ -81,10 +60,7 @@ class Piece:
         if self.team_colour != player.team_colour:
             return (False, f"{self.tile.piece.type} on {self.tile.name} is not yours")
 
-        available_moves = self.get_view()
-
-        to_tile_in_view = next((x for x in available_moves if x.name == to_tile.name), None)
-        if not to_tile_in_view:
+        if not self.view_mask() >> to_tile.index & 1:
             return (False, f"{self.type} cannot move to {to_tile.name}")
 
         return (True, "")
@@ -98,124 +74,58 @@ class Piece:
 
 
 class Pawn(Piece):
+    __slots__ = ()
+
     type = "Pawn"
     symbol = "P"
-    has_moved: bool
-
-    def __init__(self, tile: Tile, team_colour: TeamColour):
-        super().__init__(tile, team_colour)
-        self.has_moved = False
-
-    def get_view(self) -> list[Tile]:
-        move_direction = (
-            PieceDirection.UP if self.team_colour == TeamColour.WHITE else PieceDirection.DOWN
-        )
-        distance = 1 if self.has_moved else 2
-        attack_directions = (
-            [PieceDirection.UPRIGHT, PieceDirection.UPLEFT]
-            if self.team_colour == TeamColour.WHITE
-            else [PieceDirection.DOWNRIGHT, PieceDirection.DOWNLEFT]
-        )
-        tiles = self.get_line_of_sight(
-            directions=[move_direction], distance=distance, include_opponent_occupied=False
+    kind = PAWN
+
+    def view_mask(self) -> int:
+        bitboard = self.tile.board.bitboard
+        square = self.tile.index
+        pushes = bitboard.pawn_pushes(square, self.colour_index)
+        captures = (
+            bitboard.attacks(square, self.colour_index, PAWN)
+            & bitboard.occupancy[1 - self.colour_index]
         )
-        attackable_tiles = self.get_line_of_sight(directions=attack_directions, distance=1)
-        tiles += [
-            t for t in attackable_tiles if t.piece and t.piece.team_colour != self.team_colour
-        ]
-
-        return tiles
-
-    def move(self, tile: Tile) -> Piece | None:
-        self.has_moved = True
-        return super().move(tile)
+        return pushes | captures
 
 
 class Rook(Piece):
+    __slots__ = ()
+
     type = "Rook"
     symbol = "R"
-
-    def get_view(self) -> list[Tile]:
-        return self.get_line_of_sight(
-            directions=[
-                PieceDirection.UP,
-                PieceDirection.RIGHT,
-                PieceDirection.DOWN,
-                PieceDirection.LEFT,
-            ]
-        )
+    kind = ROOK
 
 
 class Knight(Piece):
+    __slots__ = ()
+
     type = "Knight"
     symbol = "N"
-
-    def get_view(self) -> list[Tile]:
-        return [
-            t
-            for t in [
-                self.tile.board.get_tile(self.tile.col + 1, self.tile.row + 2),
-                self.tile.board.get_tile(self.tile.col - 1, self.tile.row + 2),
-                self.tile.board.get_tile(self.tile.col - 2, self.tile.row + 1),
-                self.tile.board.get_tile(self.tile.col - 2, self.tile.row - 1),
-                self.tile.board.get_tile(self.tile.col - 1, self.tile.row - 2),
-                self.tile.board.get_tile(self.tile.col + 1, self.tile.row - 2),
-                self.tile.board.get_tile(self.tile.col + 2, self.tile.row - 1),
-                self.tile.board.get_tile(self.tile.col + 2, self.tile.row + 1),
-            ]
-            if t and (not t.piece or t.piece.team_colour != self.team_colour)
-        ]
+    kind = KNIGHT
 
 
 class Bishop(Piece):
+    __slots__ = ()
+
     type = "Bishop"
     symbol = "B"
-
-    def get_view(self) -> list[Tile]:
-        return self.get_line_of_sight(
-            directions=[
-                PieceDirection.UPRIGHT,
-                PieceDirection.DOWNRIGHT,
-                PieceDirection.DOWNLEFT,
-                PieceDirection.UPLEFT,
-            ]
-        )
+    kind = BISHOP
 
 
 class Queen(Piece):
+    __slots__ = ()
+
     type = "Queen"
     symbol = "Q"
-
-    def get_view(self) -> list[Tile]:
-        return self.get_line_of_sight(
-            directions=[
-                PieceDirection.UP,
-                PieceDirection.RIGHT,
-                PieceDirection.DOWN,
-                PieceDirection.LEFT,
-                PieceDirection.UPRIGHT,
-                PieceDirection.DOWNRIGHT,
-                PieceDirection.DOWNLEFT,
-                PieceDirection.UPLEFT,
-            ]
-        )
+    kind = QUEEN
 
 
 class King(Piece):
+    __slots__ = ()
+
     type = "King"
     symbol = "K"
-
-    def get_view(self) -> list[Tile]:
-        return self.get_line_of_sight(
-            directions=[
-                PieceDirection.UP,
-                PieceDirection.RIGHT,
-                PieceDirection.DOWN,
-                PieceDirection.LEFT,
-                PieceDirection.UPRIGHT,
-                PieceDirection.DOWNRIGHT,
-                PieceDirection.DOWNLEFT,
-                PieceDirection.UPLEFT,
-            ],
-            distance=1,
-        )
+    kind = KING
@@ -5,38 +5,48 @@ import os
 import random
 from typing import TYPE_CHECKING
 
-import httpx
-
+from chess_api import ChessApiClient, default_client
 from enums import TeamColour
 from pieces import King, Piece
+from search import Searcher
 
 if TYPE_CHECKING:
+    from book import OpeningBook
     from game import Game
+    from parallel_search import ParallelSearcher
+    from tablebase import Tablebase
 
 
 class Player:
     team_colour: TeamColour
     is_turn: bool
     pieces: list[Piece]
-
-    @property
-    def king(self):
-        return next(piece for piece in self.pieces if isinstance(piece, King))
+    king: King | None
 
     def __init__(self, team_colour: TeamColour, pieces: list[Piece]):
         self.team_colour = team_colour
         self.pieces = pieces
         self.is_turn = team_colour == TeamColour.WHITE
+        # The king is never captured, so it can be found once
+        self.king = next((piece for piece in pieces if isinstance(piece, King)), None)
 
     @abc.abstractmethod
-    def take_turn(self, *_: list[any], **__: dict[str, any]) -> tuple[str, str]:
+    def take_turn(self, *_: list[any], **__: dict[str, any]) -> tuple[str, ...]:
+        """The tiles to move from and to, then the letter of the piece to promote to if any"""
         return
 
+    async def take_turn_async(self, game: Game, message: str = "") -> tuple[str, ...]:
+        """
+        `take_turn` for games hosted in an event loop. Players that wait on the network or
+        on a person override this so that other games carry on in the meantime.
+        """
+        return self.take_turn(game, message)
+
 
 class CommandLinePlayer(Player):
     def take_turn(
         self, game: Game, message: str, *_: list[any], **__: dict[str, any]
-    ) -> tuple[str, str]:
+    ) -> tuple[str, ...]:
         print(message)
         print("\n")
         print(game.board)
@@ -45,28 +55,86 @@ class CommandLinePlayer(Player):
         os.system("cls" if os.name == "nt" else "clear")  # noqa: S605
         input_tiles = move.split(" ")
 
-        if len(input_tiles) != 2:
-            print("Invalid move, please provide a move in the correct format eg. 'A2 A4'")
+        if len(input_tiles) not in {2, 3}:
+            print(
+                "Invalid move, please provide a move in the correct format eg. 'A2 A4', "
+                "or 'A7 A8 N' to promote to a knight"
+            )
             return self.take_turn(game, message)
 
-        return (input_tiles[0].upper(), input_tiles[1].upper())
+        return tuple(tile.upper() for tile in input_tiles)
 
 
 class RandomMovePlayer(Player):
-    def take_turn(self, *_: list[any], **__: dict[str, any]) -> tuple[str, str]:
-        piece = random.choice(  # noqa: S311
-            [piece for piece in self.pieces if piece.is_alive and len(piece.get_view())]
+    def take_turn(self, game: Game, *_: list[any], **__: dict[str, any]) -> tuple[str, ...]:
+        move = random.choice(game.generate_legal_moves(self))  # noqa: S311
+
+        return move.tile_names
+
+
+class SearchPlayer(Player):
+    """
+    Plays the best move found by a local alpha-beta search, without any network access.
+    Pass a `ParallelSearcher` as `searcher` to spread the search over several processes,
+    and an `OpeningBook` as `book` to play book moves instead of searching while in book.
+    A `Tablebase` lets the search score the endings it covers without searching them.
+    """
+
+    searcher: Searcher | ParallelSearcher
+    book: OpeningBook | None
+
+    def __init__(  # noqa: PLR0913
+        self,
+        team_colour: TeamColour,
+        pieces: list[Piece],
+        *,
+        depth: int = 3,
+        node_limit: int | None = None,
+        time_limit: float | None = None,
+        searcher: Searcher | ParallelSearcher | None = None,
+        book: OpeningBook | None = None,
+        tablebase: Tablebase | None = None,
+    ):
+        super().__init__(team_colour, pieces)
+        self.searcher = searcher or Searcher(
+            depth=depth, node_limit=node_limit, time_limit=time_limit, tablebase=tablebase
         )
-        to_tile = random.choice(piece.get_view())  # noqa: S311
+        self.book = book
 
-        return (piece.tile.name, to_tile.name)
+    def take_turn(self, game: Game, *_: list[any], **__: dict[str, any]) -> tuple[str, ...]:
+        if self.book and (move := self.book.choose(game)):
+            return move.tile_names
+        return self.searcher.search(game).move.tile_names
 
 
 class ChessApiPlayer(Player):
-    url = "https://chess-api.com/v1"
-
-    def take_turn(self, game: Game, *_: list[any], **__: dict[str, any]) -> tuple[str, str]:
-        fen = game.to_fen()
-        response = httpx.post(self.url, data={"fen": fen})
-        response_json = response.json()
-        return (response_json["from"].upper(), response_json["to"].upper())
+    """
+    Plays the moves suggested by chess-api.com. Players share a pooled client unless given
+    their own, which can set timeouts, retries and an on-disk move cache. Book moves are
+    played without asking the API while the game is in `book`.
+    """
+
+    client: ChessApiClient
+    book: OpeningBook | None
+
+    def __init__(
+        self,
+        team_colour: TeamColour,
+        pieces: list[Piece],
+        *,
+        client: ChessApiClient | None = None,
+        book: OpeningBook | None = None,
+    ):
+        super().__init__(team_colour, pieces)
+        self.client = client or default_client()
+        self.book = book
+
+    def take_turn(self, game: Game, *_: list[any], **__: dict[str, any]) -> tuple[str, ...]:
+        if self.book and (move := self.book.choose(game)):
+            return move.tile_names
+        return self.client.best_move(game.to_fen())
+
+    async def take_turn_async(self, game: Game, _: str = "") -> tuple[str, ...]:
+        if self.book and (move := self.book.choose(game)):
+            return move.tile_names
+        return await self.client.best_move_async(game.to_fen())
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+from bitboard import BISHOP, BLACK, KING, KNIGHT, PAWN, PAWN_ATTACKS, QUEEN, ROOK, WHITE
+from fen import PIECE_SYMBOLS, parse_fen
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from types import TracebackType
+
+    from fen import Position
+    from game import Game
+
+"""
+    SQLite index of the positions of `GameLog` files, one position per line. A log may hold
+    several games one after another. A line starts a new game unless its move counters put
+    it one ply after the line before it.
+
+    logs        log id, resolved file name, bytes of the file indexed so far and the
+                number of lines they hold
+    games       game id, its log, the line it starts on, the ply its move counters give
+                that line and the number of plies indexed
+    positions   Zobrist key and material signature of each position, with the game and
+                ply it was reached at, stored clustered by key
+
+    Keys are those of `Game.key`, stored as signed 64-bit integers as SQLite requires.
+    Material signatures are written like tablebase names, such as KQRPPvKRPP.
+"""
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS logs (
+        log_id INTEGER PRIMARY KEY,
+        file_name TEXT NOT NULL UNIQUE,
+        indexed_size INTEGER NOT NULL,
+        lines INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS games (
+        game_id INTEGER PRIMARY KEY,
+        log_id INTEGER NOT NULL,
+        first_line INTEGER NOT NULL,
+        first_ply INTEGER NOT NULL,
+        plies INTEGER NOT NULL,
+        UNIQUE (log_id, first_line)
+    );
+    CREATE TABLE IF NOT EXISTS positions (
+        key INTEGER NOT NULL,
+        material TEXT NOT NULL,
+        game_id INTEGER NOT NULL,
+        ply INTEGER NOT NULL,
+        PRIMARY KEY (key, game_id, ply)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS positions_by_material ON positions (material, game_id, ply);
+"""
+
+"""
+    Kinds in the order they are written in a material signature, strongest first.
+"""
+SIGNATURE_KINDS = (KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN)
+
+
+class Occurrence:
+    """A position reached `ply` plies into an indexed game, on line `line` of its log"""
+
+    game_id: int
+    file_name: str
+    ply: int
+    line: int
+
+    def __init__(self, game_id: int, file_name: str, ply: int, line: int):
+        self.game_id = game_id
+        self.file_name = file_name
+        self.ply = ply
+        self.line = line
+
+
+def material_signature(counts: Sequence[Sequence[int]]) -> str:
+    """Signature of the number of pieces of each colour and kind, such as KQvKR"""
+    white, black = (
+        "".join(PIECE_SYMBOLS[WHITE][kind] * counts[colour][kind] for kind in SIGNATURE_KINDS)
+        for colour in (WHITE, BLACK)
+    )
+    return f"{white}v{black}"
+
+
+def position_key(position: Position) -> int:
+    """The key `Game.key` gives the position of a parsed FEN, without setting up a game"""
+    key = CASTLING_KEYS[position.castling_rights]
+    pawns = 0
+    for square, colour, kind in position.placement:
+        key ^= PIECE_KEYS[colour][kind][square]
+        if kind == PAWN and colour == position.colour:
+            pawns |= 1 << square
+    if position.colour == BLACK:
+        key ^= BLACK_TO_MOVE_KEY
+    if (square := position.en_passant_square) is not None and (
+        PAWN_ATTACKS[1 - position.colour][square] & pawns
+    ):
+        key ^= EN_PASSANT_KEYS[square % 8]
+    return key
+
+
+def index_fen(fen: str) -> tuple[int, str]:
+    """Signed key and material signature of a FEN, as the index stores them"""
+    return _index_position(parse_fen(fen, cache=False))
+
+
+def _index_position(position: Position) -> tuple[int, str]:
+    counts = [[0] * 6, [0] * 6]
+    for _, colour, kind in position.placement:
+        counts[colour][kind] += 1
+    return _signed(position_key(position)), material_signature(counts)
+
+
+def _signed(key: int) -> int:
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _scan_log(file_name: str, offset: int) -> tuple[int, list[tuple[int, str, int]]]:
+    """
+    Keys, signatures and move counter plies of the positions of a log from `offset` on,
+    and the offset after the last complete line. A line still being written is left for
+    the next update.
+    """
+    with Path(file_name).open("rb") as file:
+        file.seek(offset)
+        data = file.read()
+    end = data.rfind(b"\n") + 1
+    rows = []
+    for line in data[:end].splitlines():
+        if line.strip():
+            position = parse_fen(line.decode(), cache=False)
+            ply = (position.full_turn_count - 1) * 2 + position.colour
+            rows.append((*_index_position(position), ply))
+    return offset + end, rows
+
+
+def _scan_logs(
+    file_names: list[str], offsets: list[int], workers: int
+) -> Iterator[tuple[int, list[tuple[int, str, int]]]]:
+    """Scan logs in order, across `workers` processes"""
+    if workers > 1 and len(file_names) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_scan_log, file_names, offsets)
+    else:
+        yield from map(_scan_log, file_names, offsets)
+
+
+class PositionIndex:
+    """
+    Inverted index from positions and material balances to the games and plies they
+    were reached at. Logs are scanned across processes and only the lines added since the
+    last update are read again, so the index keeps up with logs as they grow. A lookup
+    by position walks the primary key and one by material its own index, so both take
+    milliseconds however many games are indexed.
+    """
+
+    file_name: str
+    connection: sqlite3.Connection
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM positions").fetchone()[0]
+
+    def update(self, file_names: Iterable[str], workers: int = 1) -> int:
+        """
+        Index the lines of the logs that are new since the last update and return how many
+        positions were added. A log that has shrunk was replaced and is indexed anew.
+        """
+        logs = {
+            file_name: (log_id, indexed_size, lines)
+            for log_id, file_name, indexed_size, lines in self.connection.execute(
+                "SELECT log_id, file_name, indexed_size, lines FROM logs"
+            )
+        }
+        scans = []
+        for file_name in dict.fromkeys(str(Path(name).resolve()) for name in file_names):
+            log_id, indexed_size, lines = logs.get(file_name, (None, 0, 0))
+            size = Path(file_name).stat().st_size
+            if size == indexed_size:
+                continue
+            if size < indexed_size:
+                self.connection.execute(
+                    "DELETE FROM positions WHERE game_id IN"
+                    " (SELECT game_id FROM games WHERE log_id = ?)",
+                    (log_id,),
+                )
+                self.connection.execute("DELETE FROM games WHERE log_id = ?", (log_id,))
+                indexed_size, lines = 0, 0
+            scans.append((file_name, log_id, indexed_size, lines))
+
+        names = [file_name for file_name, *_ in scans]
+        offsets = [indexed_size for *_, indexed_size, _ in scans]
+        added = 0
+        with self.connection:
+            results = _scan_logs(names, offsets, workers)
+            for (file_name, log_id, _, lines), (end, rows) in zip(scans, results, strict=True):
+                self._store(file_name, log_id, end, lines, rows)
+                added += len(rows)
+        return added
+
+    def _store(
+        self,
+        file_name: str,
+        log_id: int | None,
+        end: int,
+        lines: int,
+        rows: list[tuple[int, str, int]],
+    ):
+        if log_id is None:
+            log_id = self.connection.execute(
+                "INSERT INTO logs (file_name, indexed_size, lines) VALUES (?, ?, ?)",
+                (file_name, end, lines + len(rows)),
+            ).lastrowid
+        else:
+            self.connection.execute(
+                "UPDATE logs SET indexed_size = ?, lines = ? WHERE log_id = ?",
+                (end, lines + len(rows), log_id),
+            )
+
+        # The last game of the log goes on for as long as the move counters follow on
+        game_id, first_ply, plies = self.connection.execute(
+            "SELECT game_id, first_ply, plies FROM games WHERE log_id = ?"
+            " ORDER BY first_line DESC LIMIT 1",
+            (log_id,),
+        ).fetchone() or (None, 0, 0)
+        game_plies = {}
+        positions = []
+        for line, (key, material, ply) in enumerate(rows, start=lines):
+            if game_id is None or ply != first_ply + plies:
+                game_id = self.connection.execute(
+                    "INSERT INTO games (log_id, first_line, first_ply, plies) VALUES (?, ?, ?, 0)",
+                    (log_id, line, ply),
+                ).lastrowid
+                first_ply, plies = ply, 0
+            positions.append((key, material, game_id, plies))
+            plies += 1
+            game_plies[game_id] = plies
+        self.connection.executemany(
+            "UPDATE games SET plies = ? WHERE game_id = ?",
+            ((plies, game_id) for game_id, plies in game_plies.items()),
+        )
+        self.connection.executemany(
+            "INSERT INTO positions (key, material, game_id, ply) VALUES (?, ?, ?, ?)", positions
+        )
+
+    def _occurrences(self, where: str, parameters: tuple[int | str, ...]) -> list[Occurrence]:
+        """Occurrences matching a condition, which is one of the fixed ones below"""
+        rows = self.connection.execute(
+            "SELECT positions.game_id, file_name, ply, first_line + ply"  # noqa: S608
+            " FROM positions JOIN games USING (game_id) JOIN logs USING (log_id)"
+            f" WHERE {where} ORDER BY positions.game_id, ply",
+            parameters,
+        )
+        return [Occurrence(*row) for row in rows]
+
+    def find_key(self, key: int, material: str | None = None) -> list[Occurrence]:
+        """
+        Where a position was reached, by its Zobrist key. With its material signature as
+        well, a position that only shares the key is not mistaken for it.
+        """
+        if material is None:
+            return self._occurrences("key = ?", (_signed(key),))
+        return self._occurrences("key = ? AND material = ?", (_signed(key), material))
+
+    def find_fen(self, fen: str) -> list[Occurrence]:
+        return self._occurrences("key = ? AND material = ?", index_fen(fen))
+
+    def find_game(self, game: Game) -> list[Occurrence]:
+        """Where the current position of a game in play was reached before"""
+        pieces = game.board.bitboard.pieces
+        counts = [
+            [bitboard.bit_count() for bitboard in pieces[colour]] for colour in (WHITE, BLACK)
+        ]
+        return self.find_key(game.key, material_signature(counts))
+
+    def find_material(self, material: str) -> list[Occurrence]:
+        """Every position with a material balance, such as KRPvKR"""
+        return self._occurrences("material = ?", (material,))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index and search the positions of game logs")
+    parser.add_argument("index", help="SQLite index file, created if missing")
+    parser.add_argument("logs", nargs="*", help="GameLog files to add or bring up to date")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--fen", help="list the games that reached this position")
+    parser.add_argument("--material", help="list the games that reached this material")
+    args = parser.parse_args()
+
+    with PositionIndex(args.index) as position_index:
+        if args.logs:
+            start = time.perf_counter()
+            added = position_index.update(args.logs, args.workers)
+            print(f"Indexed {added} positions in {time.perf_counter() - start:.2f}s")
+        occurrences = []
+        if args.fen:
+            occurrences += position_index.find_fen(args.fen)
+        if args.material:
+            occurrences += position_index.find_material(args.material)
+        for occurrence in occurrences:
+            print(f"{occurrence.game_id} {occurrence.file_name} {occurrence.line} {occurrence.ply}")
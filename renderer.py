@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from game import Game
+    from player import Player
+
+
+class Renderer:
+    """
+    Observer for the events of `Game.play`. Every event does nothing by default, so games
+    run headless unless a renderer that draws something is passed in.
+    """
+
+    def start_turn(self, game: Game, player: Player):
+        pass
+
+    def move_played(self, game: Game, player: Player, move: str):
+        pass
+
+    def checkmate(self, game: Game, player: Player):
+        pass
+
+    def stalemate(self, game: Game, player: Player):
+        pass
+
+    def draw(self, game: Game, reason: str):
+        pass
+
+    def game_over(self, game: Game):
+        pass
+
+
+class NullRenderer(Renderer):
+    pass
+
+
+class TerminalRenderer(Renderer):
+    """Clears the terminal before every turn and reports how the game ended"""
+
+    def start_turn(self, *_: list[any]):
+        os.system("cls" if os.name == "nt" else "clear")  # noqa: S605
+
+    def checkmate(self, *_: list[any]):
+        print("Checkmate")
+
+    def stalemate(self, *_: list[any]):
+        print("Stalemate")
+
+    def draw(self, _: Game, reason: str):
+        print(f"Draw by {reason}")
+
+    def game_over(self, *_: list[any]):
+        print("Game Over")
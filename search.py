@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+from bitboard import PAWN
+from evaluation import PIECE_VALUES, evaluate
+from transposition import EXACT, LOWER_BOUND, MATE_SCORE, UPPER_BOUND, TranspositionTable
+
+if TYPE_CHECKING:
+    from game import Game, Move
+    from tablebase import Tablebase
+
+"""
+    Scores within this distance of MATE_SCORE are forced mates, counted in plies from the
+    root. They are stored in the transposition table relative to the node instead, so that
+    the same position reached at another ply keeps the right distance to mate.
+"""
+MATE_BOUND = MATE_SCORE - 1000
+
+
+class SearchAbortedError(Exception):
+    pass
+
+
+class SearchResult:
+    move: Move | None
+    score: int
+    depth: int
+    nodes: int
+
+    def __init__(self, move: Move | None, score: int, depth: int, nodes: int):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+
+
+class Searcher:
+    """
+    Iterative deepening principal variation search with a quiescence search over captures
+    and promotions. With only depth and node limits the result depends on nothing but the
+    position and the transposition table, which is kept between searches so that one
+    move's search starts from what the last one found. Two fresh searchers always pick the
+    same move for the same position. A time limit ends the search at whatever depth it had
+    completed.
+
+    With a tablebase, endings it covers are scored exactly below the root instead of being
+    searched, as a mate in the plies the table gives or a draw.
+    """
+
+    depth: int
+    node_limit: int | None
+    time_limit: float | None
+    transposition_table: TranspositionTable
+    tablebase: Tablebase | None
+    nodes: int
+    deadline: float | None
+
+    def __init__(
+        self,
+        depth: int = 3,
+        node_limit: int | None = None,
+        time_limit: float | None = None,
+        table_size_mb: float = 16,
+        tablebase: Tablebase | None = None,
+    ):
+        self.depth = depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.transposition_table = TranspositionTable(table_size_mb)
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.deadline = None
+
+    def search(self, game: Game) -> SearchResult:
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        self.transposition_table.new_search()
+
+        result = SearchResult(None, 0, 0, 0)
+        for depth in range(1, self.depth + 1):
+            try:
+                score = self._negamax(game, depth, -MATE_SCORE, MATE_SCORE, 0)
+            except SearchAbortedError:
+                break
+            entry = self.transposition_table.probe(game.key)
+            move = game.decode_move(entry.move) if entry and entry.move else None
+            result = SearchResult(move, score, depth, self.nodes)
+
+        if result.move is None:
+            # Not even a single ply could be searched, so fall back on the first legal move
+            moves = game.generate_legal_moves(game.players[game.current_turn])
+            result.move = moves[0] if moves else None
+        result.nodes = self.nodes
+        return result
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAbortedError
+        if (
+            self.deadline is not None
+            and not self.nodes % 1024
+            and time.perf_counter() > self.deadline
+        ):
+            raise SearchAbortedError
+
+    def _order_moves(self, moves: list[Move], best_move: int) -> list[Move]:
+        def priority(move: Move) -> int:
+            if move.encode() == best_move:
+                return -1_000_000
+            if captured := move.to_tile.piece:
+                return -(PIECE_VALUES[captured.kind] * 10 - PIECE_VALUES[move.from_tile.piece.kind])
+            return 0
+
+        return sorted(moves, key=priority)
+
+    def _negamax(self, game: Game, depth: int, alpha: int, beta: int, ply: int) -> int:
+        if depth <= 0:
+            return self._quiescence(game, alpha, beta, ply)
+        self._count_node()
+
+        # A repeated position is scored as a draw at once, since the side that is worse off
+        # can repeat it again
+        if ply and game.is_draw(repetitions=1):
+            return 0
+
+        key = game.key
+        score, best_move = self._probe(game, depth, alpha, beta, ply)
+        if score is not None:
+            return score
+
+        player = game.players[game.current_turn]
+        moves = game.generate_legal_moves(player)
+        if not moves:
+            return -MATE_SCORE + ply if game.is_check(player) else 0
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE
+        for index, move in enumerate(self._order_moves(moves, best_move)):
+            record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+            try:
+                # Moves after the first are expected to be worse, which a null window
+                # search proves cheaply. Only a surprise needs the full window search.
+                score = -MATE_SCORE
+                if index > 0:
+                    score = -self._negamax(game, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if index == 0 or alpha < score < beta:
+                    score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move(record)
+
+            if score > best_score:
+                best_score = score
+                best_move = move.encode()
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        bound = self._bound(best_score, original_alpha, beta)
+        self.transposition_table.store(
+            key, depth, self._score_to_table(best_score, ply), bound, best_move
+        )
+        return best_score
+
+    def _probe_tablebase(self, game: Game, ply: int) -> int | None:
+        """Score of an ending the tablebase covers, left to the search at the root"""
+        if not ply or self.tablebase is None or not (result := self.tablebase.probe(game)):
+            return None
+        wdl, plies = result
+        return wdl * (MATE_SCORE - ply - plies)
+
+    def _probe(
+        self, game: Game, depth: int, alpha: int, beta: int, ply: int
+    ) -> tuple[int | None, int]:
+        """
+        A stored score that settles the node, if there is one, and the stored best move. A
+        tablebase result settles it whatever the depth.
+        """
+        if (score := self._probe_tablebase(game, ply)) is not None:
+            return score, 0
+        if not (entry := self.transposition_table.probe(game.key)):
+            return None, 0
+        score = self._score_from_table(entry.score, ply)
+        if ply and entry.depth >= depth and self._is_cutoff(entry.bound, score, alpha, beta):
+            return score, entry.move
+        return None, entry.move
+
+    @staticmethod
+    def _bound(score: int, alpha: int, beta: int) -> int:
+        if score <= alpha:
+            return UPPER_BOUND
+        if score >= beta:
+            return LOWER_BOUND
+        return EXACT
+
+    @staticmethod
+    def _is_cutoff(bound: int, score: int, alpha: int, beta: int) -> bool:
+        """Whether a stored score is good enough to use without searching the node again"""
+        return (
+            bound == EXACT
+            or (bound == LOWER_BOUND and score >= beta)
+            or (bound == UPPER_BOUND and score <= alpha)
+        )
+
+    def _quiescence(self, game: Game, alpha: int, beta: int, ply: int) -> int:
+        self._count_node()
+        if (score := self._probe_tablebase(game, ply)) is not None:
+            return score
+        player = game.players[game.current_turn]
+        moves = game.generate_legal_moves(player)
+        in_check = game.is_check(player)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if not in_check:
+            stand_pat = evaluate(game)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = [move for move in moves if self._is_tactical(game, move)]
+
+        for move in self._order_moves(moves, 0):
+            record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+            try:
+                score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move(record)
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    @staticmethod
+    def _is_tactical(game: Game, move: Move) -> bool:
+        """Whether a move captures, en passant included, or promotes"""
+        return bool(
+            move.to_tile.piece
+            or move.promotion
+            or (move.from_tile.piece.kind == PAWN and move.to_tile.index == game.en_passant_square)
+        )
+
+    @staticmethod
+    def _score_to_table(score: int, ply: int) -> int:
+        if score > MATE_BOUND:
+            return score + ply
+        if score < -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score: int, ply: int) -> int:
+        if score > MATE_BOUND:
+            return score - ply
+        if score < -MATE_BOUND:
+            return score + ply
+        return score
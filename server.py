@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+from contextlib import suppress
+from functools import partial
+from typing import TYPE_CHECKING
+
+from enums import TeamColour
+from exceptions import InvalidMoveError
+from fen import INITIAL_FEN
+from game import Game
+from player import Player, RandomMovePlayer
+from renderer import Renderer
+
+if TYPE_CHECKING:
+    from pieces import Piece
+
+"""
+    Games that end by none of the rules are stopped after this many plies.
+"""
+DEFAULT_MAX_PLIES = 1000
+
+"""
+    Snapshots of this many finished games are kept for `snapshot` and `wait`, the oldest
+    dropped first, so that a server running for ever holds a bounded number of results.
+"""
+DEFAULT_MAX_FINISHED = 1000
+
+
+class GameSnapshot:
+    """State of a hosted game at one moment, safe to hand out while the game goes on"""
+
+    game_id: int
+    status: str
+    fen: str
+    plies: int
+    result: str
+    termination: str | None
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        game_id: int,
+        status: str,
+        fen: str,
+        plies: int,
+        result: str,
+        termination: str | None,
+    ):
+        self.game_id = game_id
+        self.status = status
+        self.fen = fen
+        self.plies = plies
+        self.result = result
+        self.termination = termination
+
+    def to_dict(self) -> dict[str, any]:
+        return {
+            "game_id": self.game_id,
+            "status": self.status,
+            "fen": self.fen,
+            "plies": self.plies,
+            "result": self.result,
+            "termination": self.termination,
+        }
+
+
+class ResultRenderer(Renderer):
+    """Keeps only how a game ended, which is all that is left of a game once it is over"""
+
+    result: str
+    termination: str | None
+
+    def __init__(self):
+        self.result = "*"
+        self.termination = None
+
+    def checkmate(self, _: Game, player: Player):
+        self.result = "0-1" if player.team_colour == TeamColour.WHITE else "1-0"
+        self.termination = "checkmate"
+
+    def stalemate(self, *_: list[any]):
+        self.result = "1/2-1/2"
+        self.termination = "stalemate"
+
+    def draw(self, _: Game, reason: str):
+        self.result = "1/2-1/2"
+        self.termination = reason
+
+
+class HostedGame:
+    """
+    A game while it is hosted. Once it is over the game and its move history are let go
+    and only its final snapshot is kept.
+    """
+
+    game_id: int
+    game: Game | None
+    renderer: ResultRenderer
+    status: str
+    task: asyncio.Task | None
+    final: GameSnapshot | None
+
+    def __init__(self, game_id: int, game: Game):
+        self.game_id = game_id
+        self.game = game
+        self.renderer = ResultRenderer()
+        self.status = "waiting"
+        self.task = None
+        self.final = None
+
+    def finish(self, status: str):
+        self.status = status
+        self.final = self.snapshot()
+        self.game = None
+
+    def snapshot(self) -> GameSnapshot:
+        if self.final:
+            return self.final
+        return GameSnapshot(
+            self.game_id,
+            self.status,
+            self.game.to_fen(),
+            len(self.game.move_stack),
+            self.renderer.result,
+            self.renderer.termination,
+        )
+
+
+class GameServer:
+    """
+    Hosts many games in one event loop. Each game is a task that gives way to the others
+    after every ply, and players that wait on the network or a person do so through
+    `take_turn_async` without holding up other games.
+
+    At most `max_games` games are played at once. `add_game` waits for a free slot when
+    the server is full, which pushes back on whoever is creating games. Games leave
+    `games` when they end, and only the snapshots of the last `max_finished` are kept.
+    """
+
+    max_games: int
+    max_plies: int
+    max_finished: int
+    games: dict[int, HostedGame]
+    finished: dict[int, GameSnapshot]
+    _slots: asyncio.Semaphore
+    _ids: itertools.count
+
+    def __init__(
+        self,
+        max_games: int = 1000,
+        max_plies: int = DEFAULT_MAX_PLIES,
+        max_finished: int = DEFAULT_MAX_FINISHED,
+    ):
+        self.max_games = max_games
+        self.max_plies = max_plies
+        self.max_finished = max_finished
+        self.games = {}
+        self.finished = {}
+        self._slots = asyncio.Semaphore(max_games)
+        self._ids = itertools.count()
+
+    async def add_game(self, game: Game) -> int:
+        """Start hosting a game once a slot is free and return its id"""
+        await self._slots.acquire()
+        hosted = HostedGame(next(self._ids), game)
+        self.games[hosted.game_id] = hosted
+        hosted.task = asyncio.create_task(self._run(hosted))
+        return hosted.game_id
+
+    async def _run(self, hosted: HostedGame):
+        hosted.status = "playing"
+        status = "finished"
+        try:
+            plies = 0
+            async for _ in hosted.game.play_async(renderer=hosted.renderer):
+                plies += 1
+                if plies >= self.max_plies:
+                    break
+                await asyncio.sleep(0)
+        except ConnectionError:
+            status = "abandoned"
+        except Exception:  # noqa: BLE001
+            # A failing player ends its own game, never the server or other games
+            status = "errored"
+        finally:
+            hosted.finish(status)
+            del self.games[hosted.game_id]
+            self.finished[hosted.game_id] = hosted.final
+            while len(self.finished) > self.max_finished:
+                del self.finished[next(iter(self.finished))]
+            self._slots.release()
+
+    def snapshot(self, game_id: int) -> GameSnapshot:
+        if hosted := self.games.get(game_id):
+            return hosted.snapshot()
+        return self.finished[game_id]
+
+    def snapshots(self) -> list[GameSnapshot]:
+        """Games in play and then the finished games that are kept, in the order they ended"""
+        return [*(hosted.snapshot() for hosted in self.games.values()), *self.finished.values()]
+
+    async def wait(self, game_id: int) -> GameSnapshot:
+        """Wait for a game to end and return its final state"""
+        if not (hosted := self.games.get(game_id)):
+            return self.finished[game_id]
+        await hosted.task
+        return hosted.final
+
+    async def join(self):
+        await asyncio.gather(*(hosted.task for hosted in list(self.games.values())))
+
+
+class SocketPlayer(Player):
+    """
+    A person playing over a plain TCP connection, one line per message. The server sends
+    "<message>|<fen>" and reads back a move such as "E2 E4" or "A7 A8 N".
+    """
+
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    def __init__(
+        self,
+        team_colour: TeamColour,
+        pieces: list[Piece],
+        *,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        super().__init__(team_colour, pieces)
+        self.reader = reader
+        self.writer = writer
+
+    def take_turn(self, *_: list[any], **__: dict[str, any]) -> tuple[str, ...]:
+        raise TypeError("SocketPlayer can only play in a hosted game")
+
+    async def take_turn_async(self, game: Game, message: str = "") -> tuple[str, ...]:
+        self.writer.write(f"{message}|{game.to_fen()}\n".encode())
+        # Waits while the client is not reading, so a slow client only slows its own game
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionResetError("Client disconnected")
+        tile_names = tuple(line.decode(errors="replace").upper().split())
+        if len(tile_names) not in {2, 3}:
+            raise InvalidMoveError("Send a move such as E2 E4, or A7 A8 N to promote")
+        return tile_names
+
+
+async def serve(
+    server: GameServer,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    opponent_type: type[Player] = RandomMovePlayer,
+) -> asyncio.Server:
+    """
+    Accept connections and start a game for each, with the client playing white against
+    `opponent_type`. The final snapshot is sent to the client when the game ends.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            player_type = partial(SocketPlayer, reader=reader, writer=writer)
+            game = Game.from_fen(INITIAL_FEN, player_types=(player_type, opponent_type))
+            snapshot = await server.wait(await server.add_game(game))
+            with suppress(ConnectionError):
+                writer.write(f"{snapshot.result} {snapshot.termination}\n".encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _main(host: str, port: int, max_games: int):
+    game_server = GameServer(max_games=max_games)
+    socket_server = await serve(game_server, host, port)
+    print(f"Serving games on {host}:{port}")
+    async with socket_server:
+        await socket_server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host games for clients over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-games", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.host, args.port, args.max_games))
@@ -0,0 +1,561 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Self
+
+from bitboard import (
+    BETWEEN,
+    BISHOP,
+    BLACK,
+    COLOURS,
+    KING,
+    KING_ATTACKS,
+    KNIGHT,
+    KNIGHT_ATTACKS,
+    PAWN,
+    QUEEN,
+    ROOK,
+    WHITE,
+    bishop_attacks,
+    iter_squares,
+    queen_attacks,
+    rook_attacks,
+)
+from fen import PIECE_SYMBOLS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+    from game import Game
+
+"""
+    Endgame tablebase file for one pawnless material set, such as KQvKR, with a byte per
+    position after a small header.
+
+    header     b"PCTB", u16 version, 8 bytes material name
+    position   0 for a draw, otherwise one more than the plies to mate with best play,
+               odd for a win for the side to move and even for a loss
+
+    A position is indexed by the side to move, the white king, the black king and then
+    the other pieces, white first and strongest first. Without pawns or castling the board
+    can be mirrored and turned, so the white king is brought into the a1-d1-d4 triangle
+    and only 10 of its 64 squares take space. Positions left over, with pieces on the same
+    square or the side not to move in check, are stored as draws and never read.
+"""
+MAGIC = b"PCTB"
+VERSION = 1
+_HEADER = struct.Struct("<4sH8s")
+
+MAX_PIECES = 4
+DRAWN_MATERIALS = {"KvK", "KBvK", "KNvK"}
+DEFAULT_MATERIALS = (
+    "KQvK",
+    "KRvK",
+    "KQQvK",
+    "KQRvK",
+    "KQBvK",
+    "KQNvK",
+    "KRRvK",
+    "KRBvK",
+    "KRNvK",
+    "KBBvK",
+    "KBNvK",
+    "KNNvK",
+    "KQvKQ",
+    "KQvKR",
+    "KQvKB",
+    "KQvKN",
+    "KRvKR",
+    "KRvKB",
+    "KRvKN",
+    "KBvKB",
+    "KBvKN",
+    "KNvKN",
+)
+
+
+def _in_triangle(square: int) -> bool:
+    file, rank = square % 8, square // 8
+    return file <= 3 and rank <= file
+
+
+def _transform(square: int, transform: int) -> int:
+    """Mirror across the files, then the ranks, then the diagonal, as bits 0 to 2 say"""
+    file, rank = square % 8, square // 8
+    if transform & 1:
+        file = 7 - file
+    if transform & 2:
+        rank = 7 - rank
+    if transform & 4:
+        file, rank = rank, file
+    return rank * 8 + file
+
+
+"""
+    The squares of the board under each of the 8 symmetries, the symmetries that bring a
+    white king on each square into the triangle, two when it ends up on the diagonal, and
+    the index of each square of the triangle.
+"""
+TRANSFORM_SQUARES = [[_transform(square, t) for square in range(64)] for t in range(8)]
+KING_TRANSFORMS = [
+    [t for t in range(8) if _in_triangle(TRANSFORM_SQUARES[t][square])] for square in range(64)
+]
+TRIANGLE = [square for square in range(64) if _in_triangle(square)]
+TRIANGLE_INDEX = {square: index for index, square in enumerate(TRIANGLE)}
+_LINE_ATTACKS = {
+    BISHOP: [bishop_attacks(square, 0) for square in range(64)],
+    ROOK: [rook_attacks(square, 0) for square in range(64)],
+    QUEEN: [queen_attacks(square, 0) for square in range(64)],
+}
+
+
+def _attacks(kind: int, square: int, occupied: int) -> int:
+    if kind == KING:
+        return KING_ATTACKS[square]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    if kind == BISHOP:
+        return bishop_attacks(square, occupied)
+    if kind == ROOK:
+        return rook_attacks(square, occupied)
+    return queen_attacks(square, occupied)
+
+
+def _attacks_square(kind: int, square: int, target: int, occupied: int) -> bool:
+    if kind == KING:
+        return KING_ATTACKS[square] >> target & 1
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[square] >> target & 1
+    return _LINE_ATTACKS[kind][square] >> target & 1 and not BETWEEN[square][target] & occupied
+
+
+class Material:
+    """
+    The pieces of a pawnless ending besides the kings, strongest first. Tables are only
+    kept with the stronger side as white, the other way round is read by swapping colours.
+    """
+
+    white: tuple[int, ...]
+    black: tuple[int, ...]
+    pieces: tuple[tuple[int, int], ...]
+    groups: tuple[tuple[int, int], ...]
+
+    def __init__(self, white: Iterable[int], black: Iterable[int]):
+        self.white = tuple(sorted(white, reverse=True))
+        self.black = tuple(sorted(black, reverse=True))
+        self.pieces = (
+            (WHITE, KING),
+            (BLACK, KING),
+            *((WHITE, kind) for kind in self.white),
+            *((BLACK, kind) for kind in self.black),
+        )
+        # Runs of identical pieces, whose squares are kept sorted so each position has
+        # one index whichever piece stands where
+        groups, start = [], 0
+        for _, run in groupby(self.pieces):
+            length = len(list(run))
+            if length > 1:
+                groups.append((start, start + length))
+            start += length
+        self.groups = tuple(groups)
+
+    @classmethod
+    def from_name(cls, name: str) -> Material:
+        white, _, black = name.partition("v")
+        if not (white.startswith("K") and black.startswith("K")):
+            raise ValueError(f"Invalid material {name}, expected something like KQvK")
+        return cls(
+            (PIECE_SYMBOLS[WHITE].index(symbol) for symbol in white[1:]),
+            (PIECE_SYMBOLS[WHITE].index(symbol) for symbol in black[1:]),
+        )
+
+    @property
+    def name(self) -> str:
+        symbols = PIECE_SYMBOLS[WHITE]
+        white = "".join(symbols[kind] for kind in self.white)
+        black = "".join(symbols[kind] for kind in self.black)
+        return f"K{white}vK{black}"
+
+    @property
+    def is_canonical(self) -> bool:
+        return self.white >= self.black
+
+    def size(self) -> int:
+        return 2 * len(TRIANGLE) * 64 ** (len(self.pieces) - 1)
+
+    def canonical_squares(self, squares: list[int]) -> list[int]:
+        """The squares of the symmetric position with the lowest index"""
+        best = None
+        for transform in KING_TRANSFORMS[squares[0]]:
+            table = TRANSFORM_SQUARES[transform]
+            moved = [table[square] for square in squares]
+            for start, end in self.groups:
+                moved[start:end] = sorted(moved[start:end])
+            if best is None or moved < best:
+                best = moved
+        return best
+
+    def index(self, side: int, squares: list[int]) -> int:
+        """Index of a position whose squares are canonical"""
+        index = side * len(TRIANGLE) + TRIANGLE_INDEX[squares[0]]
+        for square in squares[1:]:
+            index = index * 64 + square
+        return index
+
+    def decode(self, index: int) -> tuple[int, list[int]]:
+        squares = []
+        for _ in range(len(self.pieces) - 1):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        side, king = divmod(index, len(TRIANGLE))
+        return side, [TRIANGLE[king], *reversed(squares)]
+
+    def canonical_index(self, side: int, squares: list[int]) -> int:
+        return self.index(side, self.canonical_squares(squares))
+
+    def attackers(self, colour: int, squares: list[int]) -> list[tuple[int, int, int]]:
+        """Position in `pieces`, kind and square of each piece of a colour"""
+        return [
+            (i, kind, squares[i])
+            for i, (piece_colour, kind) in enumerate(self.pieces)
+            if piece_colour == colour
+        ]
+
+
+def _occupancy(squares: list[int]) -> int:
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    return occupied
+
+
+def _is_attacked(
+    square: int, attackers: list[tuple[int, int, int]], occupied: int, skip: int = -1
+) -> bool:
+    return any(
+        i != skip and _attacks_square(kind, attacker_square, square, occupied)
+        for i, kind, attacker_square in attackers
+    )
+
+
+class Tablebase:
+    """
+    Endgame tables in a directory, memory-mapped as they are first needed. A probe finds
+    the index of the position from its few pieces and reads one byte.
+    """
+
+    directory: str
+    _tables: dict[str, mmap.mmap | None]
+    _files: list[BinaryIO]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._tables = {}
+        self._files = []
+
+    def __reduce__(self) -> tuple[type[Tablebase], tuple[str]]:
+        """Tables are mapped again from their directory when sent to another process"""
+        return Tablebase, (self.directory,)
+
+    def _table(self, name: str) -> mmap.mmap | None:
+        if name not in self._tables:
+            path = Path(self.directory) / f"{name}.tb"
+            table = None
+            if path.exists():
+                file = path.open("rb")
+                table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, _ = _HEADER.unpack_from(table, 0)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{path} is not a version {VERSION} tablebase")
+                self._files.append(file)
+            self._tables[name] = table
+        return self._tables[name]
+
+    def probe_squares(
+        self, material: Material, side: int, squares: list[int]
+    ) -> tuple[int, int] | None:
+        """
+        Result of a position given by its material and the squares of `material.pieces`,
+        as (1, plies) for a win for the side to move, (-1, plies) for a loss and (0, 0) for
+        a draw, or None without a table for it.
+        """
+        if not material.is_canonical:
+            # Swap colours, mirroring the ranks so the position stays the same to play
+            white_count = len(material.white)
+            squares = [
+                squares[1] ^ 56,
+                squares[0] ^ 56,
+                *(square ^ 56 for square in squares[2 + white_count :]),
+                *(square ^ 56 for square in squares[2 : 2 + white_count]),
+            ]
+            material = Material(material.black, material.white)
+            side = 1 - side
+        if material.name in DRAWN_MATERIALS:
+            return 0, 0
+        if (table := self._table(material.name)) is None:
+            return None
+        index = material.canonical_index(side, squares)
+        return decode_value(table[_HEADER.size + index])
+
+    def probe(self, game: Game) -> tuple[int, int] | None:
+        """Result of a game's position as `probe_squares` gives it"""
+        bitboard = game.board.bitboard
+        if (
+            bitboard.occupied.bit_count() > MAX_PIECES
+            or game.castling_rights
+            or bitboard.pieces[WHITE][PAWN]
+            or bitboard.pieces[BLACK][PAWN]
+        ):
+            return None
+        white, black = [], []
+        white_squares, black_squares = [], []
+        for kind in (QUEEN, ROOK, BISHOP, KNIGHT):
+            for square in iter_squares(bitboard.pieces[WHITE][kind]):
+                white.append(kind)
+                white_squares.append(square)
+            for square in iter_squares(bitboard.pieces[BLACK][kind]):
+                black.append(kind)
+                black_squares.append(square)
+        squares = [
+            bitboard.king_square(WHITE),
+            bitboard.king_square(BLACK),
+            *white_squares,
+            *black_squares,
+        ]
+        colour = COLOURS[game.players[game.current_turn].team_colour]
+        return self.probe_squares(Material(white, black), colour, squares)
+
+    def probe_wdl(self, game: Game) -> int | None:
+        """1 when the side to move wins, -1 when it loses, 0 for a draw"""
+        result = self.probe(game)
+        return result and result[0]
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        for file in self._files:
+            file.close()
+        self._tables = {}
+        self._files = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+
+def decode_value(value: int) -> tuple[int, int]:
+    if not value:
+        return 0, 0
+    plies = value - 1
+    return (1 if plies % 2 else -1), plies
+
+
+def _capture_result(
+    tablebase: Tablebase, material: Material, side: int, squares: list[int], captured: int
+) -> tuple[int, int] | None:
+    """Result of the position left after the piece at `captured` is taken"""
+    remaining = [piece for i, piece in enumerate(material.pieces) if i != captured]
+    sub_material = Material(
+        (kind for piece_colour, kind in remaining[2:] if piece_colour == WHITE),
+        (kind for piece_colour, kind in remaining[2:] if piece_colour == BLACK),
+    )
+    result = tablebase.probe_squares(
+        sub_material, side, [square for i, square in enumerate(squares) if i != captured]
+    )
+    if result is None:
+        raise FileNotFoundError(f"{sub_material.name} is needed to generate {material.name}")
+    return result
+
+
+class _Generator:
+    """
+    Retrograde analysis of one material set. Every position first counts its distinct
+    moves and notes the results of its captures, which come from the smaller tables.
+    Then positions are settled in order of their distance to mate: a position is won as
+    soon as one move leads to a lost position, and lost once all of its moves lead to won
+    ones, working back from the mates through the moves that lead into them.
+    """
+
+    material: Material
+    tablebase: Tablebase
+    values: bytearray
+    counters: bytearray
+    settled: dict[int, list[int]]
+    capture_results: dict[int, list[tuple[int, bool]]]
+
+    def __init__(self, material: Material, tablebase: Tablebase):
+        self.material = material
+        self.tablebase = tablebase
+        self.values = bytearray(material.size())
+        self.counters = bytearray(material.size())
+        self.settled = {}
+        self.capture_results = {}
+
+    def _moves(self, side: int, squares: list[int]) -> tuple[set[int], set[tuple[int, int]]]:
+        """Indices of the positions after each quiet move, and the results of captures"""
+        material = self.material
+        occupied = _occupancy(squares)
+        own = _occupancy([square for i, _, square in material.attackers(side, squares)])
+        enemies = material.attackers(1 - side, squares)
+
+        children, captures = set(), set()
+        for i, kind, from_square in material.attackers(side, squares):
+            for to_square in iter_squares(_attacks(kind, from_square, occupied) & ~own):
+                captured = squares.index(to_square) if occupied >> to_square & 1 else -1
+                after = occupied & ~(1 << from_square) | 1 << to_square
+                king = to_square if i == side else squares[side]
+                if _is_attacked(king, enemies, after, skip=captured):
+                    continue
+                moved = squares.copy()
+                moved[i] = to_square
+                if captured < 0:
+                    children.add(material.canonical_index(1 - side, moved))
+                else:
+                    captures.add(
+                        _capture_result(self.tablebase, material, 1 - side, moved, captured)
+                    )
+        return children, captures
+
+    def _settle(self, index: int, plies: int):
+        self.values[index] = plies + 1
+        self.settled.setdefault(plies, []).append(index)
+
+    def _count_moves(self):
+        material = self.material
+        for index in range(material.size()):
+            side, squares = material.decode(index)
+            if len(set(squares)) < len(squares) or material.canonical_squares(squares) != squares:
+                continue
+            occupied = _occupancy(squares)
+            if _is_attacked(squares[1 - side], material.attackers(side, squares), occupied):
+                continue
+
+            children, captures = self._moves(side, squares)
+            self.counters[index] = len(children) + len(captures)
+            if not self.counters[index]:
+                enemies = material.attackers(1 - side, squares)
+                if _is_attacked(squares[side], enemies, occupied):
+                    self._settle(index, 0)
+                continue
+            for wdl, plies in captures:
+                if wdl:
+                    self.capture_results.setdefault(plies, []).append((index, wdl > 0))
+
+    def _predecessors(self, side: int, squares: list[int]) -> set[int]:
+        """Positions with the other side to move that have a quiet move to this one"""
+        material = self.material
+        mover = 1 - side
+        occupied = _occupancy(squares)
+        movers = material.attackers(mover, squares)
+
+        predecessors = set()
+        for i, kind, to_square in movers:
+            for from_square in iter_squares(_attacks(kind, to_square, occupied) & ~occupied):
+                moved = squares.copy()
+                moved[i] = from_square
+                before = occupied & ~(1 << to_square) | 1 << from_square
+                attackers = [
+                    (j, attacker_kind, from_square if j == i else attacker_square)
+                    for j, attacker_kind, attacker_square in movers
+                ]
+                if not _is_attacked(squares[side], attackers, before):
+                    predecessors.add(material.canonical_index(mover, moved))
+        return predecessors
+
+    def _apply(self, index: int, plies: int, *, child_wins: bool):
+        if self.values[index]:
+            return
+        if not child_wins:
+            self._settle(index, plies + 1)
+            return
+        self.counters[index] -= 1
+        if not self.counters[index]:
+            self._settle(index, plies + 1)
+
+    def generate(self) -> bytearray:
+        self._count_moves()
+        plies = 0
+        while plies <= max([*self.settled, *self.capture_results], default=-1):
+            for index, child_wins in self.capture_results.pop(plies, []):
+                self._apply(index, plies, child_wins=child_wins)
+            for index in self.settled.pop(plies, []):
+                side, squares = self.material.decode(index)
+                for predecessor in self._predecessors(side, squares):
+                    self._apply(predecessor, plies, child_wins=plies % 2 == 1)
+            plies += 1
+        return self.values
+
+
+def generate_table(name: str, directory: str) -> str:
+    """Generate and write the table of one material set, given the smaller ones it needs"""
+    material = Material.from_name(name)
+    if not material.is_canonical or len(material.pieces) > MAX_PIECES:
+        raise ValueError(f"{name} must have the stronger side as white and at most 4 pieces")
+    tablebase = Tablebase(directory)
+    try:
+        values = _Generator(material, tablebase).generate()
+    finally:
+        tablebase.close()
+
+    path = Path(directory) / f"{material.name}.tb"
+    temporary_path = path.with_suffix(".tmp")
+    with temporary_path.open("wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, material.name.encode()))
+        file.write(values)
+    temporary_path.replace(path)
+    return str(path)
+
+
+def generate_tables(
+    directory: str,
+    names: Iterable[str] = DEFAULT_MATERIALS,
+    workers: int = 1,
+    *,
+    overwrite: bool = False,
+) -> list[str]:
+    """
+    Generate the tables of several material sets across `workers` processes, fewest
+    pieces first so that each table finds the ones its captures lead to. Tables already
+    in the directory are kept unless `overwrite` is set.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    names = [name for name in names if overwrite or not (Path(directory) / f"{name}.tb").exists()]
+    paths = []
+    generate = partial(generate_table, directory=directory)
+    for _, same_size in groupby(sorted(names, key=len), key=len):
+        group = list(same_size)
+        if workers > 1 and len(group) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(group))) as executor:
+                paths += executor.map(generate, group)
+        else:
+            paths += map(generate, group)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases")
+    parser.add_argument("directory")
+    parser.add_argument("materials", nargs="*", default=DEFAULT_MATERIALS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = generate_tables(args.directory, args.materials, args.workers, overwrite=args.overwrite)
+    print(f"Generated {len(paths)} tables in {time.perf_counter() - start:.2f}s")
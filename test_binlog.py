@@ -0,0 +1,90 @@
+import io
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from binlog import BinaryLogReader, BinaryLogWriter
+from game import Game
+from player import Player
+
+initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+endgame_position = "7k/Q7/6K1/8/8/8/8/8 w - - 0 1"
+
+
+def play(game: Game, *moves: str) -> list[str]:
+    fens = [game.to_fen()]
+    for move in moves:
+        from_tile_name, to_tile_name = move.split(" ")
+        game.make_move(
+            game.board.get_tile_by_name(from_tile_name), game.board.get_tile_by_name(to_tile_name)
+        )
+        fens.append(game.to_fen())
+    return fens
+
+
+def test_round_trip_and_replay_to_any_ply(tmp_path: Path):
+    file_name = str(tmp_path / "games.bin")
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    fens = play(game, "E2 E4", "E7 E5", "G1 F3", "B8 C6")
+    endgame = Game.from_fen(endgame_position, player_types=(Player, Player))
+    play(endgame, "A7 G7")
+
+    with BinaryLogWriter(file_name) as writer:
+        assert writer.add_game(game) == 0
+        assert writer.add_game(endgame) == 1
+    assert game.to_fen() == fens[-1]
+
+    with BinaryLogReader(file_name) as reader:
+        assert len(reader) == 2
+        starting_fen, moves = reader.read_game(0)
+        assert starting_fen == initial_position
+        assert len(moves) == 4
+        assert [reader.replay(0, ply).to_fen() for ply in range(5)] == fens
+        replayed_endgame = reader.replay(1)
+        assert replayed_endgame.is_checkmate(replayed_endgame.players[1]) is True
+
+
+def test_game_from_log_resumes_archived_game(tmp_path: Path):
+    file_name = str(tmp_path / "games.bin")
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    fens = play(game, "D2 D4", "D7 D5")
+    with BinaryLogWriter(file_name) as writer:
+        writer.add_game(game)
+
+    with BinaryLogReader(file_name) as reader:
+        game_log = reader.game_log(0)
+        assert Game.from_log(game_log, player_types=(Player, Player)).to_fen() == fens[-1]
+        assert Game.from_log(game_log, player_types=(Player, Player), ply=1).to_fen() == fens[1]
+        with pytest.raises(io.UnsupportedOperation):
+            game_log.append(game)
+
+
+def test_reopened_archive_keeps_earlier_games(tmp_path: Path):
+    file_name = str(tmp_path / "games.bin")
+    for moves in (["E2 E4"], ["D2 D4", "D7 D5"]):
+        game = Game.from_fen(initial_position, player_types=(Player, Player))
+        play(game, *moves)
+        with BinaryLogWriter(file_name) as writer:
+            writer.add_game(game)
+
+    with BinaryLogReader(file_name) as reader:
+        assert [len(moves) for _, moves in reader] == [1, 2]
+
+
+def test_play_resumes_from_archive_with_its_history(tmp_path: Path):
+    file_name = str(tmp_path / "games.bin")
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    play(game, "G1 F3", "G8 F6", "F3 G1", "F6 G8", "E2 E4")
+    with BinaryLogWriter(file_name) as writer:
+        writer.add_game(game)
+
+    with BinaryLogReader(file_name) as reader:
+        resumed = Game.from_log(reader.game_log(0), player_types=(Player, Player), ply=4)
+    assert resumed.game_log is None
+    assert len(resumed.move_stack) == 4
+    assert resumed.repetitions() == 1
+
+    resumed.players[0].take_turn = Mock(return_value=("E2", "E4"))
+    next(resumed.play())
+    assert resumed.to_fen() == game.to_fen()
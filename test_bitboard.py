@@ -0,0 +1,87 @@
+from bitboard import (
+    BLACK,
+    KING,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    PAWN,
+    ROOK,
+    WHITE,
+    BitBoard,
+    bishop_attacks,
+    iter_squares,
+    rook_attacks,
+    square_index,
+)
+from game import Game
+from perft import PERFT_POSITIONS
+from player import Player
+
+A1, B1, B2, C3, D4, H8 = 0, 1, 9, 18, 27, 63
+
+
+def squares(bitboard: int) -> set[int]:
+    return set(iter_squares(bitboard))
+
+
+def test_step_attack_tables():
+    assert squares(KNIGHT_ATTACKS[A1]) == {square_index(1, 2), square_index(2, 1)}
+    assert len(squares(KNIGHT_ATTACKS[D4])) == 8
+    assert squares(KING_ATTACKS[A1]) == {B1, square_index(0, 1), B2}
+
+
+def test_sliding_attacks_stop_at_first_blocker():
+    occupied = (1 << C3) | (1 << square_index(0, 4))
+    assert squares(bishop_attacks(A1, occupied)) == {B2, C3}
+    assert squares(rook_attacks(A1, occupied)) == {
+        square_index(file, 0) for file in range(1, 8)
+    } | {square_index(0, rank) for rank in range(1, 5)}
+    assert squares(bishop_attacks(H8, 0)) == {square_index(i, i) for i in range(7)}
+
+
+def test_attackers_to():
+    bitboard = BitBoard()
+    bitboard.put(B2, WHITE, PAWN)
+    assert bitboard.is_attacked(C3, WHITE) is True
+    assert bitboard.is_attacked(C3, BLACK) is False
+    assert bitboard.is_attacked(square_index(1, 2), WHITE) is False
+
+
+def test_bitboard_follows_board_moves():
+    game = Game(player_types=(Player, Player))
+    bitboard = game.board.bitboard
+    assert bitboard.occupied.bit_count() == 32
+
+    e2 = game.board.get_tile_by_name("E2")
+    e4 = game.board.get_tile_by_name("E4")
+    record = game.make_move(e2, e4)
+    assert bitboard.pieces[WHITE][PAWN] & (1 << e4.index)
+    assert not bitboard.occupied & (1 << e2.index)
+
+    game.unmake_move(record)
+    assert bitboard.pieces[WHITE][PAWN] & (1 << e2.index)
+    assert not bitboard.occupied & (1 << e4.index)
+
+
+def test_attack_map_matches_attackers_of_every_square():
+    for _, fen, _ in PERFT_POSITIONS:
+        bitboard = Game.from_fen(fen, player_types=(Player, Player)).board.bitboard
+        for colour in (WHITE, BLACK):
+            king = bitboard.pieces[1 - colour][KING]
+            expected = {
+                square
+                for square in range(64)
+                if bitboard.attackers_to(square, colour, bitboard.occupied & ~king)
+            }
+            assert squares(bitboard.attack_map(colour)) == expected
+
+
+def test_attack_map_sees_through_the_enemy_king_and_follows_moves():
+    bitboard = BitBoard()
+    bitboard.put(A1, WHITE, ROOK)
+    bitboard.put(square_index(3, 0), BLACK, KING)
+    assert bitboard.is_attacked(square_index(4, 0), WHITE) is True
+
+    bitboard.remove(A1, WHITE, ROOK)
+    assert bitboard.is_attacked(square_index(4, 0), WHITE) is False
+    bitboard.put(A1, WHITE, ROOK)
+    assert bitboard.is_attacked(square_index(4, 0), WHITE) is True
@@ -0,0 +1,112 @@
+import io
+import json
+import pickle
+import random
+from pathlib import Path
+from unittest.mock import Mock
+
+from book import BookBuilder, OpeningBook
+from enums import TeamColour
+from fen import INITIAL_FEN
+from game import Game
+from player import Player, RandomMovePlayer, SearchPlayer
+from tournament import play_game
+
+pgn_text = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Result "1/2-1/2"]
+
+1. e4 c5 2. Nf3 1/2-1/2
+
+[Result "0-1"]
+
+1. d4 d5 0-1
+"""
+
+
+def build_book(tmp_path: Path, builder: BookBuilder) -> OpeningBook:
+    file_name = str(tmp_path / "book.bin")
+    builder.write(file_name)
+    return OpeningBook(file_name)
+
+
+def book_moves(book: OpeningBook, game: Game) -> dict[str, int]:
+    return {move.name: weight for move, weight in book.moves(game)}
+
+
+def test_book_from_pgn_weighs_moves_by_results(tmp_path: Path):
+    builder = BookBuilder()
+    builder.add_pgn(io.StringIO(pgn_text))
+
+    with build_book(tmp_path, builder) as book:
+        game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+        assert book_moves(book, game) == {"E2 E4": 3}
+        assert [entry.games for entry in book.entries(game.key)] == [2]
+
+        move = book.choose(game)
+        game.make_move(move.from_tile, move.to_tile)
+        assert book_moves(book, game) == {"C7 C5": 1}
+        assert len(book) == 5
+
+
+def test_moves_are_weighed_for_their_colour_whatever_the_order_of_players(tmp_path: Path):
+    game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+    game.players.reverse()
+    game.current_turn = 1 - game.current_turn
+    game.make_move(game.board.get_tile_by_name("E2"), game.board.get_tile_by_name("E4"))
+    builder = BookBuilder()
+    builder.add_game(game, "1-0")
+
+    start = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+    with build_book(tmp_path, builder) as book:
+        assert book_moves(book, start) == {"E2 E4": 2}
+
+
+def test_tournament_games_fill_the_book(tmp_path: Path):
+    records = [play_game((RandomMovePlayer, RandomMovePlayer), seed, 10) for seed in range(5)]
+    builder = BookBuilder(max_plies=4)
+    builder.add_tournament_records(json.dumps(record) for record in records)
+
+    with build_book(tmp_path, builder) as book:
+        game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+        first_moves = {record["moves"][0] for record in records}
+        assert set(book_moves(book, game)) == first_moves
+        assert sum(entry.games for entry in book.entries(game.key)) == 5
+
+
+def test_weighted_choice_and_pickling(tmp_path: Path):
+    builder = BookBuilder()
+    builder.add_pgn(io.StringIO(pgn_text * 3))
+
+    with build_book(tmp_path, builder) as book:
+        copy = pickle.loads(pickle.dumps(book))  # noqa: S301
+        game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+        assert book_moves(copy, game) == book_moves(book, game)
+
+        chosen = {book.choose(game, random.Random(seed)).name for seed in range(20)}  # noqa: S311
+        assert chosen == {"E2 E4"}
+        copy.close()
+
+
+def test_search_player_plays_book_moves_before_searching(tmp_path: Path):
+    builder = BookBuilder()
+    builder.add_pgn(io.StringIO(pgn_text))
+
+    with build_book(tmp_path, builder) as book:
+        game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+        searcher = Mock()
+        player = SearchPlayer(TeamColour.WHITE, [], searcher=searcher, book=book)
+        assert player.take_turn(game) == ("E2", "E4")
+        searcher.search.assert_not_called()
+
+        game = Game.from_fen("4k3/8/8/8/8/8/8/3QK3 w - - 0 1", player_types=(Player, Player))
+        player.take_turn(game)
+        searcher.search.assert_called_once_with(game)
+
+
+def test_empty_book_has_no_moves(tmp_path: Path):
+    with build_book(tmp_path, BookBuilder()) as book:
+        assert len(book) == 0
+        assert book.choose(Game.from_fen(INITIAL_FEN, player_types=(Player, Player))) is None
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+import chess_api
+from chess_api import ChessApiClient
+from game import Game
+from player import ChessApiPlayer, Player
+
+initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Answers every position with E2 E4, after failing the first `failures` requests"""
+
+    failures: int
+    fens: list[str]
+    connections: int
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandInServer
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.fens.append(parse_qs(body.decode())["fen"][0])
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_response(503)
+            payload = b"{}"
+        else:
+            self.send_response(200)
+            payload = json.dumps({"from": "e2", "to": "e4"}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_: list[any]):
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[StandInServer]:
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    server.failures, server.fens, server.connections = 0, [], 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server: StandInServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_player_reuses_one_connection(server: StandInServer):
+    with ChessApiClient(url(server)) as client:
+        game = Game.from_fen(initial_position, player_types=(Player, Player))
+        player = ChessApiPlayer(game.players[0].team_colour, game.players[0].pieces, client=client)
+
+        assert player.take_turn(game) == ("E2", "E4")
+        assert player.take_turn(game) == ("E2", "E4")
+
+    assert server.fens == [initial_position, initial_position]
+    assert server.connections == 1
+
+
+def test_server_errors_are_retried(server: StandInServer, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(chess_api, "RETRY_BACKOFF", 0)
+    server.failures = 2
+    with ChessApiClient(url(server), retries=2) as client:
+        assert client.best_move(initial_position) == ("E2", "E4")
+
+    server.failures = 1
+    with ChessApiClient(url(server), retries=0) as client, pytest.raises(httpx.HTTPStatusError):
+        client.best_move(initial_position)
+
+
+def test_cached_moves_skip_the_network_across_clients(server: StandInServer, tmp_path: Path):
+    cache_file = str(tmp_path / "moves.tsv")
+    with ChessApiClient(url(server), cache_file=cache_file) as client:
+        client.best_move(initial_position)
+        client.best_move(initial_position.replace(" 0 1", " 4 9"))
+
+    with ChessApiClient(url(server), cache_file=cache_file) as client:
+        assert client.best_move(initial_position) == ("E2", "E4")
+
+    assert len(server.fens) == 1
+
+
+def test_concurrent_requests_keep_their_order(server: StandInServer):
+    fens = [initial_position.replace(" 0 1", f" 0 {n}") for n in range(1, 9)]
+    with ChessApiClient(url(server)) as client:
+        assert client.best_moves(fens) == [("E2", "E4")] * len(fens)
+
+    assert sorted(server.fens) == sorted(fens)
+
+
+def test_async_requests_work_from_one_event_loop_after_another(
+    server: StandInServer, monkeypatch: pytest.MonkeyPatch
+):
+    async_client_type = httpx.AsyncClient
+    pools = []
+
+    def open_pool(**options: dict[str, any]) -> httpx.AsyncClient:
+        pools.append(async_client_type(**options))
+        return pools[-1]
+
+    async def two_requests_in_one_pool(client: ChessApiClient) -> list[tuple[str, ...]]:
+        async with client:
+            return [await client.best_move_async(initial_position) for _ in range(2)]
+
+    monkeypatch.setattr(httpx, "AsyncClient", open_pool)
+    with ChessApiClient(url(server)) as client:
+        for _ in range(2):
+            assert asyncio.run(client.best_move_async(initial_position)) == ("E2", "E4")
+        assert asyncio.run(two_requests_in_one_pool(client)) == [("E2", "E4")] * 2
+
+    assert len(server.fens) == 4
+    assert len(pools) == 3
+    assert all(pool.is_closed for pool in pools)
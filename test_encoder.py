@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from encoder import (
+    BLACK_TO_MOVE_FEATURE,
+    CASTLING_FEATURES,
+    EN_PASSANT_FEATURES,
+    build_log_dataset,
+    encode_fens,
+    encode_games,
+    iter_chunks,
+)
+from fen import INITIAL_FEN
+from game import Game
+from player import Player
+
+fens = [
+    INITIAL_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3",
+    "8/8/8/8/8/8/8/K6k b - - 49 120",
+]
+
+
+def test_planes_and_features_of_the_initial_position():
+    planes, features = encode_fens([INITIAL_FEN])
+
+    assert planes.shape == (1, 12, 8, 8)
+    assert planes.dtype == bool
+    assert planes[0, 0, 1].all()
+    assert planes[0, 11, 7, 4]
+    assert planes[0, 3, 0, [0, 7]].all()
+    assert planes.sum() == 32
+    assert not features[0, BLACK_TO_MOVE_FEATURE]
+    assert features[0, CASTLING_FEATURES].all()
+    assert not features[0, EN_PASSANT_FEATURES].any()
+
+
+def test_fens_and_games_encode_the_same():
+    games = [Game.from_fen(fen, player_types=(Player, Player)) for fen in fens]
+    fen_planes, fen_features = encode_fens(fens)
+    game_planes, game_features = encode_games(games)
+
+    assert np.array_equal(fen_planes, game_planes)
+    assert np.array_equal(fen_features, game_features)
+    assert fen_features[2, EN_PASSANT_FEATURES].tolist() == [i == 3 for i in range(8)]
+    assert fen_features[2, CASTLING_FEATURES].tolist() == [True, False, False, True]
+    assert fen_features[3, BLACK_TO_MOVE_FEATURE]
+
+
+def test_side_to_move_does_not_depend_on_the_order_of_players():
+    game = Game.from_fen(fens[3], player_types=(Player, Player))
+    game.players.reverse()
+    game.current_turn = 1 - game.current_turn
+
+    assert np.array_equal(encode_games([game])[1], encode_fens([fens[3]])[1])
+
+
+def test_chunks_cover_the_stream():
+    chunks = list(iter_chunks(iter(fens * 5), chunk_size=6))
+
+    assert [len(planes) for planes, _ in chunks] == [6, 6, 6, 2]
+    assert np.array_equal(
+        np.concatenate([planes for planes, _ in chunks]), encode_fens(fens * 5)[0]
+    )
+
+
+def test_log_dataset_is_written_to_memory_maps(tmp_path: Path):
+    log_file_names = []
+    for i in range(3):
+        log_file = tmp_path / f"game{i}.txt"
+        log_file.write_text("\n".join(fens) + "\n")
+        log_file_names.append(str(log_file))
+
+    build_log_dataset(log_file_names, str(tmp_path / "dataset"), chunk_size=5)
+
+    planes = np.load(tmp_path / "dataset.planes.npy", mmap_mode="r")
+    features = np.load(tmp_path / "dataset.features.npy", mmap_mode="r")
+    expected_planes, expected_features = encode_fens(fens * 3)
+    assert np.array_equal(planes, expected_planes)
+    assert np.array_equal(features, expected_features)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "8/8/8/8/8/8/8/K6k w -",
+        "8/8/8/8/8/8/8/K6X w - - 0 1",
+        "8/8/8/8/8/8/K6k w - - 0 1",
+        "8p/7/8/8/8/8/8/K6k w - - 0 1",
+        "8/8/8/8/8/8/8/K6k/ w - - 0 1",
+        "4k4/8/8/8/8/8/8/4K2 w - - 0 1",
+        "8/8/8/8/8/8/8/K6k x - - 0 1",
+        "8/8/8/8/8/8/8/K6k w KX - 0 1",
+        "8/8/8/8/8/8/8/K6k w - i3 0 1",
+    ],
+)
+def test_invalid_fen_raises(fen: str):
+    with pytest.raises(ValueError, match="FEN"):
+        encode_fens([INITIAL_FEN, fen])
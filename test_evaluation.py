@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+from encoder import encode_fens, encode_games
+from evaluation import evaluate, evaluate_batch, evaluate_children
+from fen import INITIAL_FEN
+from game import Game
+from player import Player
+
+
+def new_game(fen: str) -> Game:
+    return Game.from_fen(fen, player_types=(Player, Player))
+
+
+def test_evaluate_is_from_side_to_move():
+    score = evaluate(new_game("4k3/8/8/8/8/8/8/3QK3 w - - 0 1"))
+
+    assert evaluate(new_game(INITIAL_FEN)) == 0
+    assert score > 800
+    assert evaluate(new_game("4k3/8/8/8/8/8/8/3QK3 b - - 0 1")) == -score
+
+
+def test_side_to_move_does_not_depend_on_the_order_of_players():
+    fen = "4k3/8/8/8/8/8/8/3QK3 b - - 0 1"
+    game = new_game(fen)
+    game.players.reverse()
+    game.current_turn = 1 - game.current_turn
+    moves = game.generate_legal_moves(game.players[game.current_turn])
+
+    assert evaluate(game) == evaluate(new_game(fen)) < -800
+    assert (evaluate_children(game, moves) < -800).all()
+
+
+@pytest.fixture(scope="module")
+def random_fens() -> list[str]:
+    rng = random.Random(7)  # noqa: S311
+    fens = []
+    for _ in range(10):
+        game = new_game(INITIAL_FEN)
+        for _ in range(80):
+            if not (moves := game.generate_legal_moves(game.players[game.current_turn])):
+                break
+            move = rng.choice(moves)
+            game.make_move(move.from_tile, move.to_tile, move.promotion)
+            fens.append(game.to_fen())
+    return fens
+
+
+def test_mirrored_positions_score_the_same_for_the_side_to_move():
+    assert evaluate(new_game(INITIAL_FEN)) == 0
+    white = evaluate(
+        new_game("r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQ1RK1 w kq - 0 1")
+    )
+    black = evaluate(
+        new_game("rnbq1rk1/pppp1ppp/5n2/2b1p3/2B1P3/2N2N2/PPPP1PPP/R1BQK2R b KQ - 0 1")
+    )
+    assert white == black
+
+
+def test_pieces_prefer_active_squares_and_a_sheltered_king():
+    centre_knight = evaluate(new_game("4k3/8/8/8/4N3/8/8/4K3 w - - 0 1"))
+    corner_knight = evaluate(new_game("4k3/8/8/8/8/8/8/N3K3 w - - 0 1"))
+    sheltered = evaluate(new_game("4k3/pppppppp/8/8/8/8/5PPP/6K1 w - - 0 1"))
+    exposed = evaluate(new_game("4k3/pppppppp/8/8/8/5PPP/8/6K1 w - - 0 1"))
+
+    assert centre_knight > corner_knight
+    assert sheltered > exposed
+
+
+def test_batch_scores_match_single_scores(random_fens: list[str]):
+    games = [new_game(fen) for fen in random_fens]
+    expected = [evaluate(game) for game in games]
+
+    assert evaluate_batch(*encode_fens(random_fens)).tolist() == expected
+    assert evaluate_batch(*encode_games(games)).tolist() == expected
+
+
+def test_children_are_scored_for_the_side_moving(random_fens: list[str]):
+    game = new_game(random_fens[41])
+    moves = game.generate_legal_moves(game.players[game.current_turn])
+    expected = []
+    for move in moves:
+        record = game.make_move(move.from_tile, move.to_tile, move.promotion)
+        expected.append(-evaluate(game))
+        game.unmake_move(record)
+
+    assert np.array_equal(evaluate_children(game, moves), expected)
+    assert game.to_fen() == random_fens[41]
@@ -0,0 +1,83 @@
+import pytest
+
+from fen import INITIAL_FEN, parse_fen
+from game import Game
+from player import Player
+
+
+def play(game: Game, *moves: str):
+    for move in moves:
+        from_tile_name, to_tile_name = move.split(" ")
+        game.make_move(
+            game.board.get_tile_by_name(from_tile_name), game.board.get_tile_by_name(to_tile_name)
+        )
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        INITIAL_FEN,
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3",
+        "8/8/8/8/8/8/8/K6k b - - 49 120",
+    ],
+)
+def test_fen_round_trips_all_fields(fen: str):
+    assert Game.from_fen(fen, player_types=(Player, Player)).to_fen() == fen
+
+
+def test_new_game_has_initial_fen():
+    assert Game(player_types=(Player, Player)).to_fen() == INITIAL_FEN
+
+
+def test_moves_update_and_unmake_restores_state_fields():
+    game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+    play(game, "E2 E4")
+    assert game.to_fen().endswith(" b KQkq e3 0 1")
+
+    play(game, "G8 F6", "E1 E2")
+    assert game.to_fen().endswith(" b kq - 2 2")
+
+    play(game, "H8 G8")
+    assert game.to_fen().endswith(" w q - 3 3")
+
+    for _ in range(4):
+        game.unmake_move()
+    assert game.to_fen() == INITIAL_FEN
+
+
+def test_capturing_a_rook_removes_its_castling_right():
+    game = Game.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 5 10", player_types=(Player, Player))
+    play(game, "A1 A8")
+    assert game.to_fen() == "R3k2r/8/8/8/8/8/8/4K2R b Kk - 0 10"
+
+
+def test_fen_without_clocks_is_accepted():
+    position = parse_fen("8/8/8/8/8/8/8/K6k w - -")
+    assert (position.halfmove_clock, position.full_turn_count) == (0, 1)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "8/8/8/8/8/8/8/K6k w - - 0",
+        "8/8/8/8/8/8/8/K6X w - - 0 1",
+        "8/8/8/8/8/8/K6k w - - 0 1",
+        "8p/7/8/8/8/8/8/K6k w - - 0 1",
+        "8/8/8/8/8/8/8/K6k/ w - - 0 1",
+        "4k4/8/8/8/8/8/8/4K2 w - - 0 1",
+        "8/8/8/8/8/8/8/K6k x - - 0 1",
+        "8/8/8/8/8/8/8/K6k w KX - 0 1",
+        "8/8/8/8/8/8/8/K6k w KK - 0 1",
+        "8/8/8/8/8/8/8/K6k w kK - 0 1",
+        "8/8/8/8/8/8/8/K6k w - i3 0 1",
+    ],
+)
+def test_invalid_fen_raises(fen: str):
+    with pytest.raises(ValueError, match="FEN"):
+        parse_fen(fen, cache=False)
+
+
+def test_parsed_positions_are_cached():
+    assert parse_fen(INITIAL_FEN) is parse_fen(INITIAL_FEN)
+    assert parse_fen(INITIAL_FEN, cache=False) is not parse_fen(INITIAL_FEN, cache=False)
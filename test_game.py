@@ -1,11 +1,15 @@
 from collections.abc import Callable
-from unittest.mock import Mock
+from pathlib import Path
+from unittest.mock import Mock, patch
 
 import pytest
 
+from enums import TeamColour
 from exceptions import InvalidMoveError
-from game import Game
+from game import Board, Game, GameLog
+from pieces import King, Rook
 from player import Player
+from renderer import Renderer
 
 initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
 
@@ -124,3 +128,226 @@ def test_check(game_factory: Callable[[str], Game]):
 
     assert game.is_check(white_player) is False
     assert game.is_checkmate(white_player) is False
+
+
+def test_make_unmake_move_restores_position(game_factory: Callable[[str], Game]):
+    game = game_factory(initial_position)
+    moves = [("E2", "E4"), ("D7", "D5"), ("E4", "D5")]
+    records = []
+    for from_tile_name, to_tile_name in moves:
+        from_tile = game.board.get_tile_by_name(from_tile_name)
+        to_tile = game.board.get_tile_by_name(to_tile_name)
+        records.append(game.make_move(from_tile, to_tile))
+
+    black_d_pawn = records[1].piece
+    assert black_d_pawn.is_alive is False
+    assert game.current_turn == 1
+    assert game.full_turn_count == 2
+
+    for record in reversed(records):
+        game.unmake_move(record)
+
+    assert game.to_fen() == initial_position
+    assert black_d_pawn.tile.name == "D7"
+    assert game.move_stack == []
+
+
+def test_resumes_from_log_written_through_its_open_handle(tmp_path: Path):
+    with GameLog(str(tmp_path / "game.txt")) as game_log:
+        game_log.read_block_size = 16
+        game = Game.from_log(game_log, player_types=(Player, Player))
+        for move in ("E2 E4", "E7 E5", "G1 F3"):
+            game.make_move(*map(game.board.get_tile_by_name, move.split(" ")))
+            game_log.append(game)
+
+        assert game_log.get_latest_fen() == game.to_fen()
+        resumed = Game.from_log(game_log, player_types=(Player, Player))
+        assert resumed.to_fen() == game.to_fen()
+        assert len(game_log) == 4
+
+
+def test_is_moving_into_check_does_not_change_game(game_factory: Callable[[str], Game]):
+    game = game_factory(endgame_position)
+    black_king_tile = game.board.get_tile_by_name("H8")
+    black_king = black_king_tile.piece
+
+    assert game.is_moving_into_check(black_king_tile, game.board.get_tile_by_name("G7")) is True
+    assert game.is_moving_into_check(black_king_tile, game.board.get_tile_by_name("G8")) is False
+    assert black_king.tile is black_king_tile
+    assert game.to_fen() == endgame_position
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        initial_position,
+        endgame_position,
+        "4k3/8/8/8/1b6/8/3P4/4K3 w - - 0 1",
+        "4k3/8/8/8/4r3/8/3N4/R3K2B w - - 0 1",
+        "4k3/8/8/1q6/8/5n2/3P4/4K3 w - - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1",
+    ],
+)
+def test_generate_legal_moves_matches_trial_moves(game_factory: Callable[[str], Game], fen: str):
+    game = game_factory(fen)
+    player = game.players[game.current_turn]
+    trial_moves = {
+        f"{piece.tile.name} {tile.name}"
+        for piece in player.pieces
+        if piece.is_alive
+        for tile in piece.get_view()
+        if not game.is_moving_into_check(piece.tile, tile)
+    }
+    legal_moves = [move.name for move in game.generate_legal_moves(player)]
+
+    assert sorted(legal_moves) == sorted(trial_moves)
+
+
+def test_pinned_piece_and_check_evasions(game_factory: Callable[[str], Game]):
+    game = game_factory("4k3/8/8/8/1b6/8/3P4/4K3 w - - 0 1")
+    legal_moves = {move.name for move in game.generate_legal_moves(game.players[0])}
+    assert "D2 D3" not in legal_moves
+
+    game = game_factory("4k3/8/8/8/4r3/8/3N4/R3K2B w - - 0 1")
+    legal_moves = {move.name for move in game.generate_legal_moves(game.players[0])}
+    assert legal_moves == {"E1 D1", "E1 F1", "E1 F2", "D2 E4", "H1 E4"}
+
+
+def test_headless_play_has_no_terminal_side_effects(
+    game_factory: Callable[[str], Game], capsys: pytest.CaptureFixture[str]
+):
+    game = game_factory(endgame_position)
+    game.players[0].take_turn = Mock(return_value=("A7", "G7"))
+
+    with patch("os.system") as system:
+        plies = list(game.play())
+
+    assert len(plies) == 1
+    system.assert_not_called()
+    assert capsys.readouterr().out == ""
+
+
+def test_renderer_receives_game_events(game_factory: Callable[[str], Game]):
+    game = game_factory("7k/8/6K1/8/8/1Q6/8/8 w - - 0 1")
+    game.players[0].take_turn = Mock(return_value=("B3", "F7"))
+    renderer = Mock(spec=Renderer)
+
+    list(game.play(renderer=renderer))
+
+    renderer.move_played.assert_called_once_with(game, game.players[0], "B3 F7")
+    renderer.stalemate.assert_called_once_with(game, game.players[1])
+    renderer.checkmate.assert_not_called()
+    renderer.game_over.assert_called_once_with(game)
+
+
+def test_get_tile_by_name_looks_up_every_square(game_factory: Callable[[str], Game]):
+    board = game_factory(initial_position).board
+
+    assert [board.get_tile_by_name(tile.name) for tile in board.squares] == board.squares
+    assert board.get_tile_by_name("E4") is board.get_tile(3, 4)
+    assert board.get_tile_by_name("I9") is None
+    assert board.get_tile_by_name("e4") is None
+
+
+def test_board_objects_are_slotted_and_king_is_cached(game_factory: Callable[[str], Game]):
+    game = game_factory(initial_position)
+    tile = game.board.get_tile_by_name("E1")
+
+    assert not hasattr(tile, "__dict__")
+    assert not hasattr(tile.piece, "__dict__")
+    assert game.players[0].king is tile.piece
+    assert (tile.row, tile.col, tile.name) == (4, 0, "E1")
+
+
+def test_castling_moves_the_rook_and_is_undone(game_factory: Callable[[str], Game]):
+    game = game_factory("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    game.players[0].take_turn = Mock(return_value=("E1", "G1"))
+    next(game.play())
+
+    assert game.to_fen() == "r3k2r/8/8/8/8/8/8/R4RK1 b kq - 1 1"
+    game.unmake_move()
+    assert game.to_fen() == "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+
+
+def test_cannot_castle_through_check(game_factory: Callable[[str], Game]):
+    game = game_factory("r3k2r/8/8/8/8/8/5r2/R3K2R w KQkq - 0 1")
+    legal_moves = {move.name for move in game.generate_legal_moves(game.players[0])}
+
+    assert "E1 G1" not in legal_moves
+    assert "E1 C1" in legal_moves
+
+
+def test_no_castling_without_the_king_on_its_square(game_factory: Callable[[str], Game]):
+    game = game_factory("r3k2r/8/8/8/8/8/8/R2K3R w KQkq - 0 1")
+    legal_moves = {move.name for move in game.generate_legal_moves(game.players[0])}
+
+    assert "E1 G1" not in legal_moves
+    assert "E1 C1" not in legal_moves
+
+
+def test_custom_board_has_only_the_castling_rights_its_pieces_allow():
+    board = Board()
+    white = [(King, "E1"), (Rook, "A2"), (Rook, "H1")]
+    black = [(King, "D8"), (Rook, "A8"), (Rook, "H8")]
+    players = [
+        Player(colour, [kind(board.get_tile_by_name(name), colour) for kind, name in pieces])
+        for colour, pieces in ((TeamColour.WHITE, white), (TeamColour.BLACK, black))
+    ]
+
+    assert Game(board, players).to_fen() == "r2k3r/8/8/8/8/8/R7/4K2R w K - 0 1"
+    assert Game(player_types=(Player, Player)).to_fen().split()[2] == "KQkq"
+
+
+def test_en_passant_capture(game_factory: Callable[[str], Game]):
+    game = game_factory("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2")
+    black_pawn = game.board.get_tile_by_name("D5").piece
+    game.players[0].take_turn = Mock(return_value=("E5", "D6"))
+    next(game.play())
+
+    assert black_pawn.is_alive is False
+    assert game.to_fen() == "4k3/8/3P4/8/8/8/8/4K3 b - - 0 2"
+    game.unmake_move()
+    assert black_pawn.tile.name == "D5"
+
+
+def test_promotion_to_chosen_piece(game_factory: Callable[[str], Game]):
+    game = game_factory("8/P6k/8/8/8/8/8/4K3 w - - 0 1")
+    game.players[0].take_turn = Mock(return_value=("A7", "A8", "N"))
+    next(game.play())
+
+    assert game.to_fen() == "N7/7k/8/8/8/8/8/4K3 b - - 0 1"
+    assert game.players[0].pieces[-1].type == "Knight"
+    game.unmake_move()
+    assert game.to_fen() == "8/P6k/8/8/8/8/8/4K3 w - - 0 1"
+    assert len(game.players[0].pieces) == 2
+
+
+def test_starting_fen_leaves_the_move_stack_alone(game_factory: Callable[[str], Game]):
+    start = "8/P6k/8/8/8/8/8/4K3 w - - 0 1"
+    game = game_factory(start)
+    record = game.make_move(*map(game.board.get_tile_by_name, ("A7", "A8")))
+    queen = game.board.get_tile_by_name("A8").piece
+
+    assert game.starting_fen() == start
+    assert game.move_stack == [record]
+    assert game.board.get_tile_by_name("A8").piece is queen
+    game.unmake_move(record)
+    assert game.to_fen() == start
+
+
+def test_threefold_repetition_ends_the_game(game_factory: Callable[[str], Game]):
+    game = game_factory("r3k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    shuffle = [("A1", "A2"), ("A8", "A7"), ("A2", "A1"), ("A7", "A8")] * 2
+    game.players[0].take_turn = Mock(side_effect=shuffle[0::2])
+    game.players[1].take_turn = Mock(side_effect=shuffle[1::2])
+    renderer = Mock(spec=Renderer)
+
+    assert len(list(game.play(renderer=renderer))) == 8
+    renderer.draw.assert_called_once_with(game, "threefold repetition")
+    assert game.repetitions() == 2
+
+
+def test_fifty_move_rule_and_insufficient_material(game_factory: Callable[[str], Game]):
+    assert game_factory("r3k3/8/8/8/8/8/8/R3K3 w - - 100 80").draw_reason() == "fifty-move rule"
+    assert game_factory("r3k3/8/8/8/8/8/8/R3K3 w - - 99 80").draw_reason() is None
+    assert game_factory("4k3/8/8/8/8/8/8/2B1K3 w - - 0 1").draw_reason() == "insufficient material"
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from enums import FlushPolicy
+from game import Game, GameLog
+from player import Player
+
+initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def play(game: Game, game_log: GameLog, *moves: str):
+    for move in moves:
+        from_tile_name, to_tile_name = move.split(" ")
+        game.make_move(
+            game.board.get_tile_by_name(from_tile_name), game.board.get_tile_by_name(to_tile_name)
+        )
+        game_log.append(game)
+
+
+def test_resume_from_latest_entry(tmp_path: Path):
+    file_name = str(tmp_path / "game.txt")
+    with GameLog(file_name) as game_log:
+        game = Game.from_log(game_log, player_types=(Player, Player))
+        play(game, game_log, "E2 E4", "E7 E5", "G1 F3")
+        expected = game.to_fen()
+
+    with GameLog(file_name) as game_log:
+        assert game_log.get_latest_fen() == expected
+        resumed = Game.from_log(game_log, player_types=(Player, Player))
+        assert resumed.to_fen() == expected
+        assert len(game_log) == 4
+
+
+def test_latest_entry_across_read_blocks(tmp_path: Path):
+    game_log = GameLog(str(tmp_path / "game.txt"), flush_policy=FlushPolicy.NONE)
+    game_log.read_block_size = 7
+    game = Game.from_log(game_log, player_types=(Player, Player))
+    play(game, game_log, "E2 E4", "E7 E5")
+
+    assert game_log.get_latest_fen() == game.to_fen()
+    game_log.close()
+
+
+def test_index_reads_any_ply(tmp_path: Path):
+    file_name = str(tmp_path / "game.txt")
+    with GameLog(file_name, index=True) as game_log:
+        game = Game.from_log(game_log, player_types=(Player, Player))
+        play(game, game_log, "E2 E4", "E7 E5")
+        fens = [game_log.get_fen(ply) for ply in range(3)]
+
+    assert fens[0] == initial_position
+    assert fens[1].startswith("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b")
+    with pytest.raises(IndexError):
+        GameLog(file_name, index=True).get_fen(3)
+
+
+def test_missing_or_stale_index_is_rebuilt(tmp_path: Path):
+    file_name = str(tmp_path / "game.txt")
+    with GameLog(file_name) as game_log:
+        game = Game.from_log(game_log, player_types=(Player, Player))
+        play(game, game_log, "E2 E4")
+
+    with GameLog(file_name, index=True) as game_log:
+        assert len(game_log) == 2
+        play(game, game_log, "E7 E5")
+        assert game_log.get_fen(2) == game.to_fen()
+
+    with GameLog(file_name) as game_log:
+        play(game, game_log, "G1 F3")
+    with GameLog(file_name, index=True) as game_log:
+        assert game_log.get_fen(3) == game.to_fen()
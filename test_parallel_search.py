@@ -0,0 +1,40 @@
+from game import Game
+from parallel_search import ParallelSearcher
+from player import Player
+from search import Searcher
+from transposition import MATE_SCORE
+
+middlegame_position = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w - - 0 1"
+
+
+def test_same_move_for_any_worker_count():
+    results = []
+    for workers in (1, 3):
+        game = Game.from_fen(middlegame_position, player_types=(Player, Player))
+        with ParallelSearcher(workers=workers, depth=2) as searcher:
+            results.append(searcher.search(game))
+
+    assert results[0].move.name == results[1].move.name
+    assert results[0].score == results[1].score
+    assert results[0].nodes == results[1].nodes
+
+
+def test_finds_mate_in_one():
+    game = Game.from_fen("7k/Q7/6K1/8/8/8/8/8 w - - 0 1", player_types=(Player, Player))
+    result = ParallelSearcher(workers=1, depth=2).search(game)
+
+    assert result.move.name == "A7 G7"
+    assert result.score == MATE_SCORE - 1
+
+
+def test_sees_repetitions_before_the_root():
+    game = Game.from_fen("k7/8/8/8/3q4/8/7K/8 w - - 0 1", player_types=(Player, Player))
+    for move in ("H2 H1", "D4 D5", "H1 H2", "D5 D4"):
+        game.make_move(*map(game.board.get_tile_by_name, move.split(" ")))
+    serial = Searcher(depth=2).search(game)
+
+    for workers in (1, 2):
+        with ParallelSearcher(workers=workers, depth=2) as searcher:
+            result = searcher.search(game)
+        assert result.move.name == serial.move.name == "H2 H1"
+        assert result.score == serial.score == 0
@@ -0,0 +1,33 @@
+import pytest
+
+from game import Game
+from perft import PERFT_POSITIONS, divide, perft
+from player import Player
+
+fast_cases = [
+    (name, fen, depth, nodes)
+    for name, fen, expected_nodes in PERFT_POSITIONS
+    for depth, nodes in expected_nodes.items()
+    if depth <= 3
+]
+
+
+@pytest.mark.parametrize(("name", "fen", "depth", "nodes"), fast_cases)
+def test_perft_node_counts(name: str, fen: str, depth: int, nodes: int):
+    game = Game.from_fen(fen, player_types=(Player, Player))
+    assert perft(game, depth) == nodes, name
+    assert game.to_fen() == fen
+
+
+def test_divide_sums_to_perft():
+    game = Game.from_fen(PERFT_POSITIONS[0][1], player_types=(Player, Player))
+    results = divide(game, 2)
+    assert len(results) == 20
+    assert results["G1 F3"] == 20
+    assert sum(results.values()) == 400
+
+
+def test_pawn_loaded_off_start_rank_cannot_advance_two():
+    game = Game.from_fen("4k3/8/8/8/8/P7/8/4K3 w - - 0 1", player_types=(Player, Player))
+    pawn = game.board.get_tile_by_name("A3").piece
+    assert [tile.name for tile in pawn.get_view()] == ["A4"]
@@ -0,0 +1,120 @@
+import io
+
+from game import Game
+from pgn import INITIAL_FEN, game_to_pgn, move_to_san, parse_san, read_games, write_games
+from player import Player, RandomMovePlayer
+from tournament import play_game
+
+sample_pgn = """[Event "Casual"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {a comment
+that spans lines} Nc6 (2... d6 3. d4) 3. Bc4 Nf6?! $6 4. Ng5 d5 5. exd5 Nxd5
+6. Nxf7 Kxf7 7. Qf3+ Ke6 8. Nc3 Nb4 9. Qe4 c6 10. a3 Na6 11. d4 Nac7 1-0
+
+[Event "Second"]
+[Result "1-0"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+"""
+
+
+def play(game: Game, *moves: str):
+    for move in moves:
+        game.make_move(*(game.board.get_tile_by_name(name) for name in move.split(" ")))
+
+
+def test_san_disambiguation_and_check_marks():
+    game = Game.from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1", player_types=(Player, Player))
+    move = parse_san(game, "Rad1")
+    assert move.name == "A1 D1"
+    assert move_to_san(game, move) == "Rad1"
+
+    game = Game.from_fen("7k/Q7/6K1/8/8/8/8/8 w - - 0 1", player_types=(Player, Player))
+    assert move_to_san(game, parse_san(game, "Qg7")) == "Qg7#"
+    assert move_to_san(game, parse_san(game, "Qa1")) == "Qa1+"
+
+
+def test_read_games_streams_each_game():
+    games = read_games(io.StringIO(sample_pgn))
+
+    first = next(games)
+    assert first.tags["White"] == "A"
+    assert first.result == "1-0"
+    assert len(first.game.move_stack) == 22
+    assert first.game.board.get_tile_by_name("C7").piece.symbol == "N"
+
+    second = next(games)
+    assert second.tags["Event"] == "Second"
+    assert second.result == "0-1"
+    assert second.game.is_checkmate(second.game.players[0]) is True
+    assert next(games, None) is None
+
+
+def test_bad_move_skips_to_the_next_game():
+    bad_game = """[Event "Corrupt"]
+
+1. e4 e5 2. Qh5 Kf5?? 3. Qxe5# {never reached} 1-0
+
+"""
+    games = read_games(io.StringIO(bad_game + sample_pgn))
+
+    corrupt = next(games)
+    assert corrupt.tags["Event"] == "Corrupt"
+    assert corrupt.error == "Kf5?? does not match exactly one legal move"
+    assert corrupt.result == "*"
+    assert len(corrupt.game.move_stack) == 3
+    assert [(game.tags["Event"], game.error) for game in games] == [
+        ("Casual", None),
+        ("Second", None),
+    ]
+
+
+def test_write_then_read_round_trip():
+    game = Game.from_fen(INITIAL_FEN, player_types=(Player, Player))
+    play(game, "E2 E4", "D7 D5", "E4 D5", "D8 D5", "B1 C3")
+    fen = game.to_fen()
+
+    records = list(game.move_stack)
+
+    out = io.StringIO()
+    write_games(out, [(game, {"White": "me"}, "*")])
+    text = out.getvalue()
+    assert "1. e4 d5 2. exd5 Qxd5 3. Nc3 *" in text
+    assert game.to_fen() == fen
+    assert all(a is b for a, b in zip(game.move_stack, records, strict=True))
+
+    (read,) = read_games(io.StringIO(text))
+    assert read.tags["White"] == "me"
+    assert read.game.to_fen() == fen
+
+
+def test_export_from_custom_position_records_fen():
+    start = "7k/Q7/6K1/8/8/8/8/8 b - - 0 1"
+    game = Game.from_fen(start, player_types=(Player, Player))
+    play(game, "H8 G8")
+
+    text = game_to_pgn(game)
+    assert f'[FEN "{start}"]' in text
+    assert "1... Kg8 *" in text
+
+
+def test_tournament_games_round_trip_through_pgn():
+    record = play_game((RandomMovePlayer, RandomMovePlayer), seed=3, max_plies=30, with_pgn=True)
+
+    (parsed,) = read_games(io.StringIO(record["pgn"]))
+
+    assert len(parsed.game.move_stack) == record["plies"]
+    assert parsed.game.to_fen() == record["fens"][-1]
+
+
+def test_castling_promotion_and_en_passant_san():
+    game = Game.from_fen("r3k3/6P1/8/3pP3/8/8/8/4K2R w Kq d6 0 1", player_types=(Player, Player))
+    for san in ["exd6", "O-O-O", "g8=N", "Rxd6", "O-O"]:
+        move = parse_san(game, san)
+        assert move_to_san(game, move).rstrip("+") == san
+        game.make_move(move.from_tile, move.to_tile, move.promotion)
+
+    assert game.to_fen() == "2k3N1/8/3r4/8/8/8/8/5RK1 b - - 1 3"
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+
+from fen import INITIAL_FEN, parse_fen
+from game import Game, GameLog
+from player import Player
+from position_index import Occurrence, PositionIndex, position_key
+
+
+def play_log(file_name: str, *moves: str) -> Game:
+    with GameLog(file_name) as game_log:
+        game = Game.from_log(game_log, player_types=(Player, Player))
+        for move in moves:
+            from_tile_name, to_tile_name = move.split(" ")
+            game.make_move(
+                game.board.get_tile_by_name(from_tile_name),
+                game.board.get_tile_by_name(to_tile_name),
+            )
+            game_log.append(game)
+    return game
+
+
+def plies(occurrences: list[Occurrence]) -> list[tuple[str, int]]:
+    return [(Path(occurrence.file_name).name, occurrence.ply) for occurrence in occurrences]
+
+
+def places(occurrences: list[Occurrence]) -> list[tuple[int, int, int]]:
+    return [(occurrence.game_id, occurrence.ply, occurrence.line) for occurrence in occurrences]
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        INITIAL_FEN,
+        "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3",
+        "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+        "7k/Q7/6K1/8/8/8/8/8 w - - 0 1",
+    ],
+)
+def test_position_key_matches_game_key(fen: str):
+    assert position_key(parse_fen(fen)) == Game.from_fen(fen, (Player, Player)).key
+
+
+def test_finds_transposed_positions_across_logs(tmp_path: Path):
+    first = play_log(str(tmp_path / "first.log"), "G1 F3", "G8 F6", "B1 C3")
+    play_log(str(tmp_path / "second.log"), "B1 C3", "G8 F6", "G1 F3", "B8 C6")
+    file_names = [str(tmp_path / "first.log"), str(tmp_path / "second.log")]
+
+    with PositionIndex(str(tmp_path / "index.sqlite")) as index:
+        assert index.update(file_names, workers=2) == 9
+        assert plies(index.find_fen(INITIAL_FEN)) == [("first.log", 0), ("second.log", 0)]
+        assert plies(index.find_game(first)) == [("first.log", 3), ("second.log", 3)]
+        assert plies(index.find_material("KQRRBBNPPPPPPPPvKQRRBBNNPPPPPPPP")) == []
+        assert len(index.find_material("KQRRBBNNPPPPPPPPvKQRRBBNNPPPPPPPP")) == 9
+        assert {occurrence.game_id for occurrence in index.find_key(first.key)} == {1, 2}
+
+
+def test_update_indexes_only_new_lines(tmp_path: Path):
+    file_name = str(tmp_path / "game.log")
+    play_log(file_name, "E2 E4")
+    with PositionIndex(str(tmp_path / "index.sqlite")) as index:
+        assert index.update([file_name]) == 2
+        assert index.update([file_name]) == 0
+
+        # A line still being written is left until it is complete
+        with Path(file_name).open("a") as file:
+            file.write("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w")
+        assert index.update([file_name]) == 0
+        with Path(file_name).open("a") as file:
+            file.write(" KQkq e6 0 2\n")
+        assert index.update([file_name]) == 1
+        assert plies(
+            index.find_fen("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+        ) == [("game.log", 2)]
+
+        # A log written again from the start replaces what was indexed of it
+        Path(file_name).write_text(f"{INITIAL_FEN}\n")
+        assert index.update([file_name]) == 1
+        assert len(index) == 1
+
+    with PositionIndex(str(tmp_path / "index.sqlite")) as index:
+        assert plies(index.find_fen(INITIAL_FEN)) == [("game.log", 0)]
+
+
+def test_games_one_after_another_in_a_log_are_told_apart(tmp_path: Path):
+    first = Path(tmp_path / "first.log")
+    second = Path(tmp_path / "second.log")
+    play_log(str(first), "E2 E4", "E7 E5")
+    last = play_log(str(second), "D2 D4")
+    file_name = str(tmp_path / "games.log")
+
+    with PositionIndex(str(tmp_path / "index.sqlite")) as index:
+        Path(file_name).write_text(first.read_text())
+        assert index.update([file_name]) == 3
+        with Path(file_name).open("a") as file:
+            file.write(second.read_text())
+        assert index.update([file_name]) == 2
+
+        assert places(index.find_fen(INITIAL_FEN)) == [(1, 0, 0), (2, 0, 3)]
+        assert places(index.find_game(last)) == [(2, 1, 4)]
@@ -0,0 +1,70 @@
+from collections.abc import Callable
+from functools import partial
+
+import pytest
+
+from evaluation import evaluate
+from game import Game
+from player import Player, SearchPlayer
+from search import Searcher
+from transposition import MATE_SCORE
+
+initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+
+@pytest.fixture
+def game_factory() -> Callable[[str], Game]:
+    def factory(fen: str) -> Game:
+        return Game.from_fen(fen, player_types=(Player, Player))
+
+    return factory
+
+
+def test_finds_mate_in_one(game_factory: Callable[[str], Game]):
+    game = game_factory("7k/Q7/6K1/8/8/8/8/8 w - - 0 1")
+    result = Searcher(depth=2).search(game)
+
+    assert result.move.name == "A7 G7"
+    assert result.score == MATE_SCORE - 1
+    assert game.to_fen() == "7k/Q7/6K1/8/8/8/8/8 w - - 0 1"
+
+
+def test_wins_hanging_queen(game_factory: Callable[[str], Game]):
+    game = game_factory("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+    assert Searcher(depth=1).search(game).move.name == "D2 D5"
+
+
+@pytest.mark.parametrize(
+    "fen", ["4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2", "4k3/P7/8/8/8/8/8/4K3 w - - 0 1"]
+)
+def test_quiescence_searches_en_passant_and_promotion(
+    game_factory: Callable[[str], Game], fen: str
+):
+    game = game_factory(fen)
+    score = Searcher()._quiescence(game, -MATE_SCORE, MATE_SCORE, 0)  # noqa: SLF001
+    assert score > evaluate(game) + 100
+
+
+def test_search_is_deterministic_and_respects_node_limit(game_factory: Callable[[str], Game]):
+    results = [
+        Searcher(depth=3, node_limit=500).search(game_factory(initial_position)) for _ in range(2)
+    ]
+
+    assert results[0].move.name == results[1].move.name
+    assert results[0].nodes <= 501
+
+
+def test_table_is_kept_for_the_next_search(game_factory: Callable[[str], Game]):
+    searcher = Searcher(depth=3)
+    first = searcher.search(game_factory(initial_position))
+    second = searcher.search(game_factory(initial_position))
+
+    assert second.move.name == first.move.name
+    assert second.nodes < first.nodes
+
+
+def test_search_player_takes_turn():
+    game = Game.from_fen(
+        "7k/Q7/6K1/8/8/8/8/8 w - - 0 1", player_types=(partial(SearchPlayer, depth=2), Player)
+    )
+    assert game.players[0].take_turn(game, "") == ("A7", "G7")
@@ -0,0 +1,136 @@
+import asyncio
+
+from fen import INITIAL_FEN
+from game import Game
+from player import Player, RandomMovePlayer
+from server import GameServer, serve
+
+random_players = (RandomMovePlayer, RandomMovePlayer)
+
+
+class SlowPlayer(RandomMovePlayer):
+    """Waits on something outside the process before every move"""
+
+    async def take_turn_async(self, game: Game, message: str = "") -> tuple[str, ...]:
+        await asyncio.sleep(0.001)
+        return self.take_turn(game, message)
+
+
+def test_many_games_are_hosted_concurrently_within_the_limit():
+    async def host() -> tuple[GameServer, int]:
+        server = GameServer(max_games=20, max_plies=40)
+        most_playing = 0
+        for _ in range(100):
+            await server.add_game(Game(player_types=(SlowPlayer, SlowPlayer)))
+            playing = sum(s.status in {"waiting", "playing"} for s in server.snapshots())
+            most_playing = max(most_playing, playing)
+        await server.join()
+        return server, most_playing
+
+    server, most_playing = asyncio.run(host())
+
+    assert most_playing <= 20
+    snapshots = server.snapshots()
+    assert len(snapshots) == 100
+    assert all(snapshot.status == "finished" for snapshot in snapshots)
+    assert all(0 < snapshot.plies <= 40 for snapshot in snapshots)
+
+
+def test_snapshots_follow_a_game_in_progress():
+    async def host() -> list[int]:
+        server = GameServer(max_plies=10)
+        game_id = await server.add_game(Game(player_types=random_players))
+        plies = []
+        while server.snapshot(game_id).status != "finished":
+            plies.append(server.snapshot(game_id).plies)
+            await asyncio.sleep(0)
+        final = await server.wait(game_id)
+        return [*plies, final.plies]
+
+    plies = asyncio.run(host())
+    assert plies == sorted(plies)
+    assert plies[-1] == 10
+
+
+def test_client_plays_a_game_over_a_socket():
+    async def client(port: int) -> tuple[int, str]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        moves = 0
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if "|" not in line:
+                break
+            _, fen = line.split("|")
+            game = Game.from_fen(fen, player_types=random_players)
+            move = game.players[game.current_turn].take_turn(game)
+            writer.write(f"{' '.join(move)}\n".encode())
+            await writer.drain()
+            moves += 1
+        writer.close()
+        return moves, line
+
+    async def host() -> tuple[int, str]:
+        game_server = GameServer(max_plies=30)
+        socket_server = await serve(game_server, port=0, opponent_type=RandomMovePlayer)
+        port = socket_server.sockets[0].getsockname()[1]
+        async with socket_server:
+            return await client(port)
+
+    moves, result = asyncio.run(host())
+    assert moves == 15
+    assert result == "* None"
+
+
+def test_players_without_async_turns_fall_back_to_take_turn():
+    game = Game.from_fen(INITIAL_FEN, player_types=(RandomMovePlayer, Player))
+    move = asyncio.run(game.players[0].take_turn_async(game))
+    assert len(move) == 2
+
+
+class BrokenPlayer(RandomMovePlayer):
+    async def take_turn_async(self, *_: list[any]) -> tuple[str, ...]:
+        raise RuntimeError("Player failed")
+
+
+def test_finished_games_keep_only_their_snapshot():
+    async def host() -> tuple[GameServer, str]:
+        server = GameServer(max_plies=10, max_finished=3)
+        game_id = await server.add_game(Game(player_types=(BrokenPlayer, RandomMovePlayer)))
+        status = (await server.wait(game_id)).status
+        for _ in range(5):
+            await server.add_game(Game(player_types=random_players))
+        await server.join()
+        return server, status
+
+    server, status = asyncio.run(host())
+    assert status == "errored"
+    assert server.games == {}
+    assert list(server.finished) == [3, 4, 5]
+    assert [snapshot.plies for snapshot in server.snapshots()] == [10] * 3
+
+
+def test_client_is_asked_again_after_a_malformed_line():
+    async def client(port: int) -> list[str]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        messages = []
+        for line in (b"hello\n", b"\n", b"E2 E4 Q X\n", b"E2 E4\n"):
+            messages.append((await reader.readline()).decode().split("|")[0])
+            writer.write(line)
+            await writer.drain()
+        messages.append((await reader.readline()).decode().split("|")[0])
+        writer.close()
+        return messages
+
+    async def host() -> tuple[list[str], str]:
+        game_server = GameServer(max_plies=2)
+        socket_server = await serve(game_server, port=0, opponent_type=RandomMovePlayer)
+        port = socket_server.sockets[0].getsockname()[1]
+        async with socket_server:
+            messages = await client(port)
+            await game_server.join()
+        return messages, game_server.snapshot(0).status
+
+    messages, status = asyncio.run(host())
+    assert messages[1:4] == ["Send a move such as E2 E4, or A7 A8 N to promote"] * 3
+    assert not messages[4].startswith("Send")
+    assert status == "finished"
@@ -0,0 +1,86 @@
+import pickle
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from game import Game
+from player import Player
+from search import MATE_BOUND, Searcher
+from tablebase import Material, Tablebase, decode_value, generate_tables
+
+endgame_position = "7k/Q7/6K1/8/8/8/8/8 w - - 0 1"
+
+
+@pytest.fixture(scope="module")
+def directory(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    directory = tmp_path_factory.mktemp("tablebases")
+    assert generate_tables(str(directory), ["KQvK"]) == [str(directory / "KQvK.tb")]
+    return directory
+
+
+@pytest.fixture
+def tablebase(directory: Path):
+    with Tablebase(str(directory)) as tablebase:
+        yield tablebase
+
+
+def game_from_fen(fen: str, tablebase: Tablebase | None = None) -> Game:
+    game = Game.from_fen(fen, player_types=(Player, Player))
+    game.tablebase = tablebase
+    return game
+
+
+def test_longest_mate_matches_known_length(directory: Path):
+    size = Material.from_name("KQvK").size()
+    values = [decode_value(value) for value in (directory / "KQvK.tb").read_bytes()[-size:]]
+    # Mate in 10 moves at most, so black is lost in 20 plies and white wins in 19
+    assert max(plies for wdl, plies in values if wdl > 0) == 19
+    assert max(plies for wdl, plies in values if wdl < 0) == 20
+    # Tables already generated are kept
+    assert generate_tables(str(directory), ["KQvK"]) == []
+
+
+def test_probe_reads_position_and_its_colour_flip(tablebase: Tablebase):
+    assert tablebase.probe(game_from_fen(endgame_position)) == (1, 1)
+    assert tablebase.probe(game_from_fen("8/8/8/8/8/6k1/q7/7K b - - 0 1")) == (1, 1)
+    assert tablebase.probe(game_from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1")) == (-1, 0)
+    assert tablebase.probe(game_from_fen("k7/2Q5/8/8/8/8/8/7K b - - 0 1")) == (0, 0)
+    assert tablebase.probe_wdl(game_from_fen("8/8/8/8/8/8/8/K6k w - - 0 1")) == 0
+    # Tables that were not generated and positions with too many pieces are not known
+    assert tablebase.probe(game_from_fen("7k/R7/6K1/8/8/8/8/8 w - - 0 1")) is None
+    assert tablebase.probe(game_from_fen("7k/Q7/6K1/8/8/8/P7/8 w - - 0 1")) is None
+
+
+def test_probe_reads_the_side_to_move_whatever_the_order_of_players(tablebase: Tablebase):
+    game = game_from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1")
+    game.players.reverse()
+    game.current_turn = 1 - game.current_turn
+    assert tablebase.probe(game) == (-1, 0)
+
+
+def test_checkmate_is_answered_by_the_tablebase(tablebase: Tablebase):
+    game = game_from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", tablebase)
+    game.generate_legal_moves = Mock()
+    assert game.is_checkmate(game.players[1])
+    game.generate_legal_moves.assert_not_called()
+
+    # Drawn positions, stalemate among them, still have their moves generated
+    game = game_from_fen("k7/2Q5/8/8/8/8/8/7K b - - 0 1", tablebase)
+    assert game.is_stalemate(game.players[1])
+
+
+def test_search_plays_tablebase_mate(tablebase: Tablebase):
+    game = game_from_fen("8/8/8/4k3/8/8/8/K6Q w - - 0 1", tablebase)
+    expected_plies = tablebase.probe(game)[1]
+    result = Searcher(depth=1, tablebase=tablebase).search(game)
+    assert result.score > MATE_BOUND
+
+    game.make_move(result.move.from_tile, result.move.to_tile)
+    assert tablebase.probe(game) == (-1, expected_plies - 1)
+
+
+def test_tablebase_pickles_by_directory(tablebase: Tablebase):
+    copy = pickle.loads(pickle.dumps(tablebase))  # noqa: S301
+    assert copy.probe(game_from_fen(endgame_position)) == (1, 1)
+    copy.close()
@@ -0,0 +1,25 @@
+from player import RandomMovePlayer
+from tournament import play_game, run_tournament
+
+random_players = (RandomMovePlayer, RandomMovePlayer)
+
+
+def without_timings(record: dict[str, any]) -> dict[str, any]:
+    return {key: value for key, value in record.items() if key != "move_times"}
+
+
+def test_games_are_reproducible_from_their_seed():
+    first = play_game(random_players, seed=7, max_plies=40)
+    second = play_game(random_players, seed=7, max_plies=40)
+
+    assert without_timings(first) == without_timings(second)
+    assert first["plies"] == len(first["moves"]) == len(first["move_times"])
+    assert len(first["fens"]) == first["plies"] + 1
+
+
+def test_results_do_not_depend_on_worker_count():
+    serial = list(run_tournament(random_players, games=3, seed=1, workers=1, max_plies=30))
+    parallel = list(run_tournament(random_players, games=3, seed=1, workers=2, max_plies=30))
+
+    assert [without_timings(r) for r in serial] == [without_timings(r) for r in parallel]
+    assert [r["seed"] for r in serial] == [1, 2, 3]
@@ -0,0 +1,63 @@
+from game import Game
+from player import Player
+from transposition import EXACT, LOWER_BOUND, MATE_SCORE, TERMINAL_DEPTH, TranspositionTable
+
+
+def test_store_and_probe_round_trip():
+    table = TranspositionTable(size_mb=0.01)
+    table.store(0xDEADBEEF, depth=5, score=-123, bound=LOWER_BOUND, move=0x1234)
+
+    entry = table.probe(0xDEADBEEF)
+    assert (entry.depth, entry.score, entry.bound, entry.move) == (5, -123, LOWER_BOUND, 0x1234)
+    assert table.probe(0xFEED) is None
+    assert (table.hits, table.misses) == (1, 1)
+
+
+def test_size_is_fixed_by_memory_budget():
+    table = TranspositionTable(size_mb=1)
+    assert len(table) == 1024 * 1024 // 16
+    assert table.size_mb == 1
+
+
+def test_deep_entries_survive_shallow_stores_in_the_same_bucket():
+    table = TranspositionTable(size_mb=0.0001)
+    buckets = len(table) // 2
+    deep, shallow, newer = 1, 1 + buckets, 1 + 2 * buckets
+
+    table.store(deep, depth=8, score=1, bound=EXACT)
+    table.store(shallow, depth=1, score=2, bound=EXACT)
+    table.store(newer, depth=2, score=3, bound=EXACT)
+
+    assert table.probe(deep).score == 1
+    assert table.probe(shallow) is None
+    assert table.probe(newer).score == 3
+    assert table.overwrites == 1
+
+
+def test_checkmate_detection_reuses_table():
+    game = Game.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", player_types=(Player, Player))
+    game.transposition_table = TranspositionTable(size_mb=0.01)
+    black_player = game.players[1]
+
+    assert game.is_checkmate(black_player) is True
+    entry = game.transposition_table.probe(game.key)
+    assert (entry.depth, entry.score) == (TERMINAL_DEPTH, -MATE_SCORE)
+
+    game.generate_legal_moves = None
+    assert game.is_checkmate(black_player) is True
+
+
+def test_entries_outlive_a_search_until_newer_ones_need_the_slot():
+    table = TranspositionTable(size_mb=0.0001)
+    buckets = len(table) // 2
+    deep, newer = 1, 1 + buckets
+
+    table.store(deep, depth=8, score=1, bound=EXACT)
+    table.new_search()
+    assert table.probe(deep).score == 1
+    assert table.probe(deep).age == 0
+
+    table.store(newer, depth=1, score=2, bound=EXACT)
+    table.store(newer + buckets, depth=0, score=3, bound=EXACT)
+    assert table.probe(deep) is None
+    assert table.probe(newer).age == table.age == 1
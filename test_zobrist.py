@@ -0,0 +1,42 @@
+from game import Game
+from player import Player
+
+initial_position = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+
+def play(game: Game, *moves: str):
+    for move in moves:
+        from_tile_name, to_tile_name = move.split(" ")
+        game.make_move(
+            game.board.get_tile_by_name(from_tile_name), game.board.get_tile_by_name(to_tile_name)
+        )
+
+
+def test_incremental_key_matches_key_of_same_position_loaded_from_fen():
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    play(game, "E2 E4", "D7 D5", "E4 D5")
+
+    loaded = Game.from_fen(game.to_fen(), player_types=(Player, Player))
+    assert game.key == loaded.key
+
+
+def test_transpositions_share_a_key_and_side_to_move_is_hashed():
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    other = Game.from_fen(initial_position, player_types=(Player, Player))
+    play(game, "G1 F3", "G8 F6", "B1 C3")
+    play(other, "B1 C3", "G8 F6", "G1 F3")
+    assert game.key == other.key
+
+    black_to_move = Game.from_fen(
+        initial_position.replace(" w ", " b "), player_types=(Player, Player)
+    )
+    assert black_to_move.key != Game.from_fen(initial_position, player_types=(Player, Player)).key
+
+
+def test_unmake_move_restores_key():
+    game = Game.from_fen(initial_position, player_types=(Player, Player))
+    key = game.key
+    play(game, "E2 E4", "D7 D5", "E4 D5")
+    for _ in range(3):
+        game.unmake_move()
+    assert game.key == key
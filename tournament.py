@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import player as players
+from book import OpeningBook
+from enums import TeamColour
+from game import Game
+from pgn import game_to_pgn
+from renderer import Renderer
+from tablebase import Tablebase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from player import Player
+
+"""
+    The fifty-move rule and repetition draws end every game eventually, but that can take
+    thousands of plies, so games are stopped and scored as unfinished after this many.
+"""
+DEFAULT_MAX_PLIES = 1000
+
+
+class GameRecorder(Renderer):
+    """Collects the moves, positions and timings of a headless game as it is played"""
+
+    moves: list[str]
+    fens: list[str]
+    move_times: list[float]
+    result: str
+    termination: str
+    turn_started: float
+
+    def __init__(self, game: Game):
+        self.moves = []
+        self.fens = [game.to_fen()]
+        self.move_times = []
+        self.result = "*"
+        self.termination = "max plies"
+        self.turn_started = 0.0
+
+    def start_turn(self, *_: list[any]):
+        self.turn_started = time.perf_counter()
+
+    def move_played(self, game: Game, _: Player, move: str):
+        self.move_times.append(round(time.perf_counter() - self.turn_started, 6))
+        self.moves.append(move)
+        self.fens.append(game.to_fen())
+
+    def checkmate(self, _: Game, player: Player):
+        self.result = "0-1" if player.team_colour == TeamColour.WHITE else "1-0"
+        self.termination = "checkmate"
+
+    def stalemate(self, *_: list[any]):
+        self.result = "1/2-1/2"
+        self.termination = "stalemate"
+
+    def draw(self, _: Game, reason: str):
+        self.result = "1/2-1/2"
+        self.termination = reason
+
+
+def play_game(
+    player_types: tuple[type[Player], type[Player]],
+    seed: int,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    *,
+    with_pgn: bool = False,
+) -> dict[str, any]:
+    """
+    Play one headless game and return its record, with the game as PGN text if asked.
+    The random number generator is seeded per game, so a game can be replayed from its seed.
+    """
+    random.seed(seed)
+    game = Game(player_types=player_types)
+    recorder = GameRecorder(game)
+    for ply, _ in enumerate(game.play(renderer=recorder), start=1):
+        if ply >= max_plies:
+            break
+
+    record = {
+        "seed": seed,
+        "result": recorder.result,
+        "termination": recorder.termination,
+        "plies": len(recorder.moves),
+        "moves": recorder.moves,
+        "fens": recorder.fens,
+        "move_times": recorder.move_times,
+    }
+    if with_pgn:
+        record["pgn"] = game_to_pgn(game, {"Round": str(seed)}, recorder.result)
+    return record
+
+
+def run_tournament(  # noqa: PLR0913
+    player_types: tuple[type[Player], type[Player]],
+    games: int,
+    seed: int = 0,
+    workers: int = 1,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    *,
+    with_pgn: bool = False,
+) -> Iterator[dict[str, any]]:
+    """Yield game records in order as the games finish, playing them across `workers`"""
+    seeds = [seed + index for index in range(games)]
+    play = partial(play_game, player_types, max_plies=max_plies, with_pgn=with_pgn)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(play, seeds)
+    else:
+        yield from map(play, seeds)
+
+
+def _player_type(
+    name: str, search_depth: int, book: OpeningBook | None, tablebase: Tablebase | None
+) -> type[Player]:
+    player_type = getattr(players, name)
+    if player_type is players.SearchPlayer:
+        return partial(players.SearchPlayer, depth=search_depth, book=book, tablebase=tablebase)
+    if player_type is players.ChessApiPlayer:
+        return partial(players.ChessApiPlayer, book=book)
+    return player_type
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a batch of headless games")
+    parser.add_argument("games", type=int)
+    parser.add_argument("--white", default="RandomMovePlayer", help="player class name")
+    parser.add_argument("--black", default="RandomMovePlayer", help="player class name")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--search-depth", type=int, default=2)
+    parser.add_argument("--output", default="tournament.jsonl", help="JSON lines result file")
+    parser.add_argument("--pgn", help="also write the games to this PGN file")
+    parser.add_argument("--book", help="opening book for the search and API players")
+    parser.add_argument("--tablebases", help="endgame tablebase directory for search players")
+    args = parser.parse_args()
+
+    book = OpeningBook(args.book) if args.book else None
+    tablebase = Tablebase(args.tablebases) if args.tablebases else None
+    player_types = (
+        _player_type(args.white, args.search_depth, book, tablebase),
+        _player_type(args.black, args.search_depth, book, tablebase),
+    )
+    scores = {"1-0": 0, "0-1": 0, "1/2-1/2": 0, "*": 0}
+    start = time.perf_counter()
+    records = run_tournament(
+        player_types,
+        args.games,
+        args.seed,
+        args.workers,
+        args.max_plies,
+        with_pgn=args.pgn is not None,
+    )
+    with (
+        Path(args.output).open("w") as output,
+        Path(args.pgn or os.devnull).open("w") as pgn_output,
+    ):
+        for index, record in enumerate(records):
+            if pgn_text := record.pop("pgn", None):
+                pgn_output.write(f"{pgn_text}\n")
+            header = {"game": index, "white": args.white, "black": args.black}
+            output.write(json.dumps({**header, **record}) + "\n")
+            output.flush()
+            scores[record["result"]] += 1
+    elapsed = time.perf_counter() - start
+
+    print(", ".join(f"{result}: {count}" for result, count in scores.items()))
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.2f} games/s)")
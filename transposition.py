@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from array import array
+
+"""
+    Bound types, telling whether a stored score is exact or only a bound on the real score.
+"""
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+MATE_SCORE = 30000
+"""
+    Depth stored for positions with no legal moves, whose score never changes with depth.
+"""
+TERMINAL_DEPTH = 0xFF
+
+"""
+    Searches are numbered modulo AGE_COUNT, and each entry keeps the number of the search
+    that stored it in its top bits.
+"""
+AGE_COUNT = 32
+
+_ENTRY_BYTES = 16
+_SCORE_OFFSET = 1 << 31
+_OCCUPIED = 1 << 58
+_AGE_SHIFT = 59
+
+
+def _pack(depth: int, score: int, bound: int, move: int, age: int) -> int:
+    return (
+        age << _AGE_SHIFT
+        | _OCCUPIED
+        | bound << 56
+        | depth << 48
+        | (score + _SCORE_OFFSET) << 16
+        | move
+    )
+
+
+class TranspositionEntry:
+    key: int
+    depth: int
+    score: int
+    bound: int
+    move: int
+    age: int
+
+    def __init__(self, key: int, data: int):
+        self.key = key
+        self.move = data & 0xFFFF
+        self.score = ((data >> 16) & 0xFFFFFFFF) - _SCORE_OFFSET
+        self.depth = (data >> 48) & 0xFF
+        self.bound = (data >> 56) & 0b11
+        self.age = data >> _AGE_SHIFT
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of search results keyed by Zobrist hash. Entries are packed into
+    two preallocated arrays of 64-bit integers, one for keys and one for the data, so the
+    memory used never grows past the configured size.
+
+    Slots are paired into buckets: the first slot keeps the deepest result seen for the
+    bucket, the second always takes the latest one, so shallow results never push out
+    expensive deep ones but recent positions still get stored.
+
+    The table is kept from one search to the next. `new_search` starts a new age, and a
+    deep entry left by an earlier search gives way to any result of the current one, so
+    old results are reused while they last without filling the deep slots for ever.
+    """
+
+    keys: array
+    data: array
+    age: int
+    hits: int
+    misses: int
+    overwrites: int
+
+    def __init__(self, size_mb: float = 16):
+        bucket_count = max(1, int(size_mb * 1024 * 1024) // (_ENTRY_BYTES * 2))
+        self.keys = array("Q", bytes(8 * 2 * bucket_count))
+        self.data = array("Q", bytes(8 * 2 * bucket_count))
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def size_mb(self) -> float:
+        return len(self) * _ENTRY_BYTES / (1024 * 1024)
+
+    def _bucket(self, key: int) -> int:
+        return (key % (len(self.keys) // 2)) * 2
+
+    def probe(self, key: int) -> TranspositionEntry | None:
+        slot = self._bucket(key)
+        for index in (slot, slot + 1):
+            if self.keys[index] == key and self.data[index] & _OCCUPIED:
+                self.hits += 1
+                return TranspositionEntry(key, self.data[index])
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int = 0):
+        slot = self._bucket(key)
+        deepest = self.data[slot]
+        if (
+            not deepest & _OCCUPIED
+            or self.keys[slot] == key
+            or deepest >> _AGE_SHIFT != self.age
+            or depth >= (deepest >> 48) & 0xFF
+        ):
+            index = slot
+        else:
+            index = slot + 1
+
+        if self.data[index] & _OCCUPIED and self.keys[index] != key:
+            self.overwrites += 1
+        self.keys[index] = key
+        self.data[index] = _pack(depth, score, bound, move, self.age)
+
+    def new_search(self):
+        self.age = (self.age + 1) % AGE_COUNT
+
+    def clear(self):
+        self.keys = array("Q", bytes(8 * len(self.keys)))
+        self.data = array("Q", bytes(8 * len(self.data)))
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def stats(self) -> dict[str, int | float]:
+        used = sum(1 for data in self.data if data & _OCCUPIED)
+        return {
+            "size_mb": self.size_mb,
+            "entries": len(self),
+            "used": used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "overwrites": self.overwrites,
+        }
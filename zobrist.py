@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import random
+
+"""
+    Random 64-bit keys for Zobrist hashing. A position's key is the XOR of the keys of its
+    pieces on their squares, the side to move, the castling rights and the en passant file,
+    so a move only has to XOR in and out the handful of keys it changes.
+
+    The keys come from a fixed seed so that hashes are stable across processes and runs.
+"""
+_random = random.Random(0x5EED)  # noqa: S311
+
+
+def _key() -> int:
+    return _random.getrandbits(64)
+
+
+PIECE_KEYS = [[[_key() for _ in range(64)] for _ in range(6)] for _ in range(2)]
+BLACK_TO_MOVE_KEY = _key()
+CASTLING_KEYS = [_key() for _ in range(16)]
+EN_PASSANT_KEYS = [_key() for _ in range(8)]
+
+"""
+    Castling rights are kept as a bit mask.
+"""
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8